@@ -1,17 +1,70 @@
-import subprocess
 import sys
 import time
 import argparse
 import json
 import os
 
-def run_command(cmd):
-    print(f"🚀 Running: {cmd}")
-    try:
-        subprocess.run(cmd, shell=True, check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error running command: {cmd}")
-        sys.exit(1)
+import config
+from evolution import Trainer
+from trainer import build_parser
+from generate_data import generate_dataset, save_dataset, load_shame_data
+
+class ActiveLearningLoop:
+    """
+    Active learning inside one process: generate data -> train -> adapt weights ->
+    fresh blood, cycle after cycle. The Trainer (islands, worker pool, fitness and
+    compile caches, Hall of Shame) lives across cycles; a cycle only swaps the dataset
+    (Trainer.set_data) and updates the strict weights in place, so it costs no
+    interpreter start, imports, pool start-up or island pickling.
+    """
+    def __init__(self, args):
+        self.args = args
+        trainer_args = build_parser().parse_args([
+            "--generations", str(args.gens_per_cycle),
+            "--pop-size", str(args.pop_size),
+            "--jobs", str(args.jobs),
+            "--swap", args.swap,
+            "--resume"
+        ])
+        train_data, val_data = self.generate_data(load_shame_data())
+        self.trainer = Trainer(trainer_args, train_data, val_data)
+
+    def generate_data(self, shame_data):
+        """Targeted data for the next cycle (also written to data/ for the analysis tools)."""
+        train_data, val_data, test_data = generate_dataset(shame_data)
+        save_dataset(train_data, val_data, test_data)
+        return train_data, val_data
+
+    def run(self):
+        try:
+            for i in range(self.args.cycles):
+                print(f"\n>>> CYCLE {i+1}/{self.args.cycles} <<<\n")
+                cycle_start = time.perf_counter()
+                
+                # 1. Generate Data (from the in-memory Hall of Shame)
+                if i > 0:
+                    print("--- Step 1: Generating Data (Targeted) ---")
+                    self.trainer.set_data(*self.generate_data(self.trainer.tracker.failure_data))
+                
+                # 2. Train (islands continue from memory)
+                print(f"--- Step 2: Training ({self.args.gens_per_cycle} generations) ---")
+                train_start = time.perf_counter()
+                self.trainer.train()
+                train_seconds = time.perf_counter() - train_start
+                if self.trainer.stop_requested:
+                    break
+                
+                # 3. Adaptive Weighting (the Trainer reads config's weight dicts, updated in place)
+                print("--- Step 3: Adaptive Weighting ---")
+                update_weights("cycle_stats.json", config.CONFIG_PATH, loaded=config.config)
+                
+                # 4. Fresh Blood Injection (Diversity Check)
+                check_diversity("diversity_stats.json", trainer=self.trainer)
+                
+                overhead = time.perf_counter() - cycle_start - train_seconds
+                print(f"✅ Cycle {i+1} completed (training {train_seconds:.1f}s, other stages {overhead:.2f}s).")
+        finally:
+            self.trainer.close()
 
 def main():
     parser = argparse.ArgumentParser(description="🔄 EvoName Active Learning Loop")
@@ -32,50 +85,17 @@ def main():
     print("==================================================\n")
     
     try:
-        for i in range(args.cycles):
-            print(f"\n>>> CYCLE {i+1}/{args.cycles} <<<\n")
-            
-            # 1. Generate Data (will read difficulty.json if exists)
-            print("--- Step 1: Generating Data (Targeted) ---")
-            run_command("python generate_data.py")
-            
-            # 2. Train (Resume if not first cycle, or if user wants to resume previous run)
-            # We always use --resume to keep the population evolving.
-            # If it's a fresh start, ensure model/ directory is empty or ignore resume warning.
-            print(f"--- Step 2: Training ({args.gens_per_cycle} generations) ---")
-            
-            # We need to pass the TOTAL generations target to trainer.py if it resumes?
-            # No, trainer.py loop is `range(start_gen, args.generations)`.
-            # If we resume, we need to know where we left off, OR trainer.py needs to handle incremental generations.
-            # Currently trainer.py starts from 0 unless we modify it to load generation count.
-            # BUT: DEAP's logbook or the population file doesn't explicitly store "current generation" in a way trainer.py reads to set start_gen.
-            # trainer.py just loads the population and runs for `args.generations`.
-            # So if we say --generations 30, it runs 30 *more* generations?
-            # Let's check trainer.py loop: `for gen in range(start_gen, self.args.generations):`
-            # `start_gen` is hardcoded to 0.
-            # So it will run 0..30.
-            # If we resume, we load the population, but the generation counter resets to 0 in the logs.
-            # That's fine for now, effectively we run 30 more generations each time.
-            
-            cmd = f"python trainer.py --generations {args.gens_per_cycle} --pop-size {args.pop_size} --resume --jobs {args.jobs} --swap {args.swap}"
-            run_command(cmd)
-            
-            # 3. Adaptive Weighting
-            print("--- Step 3: Adaptive Weighting ---")
-            update_weights("cycle_stats.json", "config.yaml")
-            
-            # 4. Fresh Blood Injection (Diversity Check)
-            check_diversity("diversity_stats.json")
-            
-            print(f"✅ Cycle {i+1} completed.")
-            time.sleep(2)
-            
+        ActiveLearningLoop(args).run()
     except KeyboardInterrupt:
         print("\n\n🛑 Active Learning Loop Interrupted by User.")
         print("Exiting gracefully...")
         sys.exit(0)
 
-def update_weights(stats_path, config_path):
+def update_weights(stats_path, config_path, loaded=None):
+    """
+    Adapts weights_main_strict to the last cycle's stats and writes config_path.
+    loaded: an already loaded config dict (config.config) to update in place instead of re-reading the file.
+    """
     if not os.path.exists(stats_path):
         print(f"⚠️ Stats file {stats_path} not found. Skipping adaptation.")
         return
@@ -86,8 +106,11 @@ def update_weights(stats_path, config_path):
         with open(stats_path, "r") as f:
             stats = json.load(f)
             
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+        if loaded is not None:
+            config = loaded
+        else:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = yaml.safe_load(f)
             
         print(f"📊 Current Stats: Title={stats['title']:.2f}, Suffix={stats['suffix']:.2f}, Family={stats['family']:.2f}")
         
@@ -116,6 +139,7 @@ def update_weights(stats_path, config_path):
         # Update config (weights_main_strict)
         # We only update strict weights because easy weights are for warmup
         old_weights = config["weights_main_strict"]
+        preview_weights("cycle_metrics.npy", old_weights, {**old_weights, **new_weights}, config.get("gates_main_strict"))
         
         print("⚖️  Adjusting Weights (Main Strict):")
         for key, val in new_weights.items():
@@ -135,7 +159,24 @@ def update_weights(stats_path, config_path):
     except Exception as e:
         print(f"❌ Failed to update weights: {e}")
 
-def check_diversity(stats_path):
+def preview_weights(metrics_path, old_weights, new_weights, gates):
+    """Re-scores the last champion's metric matrix under old vs. new weights (no tree is run)."""
+    if not os.path.exists(metrics_path):
+        return
+
+    try:
+        import numpy as np
+        from evaluator import score_metrics
+
+        metrics = np.load(metrics_path)
+        old_score = score_metrics(metrics, old_weights, gates)
+        new_score = score_metrics(metrics, new_weights, gates)
+        print(f"🔮 Champion Preview (Strict): {old_score:.4f} -> {new_score:.4f}")
+    except Exception as e:
+        print(f"⚠️ Could not preview weights: {e}")
+
+def check_diversity(stats_path, trainer=None):
+    """Fresh blood on low diversity: re-seeds the satellites of `trainer`, or deletes their island files."""
     if not os.path.exists(stats_path):
         return
         
@@ -154,6 +195,11 @@ def check_diversity(stats_path):
             # Main Island is kept (Champion survives)
             # Satellites will be re-initialized randomly by trainer.py
             
+            if trainer is not None:
+                trainer.reseed_satellites()
+                print("✅ Satellite islands re-seeded.\n")
+                return
+            
             files_to_delete = [
                 "model/island_detail.pkl",
                 "model/island_structure.pkl"
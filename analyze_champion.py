@@ -4,6 +4,7 @@ import argparse
 from deap import gp, creator, base
 from primitive_set import *
 import primitive_set
+from champion_artifact import load_artifact, artifact_parser
 
 import operator
 
@@ -68,13 +69,19 @@ def calculate_entry_f1(pred: NameObj, truth: Dict) -> float:
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze Champion Performance")
-    parser.add_argument("--model", default="model/champion.pkl", help="Path to champion model")
+    parser.add_argument("--model", default="model/champion.json", help="Path to champion model (champion.json or champion.pkl)")
     parser.add_argument("--data", default="data/training_data.json", help="Path to dataset")
     args = parser.parse_args()
     
     print(f"Loading model from {args.model}...")
-    with open(args.model, "rb") as f:
-        champion = pickle.load(f)
+    if args.model.endswith(".json"):
+        artifact = load_artifact(args.model)
+        champion = artifact["expr"]
+        func = artifact_parser(artifact, repair=False)
+    else:
+        with open(args.model, "rb") as f:
+            champion = pickle.load(f)
+        func = gp.compile(champion, create_pset())
     
     print(f"Champion Tree: {champion}")
         
@@ -82,10 +89,6 @@ def main():
     with open(args.data, "r", encoding="utf-8") as f:
         data = json.load(f)
         
-    # Compile
-    pset = create_pset()
-    func = gp.compile(champion, pset)
-    
     print("Evaluating...")
     
     buckets = {
@@ -0,0 +1,237 @@
+import json
+import queue
+import random
+import signal
+import argparse
+import multiprocessing
+import time
+from typing import List, Dict, Tuple
+
+from deap import creator, tools
+
+from compact_tree import CompactIndividual
+from ui import draw_bar
+
+POLL_SECONDS = 0.5
+JOIN_SECONDS = 60 # Grace period for island processes to finish their generation on shutdown
+
+def split_jobs(jobs: int, n_islands: int) -> List[int]:
+    """Evaluation workers per island; the remainder goes to Main (index 0) first."""
+    base, extra = divmod(max(jobs, n_islands), n_islands)
+    return [base + (1 if i < extra else 0) for i in range(n_islands)]
+
+def migration_policies(swap_rates: List[int], routes: List[Tuple[int, int]]) -> Dict[int, Tuple[int, List[int]]]:
+    """Per-island policy from the lock-step settings: island -> (send every N own generations, destinations)."""
+    return {i: (rate, [d for s, d in routes if s == i]) for i, rate in enumerate(swap_rates)}
+
+def decode_population(codes) -> List[CompactIndividual]:
+    """Rebuilds individuals from (codes, consts, fitness values or None) triples."""
+    population = []
+    for tree_codes, consts, values in codes:
+        ind = CompactIndividual(tree_codes, consts, creator.FitnessMax())
+        if values is not None:
+            ind.fitness.values = values
+        population.append(ind)
+    return population
+
+def encode_population(population) -> List[Tuple[bytes, Tuple, Tuple]]:
+    return [(ind.codes, ind.consts, ind.fitness.values if ind.fitness.valid else None) for ind in population]
+
+def drain(inbox) -> List:
+    """Everything currently waiting in a queue, without blocking."""
+    items = []
+    while True:
+        try:
+            items.extend(inbox.get_nowait())
+        except queue.Empty:
+            return items
+
+def discard(channel):
+    """Throws away everything currently waiting in a queue."""
+    while True:
+        try:
+            channel.get_nowait()
+        except queue.Empty:
+            return
+
+def shutdown_islands(processes, channels, timeout: float = JOIN_SECONDS):
+    """
+    Joins the local island processes. Their queues are emptied meanwhile (a process
+    exits only once its queued messages are flushed); processes still alive after
+    `timeout` are terminated.
+    """
+    deadline = time.monotonic() + timeout
+    for proc in processes:
+        while proc.is_alive() and time.monotonic() < deadline:
+            for channel in channels:
+                discard(channel)
+            proc.join(POLL_SECONDS)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join()
+
+def run_island(i: int, args, train_data, codes, policy, inboxes, results, stop, start_gen: int, end_gen: int):
+    """
+    A steady evolutionary loop for island i with its own Trainer
+    (own evaluation pool of args.jobs workers, own fitness cache). Migrants are picked
+    up from inboxes[i] before every generation and sent whenever the island's own
+    generation count hits its rate. Main runs until end_gen and drives the curriculum;
+    the satellites run until `stop` is set.
+    """
+    for inbox in inboxes:
+        if hasattr(inbox, "cancel_join_thread"):
+            inbox.cancel_join_thread() # Unread migrants must not block exit
+    from evolution import Trainer, MIGRANTS # evolution imports this module
+
+    random.seed(args.seed + i)
+    trainer = Trainer(args, train_data, [])
+    trainer.islands = [[] for _ in trainer.island_names]
+    trainer.islands[i] = island = decode_population(codes)
+    rate, destinations = policy
+
+    gen = start_gen if i == 0 else 0
+    try:
+        while not stop.is_set() and (i != 0 or gen < end_gen):
+            gen_start = time.perf_counter()
+            trainer.fitness_cache.start_generation()
+            if i == 0:
+                trainer.register_main_evaluator(gen)
+
+            migrants = drain(inboxes[i])
+            if migrants:
+                trainer.receive_migrants(i, decode_population(migrants))
+            # Newcomers (and a fresh population) are evaluated before they compete
+            trainer.evaluate_islands([(i, [ind for ind in island if not ind.fitness.valid])])
+
+            offspring = trainer.vary(island)
+            trainer.evaluate_islands([(i, [ind for ind in offspring if not ind.fitness.valid])])
+            island[:] = offspring
+
+            record = trainer.stats.compile(island)
+            fits = [ind.fitness.values[0] for ind in island]
+            mean = sum(fits) / len(fits)
+            std_dev = (sum((x - mean) ** 2 for x in fits) / len(fits)) ** 0.5
+
+            best = None
+            if i == 0:
+                trainer.hof.update(island)
+                best = encode_population(trainer.hof[:1])
+                if gen % 5 == 0:
+                    trainer.tracker.update(island, trainer.train_data, trainer.pset)
+                    trainer.tracker.save()
+                    with open("model/state.json", "w") as f:
+                        json.dump({"gen": gen + 1}, f)
+                trainer.track_stagnation(record['max'])
+
+            if gen > 0 and gen % rate == 0:
+                sent = encode_population(tools.selBest(island, MIGRANTS))
+                for dest in destinations:
+                    inboxes[dest].put(sent)
+            results.put(("gen", i, gen, record['max'], std_dev, time.perf_counter() - gen_start, len(migrants), best))
+            gen += 1
+    finally:
+        trainer.eval_pool.close()
+        results.put(("done", i, gen, encode_population(island)))
+
+def island_process(*args):
+    """Local process target for run_island."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # The coordinator handles Ctrl+C
+    run_island(*args)
+
+def run_async_islands(trainer, start_gen: int, end_gen: int, swap_rates: List[int], routes: List[Tuple[int, int]]) -> int:
+    """
+    Runs every island in its own process (--async-islands) and collects them back
+    into trainer.islands / trainer.hof. Islands never wait for each other: the
+    coordinator only prints progress, keeps the Main champion and stops the
+    satellites once Main has done its generations (or Ctrl+C was pressed).
+    With a cluster coordinator (--listen) the islands are offered to remote island
+    workers instead of local processes; the queues are then served over TCP.
+    Returns the generation Main reached.
+    """
+    n = len(trainer.islands)
+    shares = split_jobs(trainer.args.jobs, n)
+    policies = migration_policies(swap_rates, routes)
+    coordinator = trainer.coordinator
+    if coordinator:
+        # Remote islands: claimed by `cluster.py --role island` workers, channels served over TCP
+        inboxes, results, stop = coordinator.island_channels(n)
+        trainer.console.print(f"[bold yellow]Async islands: waiting for {n} island workers (python cluster.py --connect HOST:PORT --authkey KEY --role island)[/bold yellow]")
+    else:
+        inboxes = [multiprocessing.Queue() for _ in range(n)]
+        results = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        trainer.console.print(f"[bold yellow]Async islands: {', '.join(f'{name} x{share}' for name, share in zip(trainer.island_names, shares))} workers[/bold yellow]")
+
+    processes = []
+    for i in range(n):
+        island_args = argparse.Namespace(**vars(trainer.args))
+        island_args.jobs = shares[i]
+        island_args.async_islands = False
+        island_args.listen = None
+        island_args.run_id = trainer.run_id
+        codes = encode_population(trainer.islands[i])
+        if coordinator:
+            coordinator.dispatcher.offer_island(i, (island_args, trainer.train_data, codes, policies[i], start_gen, end_gen, n))
+            continue
+        proc = multiprocessing.Process(
+            target=island_process, name=f"island-{trainer.island_names[i]}",
+            args=(i, island_args, trainer.train_data, codes, policies[i], inboxes, results, stop, start_gen, end_gen))
+        proc.start()
+        processes.append(proc)
+
+    def lost(i):
+        if coordinator:
+            return not coordinator.dispatcher.island_alive(i)
+        return not processes[i].is_alive() and processes[i].exitcode != 0
+
+    finished = {}
+    main_gen = start_gen
+    try:
+        while len(finished) < n:
+            if trainer.stop_requested:
+                stop.set()
+            if stop.is_set() and coordinator:
+                for i in coordinator.dispatcher.withdraw_islands():
+                    finished[i] = None # Never claimed, keeps its population
+            try:
+                msg = results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                for i in range(n):
+                    if i not in finished and lost(i):
+                        # A lost satellite only stops its own migration; losing Main ends the run
+                        trainer.console.print(f"[bold red]❌ Island {trainer.island_names[i]} was lost, keeping its last population[/bold red]")
+                        finished[i] = None
+                        if i == 0:
+                            stop.set()
+                continue
+
+            if msg[0] == "gen":
+                _, i, gen, max_val, std_val, seconds, received, best = msg
+                color = "green" if max_val > 0 else "red"
+                row = f"{trainer.island_names[i]:<9} {gen+1:<4} | [{color}]{max_val:6.4f}[/{color}] (σ{std_val:4.2f}) {draw_bar(max_val)} | {seconds:5.2f}s"
+                if received:
+                    row += f" [italic grey]+{received} migrants[/italic grey]"
+                trainer.console.print(row)
+                trainer.logbook.record(gen=gen, island=i, max=max_val)
+                if best:
+                    champion = decode_population(best)
+                    trainer.hof.clear()
+                    trainer.hof.insert(champion[0])
+                    if champion[0].fitness.values[0] >= trainer.best_fitness_so_far:
+                        trainer.best_fitness_so_far = champion[0].fitness.values[0]
+                        trainer.save_champion(gen + 1, directories=[trainer.art_dir, trainer.model_dir])
+            else:
+                _, i, gen, codes = msg
+                finished[i] = codes
+                if i == 0:
+                    main_gen = gen
+                    stop.set()
+    finally:
+        # Also on errors in this loop: no island may keep running (or hold the run open)
+        stop.set()
+        shutdown_islands(processes, [results, *inboxes])
+
+    for i, codes in finished.items():
+        if codes is not None:
+            trainer.islands[i] = decode_population(codes)
+    return main_gen
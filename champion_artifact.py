@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import functools
+from typing import Dict, Any, Callable, Optional
+
+import primitive_set
+from primitive_set import (
+    NameObj, ARGUMENT_NAME, DEFAULT_LOCALE, REGEX_DEFINITIONS_PATH,
+    primitive_specs, terminal_specs, pset_signature
+)
+from post_processor import repair_name_object
+
+# champion.json: the exported champion as plain JSON. Unlike champion.pkl it needs
+# neither deap nor the creator classes, so inference processes start in milliseconds.
+# Keep this module's imports to primitive_set and post_processor (see evoname_runtime.py):
+# hashlib, warnings and datetime are imported where they are used.
+ARTIFACT_FORMAT = "evoname-champion"
+ARTIFACT_VERSION = 1
+
+# Tokens of a champion expression: numbers, names, parentheses and commas
+EXPR_TOKEN = re.compile(r"\s*(?:-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|([A-Za-z_]\w*)|[(),])")
+
+def regex_definitions_hash(path: str = REGEX_DEFINITIONS_PATH) -> str:
+    import hashlib
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def build_artifact(champion, metrics: Optional[Dict[str, float]] = None, generation: Optional[int] = None,
+                   locale: str = DEFAULT_LOCALE) -> Dict[str, Any]:
+    """
+    Artifact of a PrimitiveTree champion. The tree is stored as its prefix
+    expression (the champion.txt text), which is also valid Python over the
+    primitive set's names. metrics: the champion's metric means on the training data.
+    """
+    import datetime
+    fitness = getattr(champion, "fitness", None)
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "expr": str(champion),
+        "size": len(champion),
+        "height": champion.height,
+        "pset_signature": pset_signature(),
+        "locale": locale,
+        "regex_definitions": regex_definitions_hash(),
+        "fitness": list(fitness.values) if fitness is not None and fitness.valid else None,
+        "metrics": metrics,
+        "generation": generation,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+def artifact_from_pickle(path: str, locale: str = DEFAULT_LOCALE) -> Dict[str, Any]:
+    """Artifact of a champion.pkl (needs deap to unpickle the DEAP Individual)."""
+    import pickle
+    from deap import base, creator, gp
+    if not hasattr(creator, "FitnessMax"):
+        creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+    if not hasattr(creator, "Individual"):
+        creator.create("Individual", gp.PrimitiveTree, fitness=creator.FitnessMax)
+    with open(path, "rb") as f:
+        champion = pickle.load(f)
+    if not isinstance(champion, gp.PrimitiveTree):
+        raise ValueError(f"{path} does not hold a champion tree")
+    return build_artifact(champion, locale=locale)
+
+def save_artifact(path: str, artifact: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, indent=2)
+
+def load_artifact(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        artifact = json.load(f)
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a champion artifact")
+    if artifact.get("version", 0) > ARTIFACT_VERSION:
+        raise ValueError(f"{path} has artifact version {artifact['version']}, this version reads up to {ARTIFACT_VERSION}")
+    return artifact
+
+def runtime_namespace(locale: str = DEFAULT_LOCALE) -> Dict[str, Any]:
+    """Primitive functions and named terminal values by name (what gp.compile binds via pset.context)."""
+    namespace = {func.__name__: func for func, _, _ in primitive_specs()}
+    namespace.update((name, value) for name, value, _ in terminal_specs())
+    if locale != DEFAULT_LOCALE:
+        namespace["tokenize"] = functools.partial(primitive_set.tokenize, locale=locale)
+    return namespace
+
+def compile_expression(expr: str, namespace: Dict[str, Any]) -> Callable:
+    """
+    Function of raw_input for a champion expression. The expression is checked
+    token by token first: numbers, parentheses, commas and names of the namespace
+    only, so an artifact cannot smuggle in other Python code.
+    """
+    pos, end = 0, len(expr.rstrip())
+    while pos < end:
+        match = EXPR_TOKEN.match(expr, pos)
+        if match is None:
+            raise ValueError(f"Invalid champion expression at position {pos}: {expr[pos:pos + 20]!r}")
+        name = match.group(1)
+        if name is not None and name not in namespace and name != ARGUMENT_NAME:
+            raise ValueError(f"Unknown primitive or terminal in champion expression: {name}")
+        pos = match.end()
+    return eval(f"lambda {ARGUMENT_NAME}: {expr}", {"__builtins__": {}, **namespace})
+
+def artifact_parser(artifact: Dict[str, Any], repair: bool = True, strict: bool = True) -> Callable[[str], NameObj]:
+    """
+    Runnable parser of an artifact: raw string -> NameObj, post-processed with
+    repair_name_object like during evaluation (repair=False returns the bare program).
+    strict: a champion evolved with another primitive set raises instead of warning.
+    """
+    import warnings
+    if artifact.get("pset_signature") != pset_signature():
+        message = "Champion was evolved with a different primitive set"
+        if strict:
+            raise ValueError(message)
+        warnings.warn(message)
+    if os.path.exists(REGEX_DEFINITIONS_PATH) and artifact.get("regex_definitions") != regex_definitions_hash():
+        warnings.warn(f"{REGEX_DEFINITIONS_PATH} changed since the champion was exported; tokenization may differ")
+
+    program = compile_expression(artifact["expr"], runtime_namespace(artifact.get("locale", DEFAULT_LOCALE)))
+    if not repair:
+        return program
+
+    def parse(raw: str) -> NameObj:
+        return repair_name_object(program(raw))
+    return parse
+
+def load_parser(path: str, **kwargs) -> Callable[[str], NameObj]:
+    return artifact_parser(load_artifact(path), **kwargs)
+
+def load_tree(artifact: Dict[str, Any], pset):
+    """The champion as a deap PrimitiveTree (analysis tools, transpiler)."""
+    from deap import gp
+    return gp.PrimitiveTree.from_string(artifact["expr"], pset)
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert a champion.pkl into a champion.json artifact")
+    parser.add_argument("--from", dest="source", type=str, default="model/champion.pkl", help="Pickled DEAP champion.")
+    parser.add_argument("--out", type=str, default="model/champion.json", help="Artifact to write.")
+    parser.add_argument("--locale", type=str, default=DEFAULT_LOCALE, help="Tokenizer locale the champion was trained for.")
+    args = parser.parse_args()
+
+    artifact = artifact_from_pickle(args.source, args.locale)
+    artifact_parser(artifact) # Fails on an expression this primitive set cannot run
+    save_artifact(args.out, artifact)
+    print(f"✅ Wrote {args.out} ({artifact['size']} nodes, fitness {artifact['fitness']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import io
+import os
+import time
+import zlib
+import queue
+import pickle
+import struct
+import threading
+from typing import List, Dict, Any, Optional, Iterator
+
+MAGIC = b"EVOCKPT1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<II") # payload length, crc32
+COMPACT_EVERY = 10 # Records per full snapshot: bounds replay work and file size
+
+class _PlainUnpickler(pickle.Unpickler):
+    """Checkpoint records only hold builtins (bytes, tuples, lists, dicts, numbers, strings)."""
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Checkpoint records may not reference {module}.{name}")
+
+def encode_record(payload: Dict[str, Any]) -> bytes:
+    data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    return HEADER.pack(len(data), zlib.crc32(data)) + data
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a stream in order. A torn or corrupt tail (crash mid-write) ends the stream."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint stream")
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, crc = HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length or zlib.crc32(data) != crc:
+                return
+            yield _PlainUnpickler(io.BytesIO(zlib.decompress(data))).load()
+
+def load_stream(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Replays a stream: the last full record plus the deltas after it.
+    Returns the newest state with trees resolved, i.e. islands and hof as lists of
+    (codes, consts, fitness values or None), or None for an empty stream.
+    """
+    state, trees, logbook = None, [], []
+    for record in read_records(path):
+        if record["kind"] == "full":
+            trees, logbook = [], []
+        trees.extend(record["trees"])
+        logbook.extend(record["logbook"])
+        state = record
+    if state is None:
+        return None
+
+    def resolve(ids, values):
+        return [(*trees[t], v) for t, v in zip(ids, values)]
+
+    state = dict(state)
+    state["islands"] = [resolve(ids, values) for ids, values in state["islands"]]
+    state["hof"] = resolve(*state["hof"])
+    state["logbook"] = logbook
+    return state
+
+class CheckpointWriter:
+    """
+    Appends checkpoint records to `path` from a background thread.
+
+    submit() takes a snapshot of plain data (see Trainer.checkpoint_state; its
+    logbook holds only the rows added since the previous snapshot) and
+    returns at once; the writer deduplicates trees, so a delta record only holds
+    trees not yet in the file plus per-island tree ids and fitness values.
+    Every COMPACT_EVERY records (and first thing after opening) the stream is
+    rewritten as a single full record (temp file + rename), so its size and the
+    replay work on resume depend on the population, not on the run's length.
+    """
+    def __init__(self, path: str, compact_every: int = COMPACT_EVERY):
+        self.path = path
+        self.compact_every = compact_every
+        self.queue = queue.Queue(maxsize=2) # Back-pressure if the disk cannot keep up
+        self.tree_ids: Dict[tuple, int] = {} # Trees in the file since the last full record
+        self.records = 0
+        self.logbook: List[Dict[str, Any]] = [] # Rows received so far (snapshots only carry new rows)
+        self.stats: Dict[str, Any] = {}
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, state: Dict[str, Any]):
+        self.queue.put(state)
+
+    def flush(self):
+        """Blocks until every submitted snapshot is on disk."""
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            state = self.queue.get()
+            try:
+                if state is None:
+                    return
+                self._write(state)
+            except Exception as e:
+                self.error = e
+                print(f"⚠️ Checkpoint write failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, state: Dict[str, Any]):
+        start = time.perf_counter()
+        full = self.records == 0 or self.records >= self.compact_every
+        self.logbook.extend(state["logbook"])
+        if full:
+            self.tree_ids = {}
+
+        new_trees = []
+        def tree_id(key):
+            i = self.tree_ids.get(key)
+            if i is None:
+                i = self.tree_ids[key] = len(self.tree_ids)
+                new_trees.append(key)
+            return i
+
+        def encode(individuals):
+            return [tree_id(key) for key, _ in individuals], [values for _, values in individuals]
+
+        record = {
+            "version": FORMAT_VERSION,
+            "kind": "full" if full else "delta",
+            "gen": state["gen"],
+            "signature": state["signature"],
+            "islands": [encode(island) for island in state["islands"]],
+            "hof": encode(state["hof"]),
+            "rng": state["rng"],
+            "trainer": state["trainer"],
+            "logbook": self.logbook if full else state["logbook"],
+        }
+        record["trees"] = new_trees
+        data = encode_record(record)
+
+        if full:
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(MAGIC + data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.records = 1
+        else:
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.records += 1
+        self.stats = {"gen": state["gen"], "kind": record["kind"], "bytes": len(data), "trees": len(new_trees),
+                      "file_bytes": os.path.getsize(self.path), "seconds": time.perf_counter() - start}
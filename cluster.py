@@ -0,0 +1,389 @@
+import os
+import sys
+import time
+import queue
+import socket
+import secrets
+import argparse
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing.managers import BaseManager, EventProxy
+from typing import List, Dict, Any, Optional, Tuple
+
+from evaluator import EvalContext
+from eval_pool import EvalPool, evaluate_batch, load_worker_state
+
+DEFAULT_HOST = "127.0.0.1" # Other machines only with an explicit host (e.g. --listen 0.0.0.0:50515)
+DEFAULT_PORT = 50515
+POLL_SECONDS = 0.5
+HEARTBEAT_SECONDS = 2.0
+STALE_SECONDS = 15.0
+STOP = "stop" # Returned to workers once the coordinator shuts down
+
+def parse_address(text: str) -> Tuple[str, int]:
+    """'host:port', 'host' or ':port' -> (host, port); the host defaults to loopback."""
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host or DEFAULT_HOST, int(port) if port else DEFAULT_PORT
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class Dispatcher:
+    """
+    Coordinator-side task board, shared with remote workers through the manager.
+
+    Evaluation tasks are evaluate_batch argument tuples (encoded trees plus the
+    weight/gate table); workers fetch them one at a time and submit the outputs.
+    Workers join/leave explicitly and refresh a heartbeat; a worker that leaves or
+    goes quiet for stale_seconds has its running tasks put back at the front of the
+    queue. The first submitted result of a task wins, late duplicates are dropped.
+
+    Islands (--async-islands) are offered the same way and claimed by island workers.
+    """
+    def __init__(self, ctx: EvalContext, semantic_cache_bytes: int = 0, stale_seconds: float = STALE_SECONDS):
+        self.payload = (ctx, semantic_cache_bytes)
+        self.version = 0 # Bumped whenever the dataset changes
+        self.stale_seconds = stale_seconds
+        self.cond = threading.Condition()
+        self.pending = deque() # (task id, args)
+        self.running = {} # task id -> (worker id, args)
+        self.done = {} # task id -> output
+        self.workers = {} # worker id -> {"role", "seen", "tasks"}
+        self.islands = deque() # offered (island index, job)
+        self.island_owner = {} # island index -> worker id
+        self.next_id = 0
+        self.closed = False
+
+    # --- Worker side ---
+    def join(self, worker_id: str, role: str = "eval"):
+        """Registers a worker. Evaluation workers get (dataset version, ctx, cache bytes)."""
+        with self.cond:
+            self.workers[worker_id] = {"role": role, "seen": time.monotonic(), "tasks": 0}
+            print(f"📡 Worker joined: {worker_id} ({role})")
+            self.cond.notify_all()
+            return self.dataset() if role == "eval" else None
+
+    def dataset(self) -> Tuple:
+        """(version, ctx, semantic cache bytes) of the current dataset."""
+        return (self.version, *self.payload)
+
+    def leave(self, worker_id: str):
+        with self.cond:
+            self._drop(worker_id)
+
+    def heartbeat(self, worker_id: str) -> bool:
+        """Refreshes a worker. False once the coordinator is shutting down."""
+        with self.cond:
+            if worker_id in self.workers:
+                self.workers[worker_id]["seen"] = time.monotonic()
+            return not self.closed
+
+    def fetch(self, worker_id: str, timeout: float = POLL_SECONDS):
+        """Next (task id, dataset version, args) for this worker, None if there was nothing within timeout, or STOP."""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while not self.pending and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            if self.closed:
+                return STOP
+            info = self.workers.setdefault(worker_id, {"role": "eval", "seen": 0.0, "tasks": 0}) # Rejoin after a reap
+            info["seen"] = time.monotonic()
+            if not self.pending:
+                return None
+            task_id, args = self.pending.popleft()
+            self.running[task_id] = (worker_id, args)
+            return task_id, self.version, args
+
+    def submit(self, worker_id: str, task_id: int, output):
+        with self.cond:
+            if task_id in self.done:
+                return # Already answered by a worker that took over
+            if self.running.pop(task_id, None) is None:
+                self.pending = deque(t for t in self.pending if t[0] != task_id) # Requeued, answered anyway
+            self.done[task_id] = output
+            if worker_id in self.workers:
+                self.workers[worker_id]["tasks"] += 1
+            self.cond.notify_all()
+
+    def claim_island(self, worker_id: str):
+        """(island index, job) for an island worker, None if none is offered, or STOP."""
+        with self.cond:
+            if self.closed:
+                return STOP
+            if worker_id in self.workers:
+                self.workers[worker_id]["seen"] = time.monotonic()
+            if not self.islands:
+                return None
+            i, job = self.islands.popleft()
+            self.island_owner[i] = worker_id
+            return i, job
+
+    # --- Coordinator side ---
+    def set_dataset(self, ctx: EvalContext):
+        """New dataset for all later tasks; workers fetch it when they see the new version."""
+        with self.cond:
+            self.payload = (ctx, self.payload[1])
+            self.version += 1
+
+    def map(self, args_list: List[Tuple]) -> List:
+        """Queues evaluate_batch argument tuples and blocks until every output is in (in order)."""
+        with self.cond:
+            ids = list(range(self.next_id, self.next_id + len(args_list)))
+            self.next_id += len(args_list)
+            self.pending.extend(zip(ids, args_list))
+            self.cond.notify_all()
+            waiting_since = time.monotonic()
+            while not all(t in self.done for t in ids):
+                self.cond.wait(POLL_SECONDS)
+                self._reap()
+                if not self.count("eval") and time.monotonic() - waiting_since > 10 * POLL_SECONDS:
+                    print("⏳ Waiting for evaluation workers (python cluster.py --connect HOST:PORT --authkey KEY)...")
+                    waiting_since = time.monotonic()
+            return [self.done.pop(t) for t in ids]
+
+    def offer_island(self, i: int, job: Tuple):
+        with self.cond:
+            self.islands.append((i, job))
+
+    def withdraw_islands(self) -> List[int]:
+        """Takes back islands nobody claimed yet."""
+        with self.cond:
+            unclaimed = [i for i, _ in self.islands]
+            self.islands.clear()
+            return unclaimed
+
+    def island_alive(self, i: int) -> bool:
+        """False once the worker running island i has left or gone stale."""
+        with self.cond:
+            self._reap()
+            owner = self.island_owner.get(i)
+            return owner is None or owner in self.workers
+
+    def count(self, role: str = "eval") -> int:
+        return sum(1 for info in self.workers.values() if info["role"] == role)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cond:
+            return {
+                "workers": {w: dict(info) for w, info in self.workers.items()},
+                "pending": len(self.pending),
+                "running": len(self.running)
+            }
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def _drop(self, worker_id: str):
+        if self.workers.pop(worker_id, None) is None:
+            return
+        requeued = [(t, args) for t, (w, args) in self.running.items() if w == worker_id]
+        for task_id, args in reversed(requeued):
+            del self.running[task_id]
+            self.pending.appendleft((task_id, args))
+        print(f"📡 Worker left: {worker_id}" + (f" ({len(requeued)} tasks requeued)" if requeued else ""))
+        self.cond.notify_all()
+
+    def _reap(self):
+        now = time.monotonic()
+        for worker_id, info in list(self.workers.items()):
+            if now - info["seen"] > self.stale_seconds:
+                self._drop(worker_id)
+
+class Coordinator:
+    """
+    TCP endpoint (multiprocessing.managers) serving a Dispatcher plus the island
+    channels: one migrant inbox per island, the progress/result queue and the stop
+    event, so remote island processes can run async_islands.run_island unchanged.
+    The manager protocol unpickles what clients send, so the authkey is the only
+    barrier: without one a random key is generated (self.authkey, to hand to workers).
+    """
+    def __init__(self, ctx: EvalContext, address: Tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT),
+                 authkey: Optional[str] = None, semantic_cache_bytes: int = 0, stale_seconds: float = STALE_SECONDS):
+        self.authkey = authkey or secrets.token_urlsafe(24)
+        self.dispatcher = Dispatcher(ctx, semantic_cache_bytes, stale_seconds)
+        self.inboxes = {}
+        self.results = queue.Queue()
+        self.stop = threading.Event()
+        self.closed = False
+
+        class _Server(BaseManager):
+            pass
+        _Server.register("dispatcher", callable=lambda: self.dispatcher)
+        _Server.register("inbox", callable=self.inbox)
+        _Server.register("island_results", callable=lambda: self.results)
+        _Server.register("island_stop", callable=lambda: self.stop, proxytype=EventProxy)
+        self.server = _Server(address=address, authkey=self.authkey.encode()).get_server()
+        self.server.stop_event = threading.Event() # Normally created by serve_forever
+        self.address = self.server.address
+        self.thread = threading.Thread(target=self._accept, name="cluster-accept", daemon=True)
+        self.thread.start()
+
+    def _accept(self):
+        while not self.closed:
+            try:
+                conn = self.server.listener.accept()
+            except OSError:
+                if self.closed:
+                    return
+                continue
+            threading.Thread(target=self.server.handle_request, args=(conn,), daemon=True).start()
+
+    def inbox(self, i: int) -> queue.Queue:
+        return self.inboxes.setdefault(i, queue.Queue())
+
+    def island_channels(self, n: int) -> Tuple[List[queue.Queue], queue.Queue, threading.Event]:
+        return [self.inbox(i) for i in range(n)], self.results, self.stop
+
+    def close(self):
+        if self.closed:
+            return
+        self.dispatcher.close()
+        self.stop.set()
+        time.sleep(POLL_SECONDS) # Let polling workers see STOP
+        self.closed = True
+        self.server.stop_event.set()
+        self.server.listener.close()
+
+class ClusterClient(BaseManager):
+    """Worker-side connection to a Coordinator."""
+    pass
+
+ClusterClient.register("dispatcher")
+ClusterClient.register("inbox")
+ClusterClient.register("island_results")
+ClusterClient.register("island_stop", proxytype=EventProxy)
+
+def connect(address: Tuple[str, int], authkey: str) -> ClusterClient:
+    client = ClusterClient(address=address, authkey=authkey.encode())
+    client.connect()
+    return client
+
+def start_heartbeat(client: ClusterClient, worker_id: str) -> threading.Event:
+    """Background heartbeat (own connection), so long batches do not look like a dead worker."""
+    done = threading.Event()
+    def beat():
+        dispatcher = client.dispatcher()
+        while not done.wait(HEARTBEAT_SECONDS):
+            try:
+                if not dispatcher.heartbeat(worker_id):
+                    return
+            except (EOFError, OSError):
+                return
+    threading.Thread(target=beat, name="cluster-heartbeat", daemon=True).start()
+    return done
+
+def run_eval_worker(address: Tuple[str, int], authkey: str, worker_id: Optional[str] = None):
+    """Evaluation worker: loads the dataset once on join, then runs evaluate_batch tasks until STOP."""
+    worker_id = worker_id or worker_name()
+    client = connect(address, authkey)
+    dispatcher = client.dispatcher()
+    version, ctx, semantic_cache_bytes = dispatcher.join(worker_id, "eval")
+    load_worker_state(ctx, semantic_cache_bytes)
+    beating = start_heartbeat(client, worker_id)
+    try:
+        while True:
+            task = dispatcher.fetch(worker_id, POLL_SECONDS)
+            if task == STOP:
+                break
+            if task is not None:
+                task_id, task_version, args = task
+                if task_version != version:
+                    version, ctx, semantic_cache_bytes = dispatcher.dataset()
+                    load_worker_state(ctx, semantic_cache_bytes)
+                dispatcher.submit(worker_id, task_id, evaluate_batch(*args))
+    except (EOFError, OSError):
+        pass # Coordinator went away
+    finally:
+        beating.set()
+        try:
+            dispatcher.leave(worker_id)
+        except (EOFError, OSError):
+            pass
+
+def run_island_worker(address: Tuple[str, int], authkey: str, jobs: int = 1, worker_id: Optional[str] = None):
+    """Island worker: claims one offered island and evolves it with `jobs` local evaluation processes."""
+    from async_islands import run_island
+
+    worker_id = worker_id or worker_name()
+    client = connect(address, authkey)
+    dispatcher = client.dispatcher()
+    dispatcher.join(worker_id, "island")
+    beating = start_heartbeat(client, worker_id)
+    try:
+        while True:
+            claim = dispatcher.claim_island(worker_id)
+            if claim == STOP:
+                return
+            if claim is None:
+                time.sleep(POLL_SECONDS)
+                continue
+            i, (args, train_data, codes, policy, start_gen, end_gen, n) = claim
+            args.jobs = jobs
+            inboxes = [client.inbox(j) for j in range(n)]
+            run_island(i, args, train_data, codes, policy, inboxes, client.island_results(), client.island_stop(), start_gen, end_gen)
+            return
+    except (EOFError, OSError):
+        pass
+    finally:
+        beating.set()
+        try:
+            dispatcher.leave(worker_id)
+        except (EOFError, OSError):
+            pass
+
+class RemotePool(EvalPool):
+    """EvalPool whose batches run on cluster workers (any machine that connected to the Coordinator)."""
+    def __init__(self, coordinator: Coordinator):
+        self.coordinator = coordinator
+        self.ctx = coordinator.dispatcher.payload[0]
+        self.pool = None
+
+    @property
+    def jobs(self) -> int:
+        return max(1, self.coordinator.dispatcher.count("eval"))
+
+    def map_batches(self, args: List[Tuple]) -> List[Tuple]:
+        return self.coordinator.dispatcher.map(args)
+
+    def load_dataset(self, ctx: EvalContext):
+        self.ctx = ctx
+        self.coordinator.dispatcher.set_dataset(ctx)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="📡 EvoName cluster worker - connects to a trainer started with --listen",
+        epilog="Example: python cluster.py --connect 10.0.0.5:50515 --authkey SECRET --procs 8",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--connect", type=str, required=True, help="Coordinator address HOST:PORT.")
+    parser.add_argument("--authkey", type=str, required=True, help="Shared secret: the trainer's --authkey (or the key it printed).")
+    parser.add_argument("--role", choices=["eval", "island"], default="eval", help="Evaluate batches, or run one island of an --async-islands training.")
+    parser.add_argument("--procs", type=int, default=os.cpu_count(), help="eval: worker processes on this machine. island: local evaluation jobs.")
+    args = parser.parse_args()
+
+    address = parse_address(args.connect)
+    if args.role == "island":
+        run_island_worker(address, args.authkey, jobs=args.procs)
+        return
+
+    print(f"📡 Starting {args.procs} evaluation workers for {address[0]}:{address[1]}")
+    workers = [multiprocessing.Process(target=run_eval_worker, args=(address, args.authkey)) for _ in range(args.procs)]
+    for proc in workers:
+        proc.start()
+    try:
+        for proc in workers:
+            proc.join()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping workers (their running tasks go back to the coordinator)...")
+        for proc in workers:
+            proc.terminate()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
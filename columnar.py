@@ -0,0 +1,337 @@
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+import numpy as np
+from deap import gp
+
+from primitive_set import (
+    NameObj, Gender, RegexToken, TokenList, StringList, tokenize,
+    LEX_GIVEN_NAME, LEX_FAMILY_NAME, LEX_ROMAN_NUMERAL
+)
+from semantic_cache import Const, SubtreeCache
+from compact_tree import as_nodes
+from feature_index import FeatureIndex, index_for
+
+# Columnar interpreter: runs a program once over a whole dataset. Each node is a
+# batch kernel over columns (one value per entry), so the per-entry work is a
+# comprehension or a NumPy operation instead of a chain of Python calls.
+#
+# Columns: np.ndarray for bool/int/float, a list for every other type, Const for
+# subtrees that do not read raw_input (see semantic_cache.py), and a list holding
+# FAILED where a subtree raised on that entry.
+
+NUMPY_TYPES = {bool: np.bool_, int: np.int64, float: np.float64}
+
+WORD = RegexToken.WORD
+SALUTATION, TITLE, DEGREE = RegexToken.SALUTATION, RegexToken.TITLE, RegexToken.DEGREE
+PARTICLE, SUFFIX, CONJUNCTION = RegexToken.PARTICLE, RegexToken.SUFFIX, RegexToken.CONJUNCTION
+MALE, FEMALE = Gender.MALE, Gender.FEMALE
+
+def _bools(values, n: int) -> np.ndarray:
+    return np.fromiter(values, dtype=np.bool_, count=n)
+
+def _ints(values, n: int) -> np.ndarray:
+    return np.fromiter(values, dtype=np.int64, count=n)
+
+def _token_flag(flag: int):
+    def kernel(col):
+        return _bools((bool(t.lexicon & flag) if t else False for t in col), len(col))
+    return kernel
+
+def _token_is(type_: RegexToken):
+    def kernel(col):
+        return _bools((t.type == type_ if t else False for t in col), len(col))
+    return kernel
+
+def _extract(type_: RegexToken):
+    def kernel(col):
+        return [StringList([t.value for t in ts if t.type == type_]) for ts in col]
+    return kernel
+
+def _if_bool_string(cond, a, b):
+    return [x if c else y for c, x, y in zip(cond.tolist(), a, b)]
+
+def _if_bool_tokenlist(cond, a, b):
+    return [TokenList(x if c else y) for c, x, y in zip(cond.tolist(), a, b)]
+
+def _filter_by_type(col, type_):
+    return [TokenList([t for t in ts if t.type == type_]) for ts in col]
+
+def _remove_type(col, type_):
+    return [TokenList([t for t in ts if t.type != type_]) for ts in col]
+
+def _filter_by_shape(col, shape):
+    return [TokenList([t for t in ts if t.shape == shape]) if ts else TokenList([]) for ts in col]
+
+def _is_shape(col, shape):
+    return _bools((t.shape == shape if t else False for t in col), len(col))
+
+def _ngram(col, ngram, starts: bool):
+    if not ngram:
+        return np.zeros(len(col), dtype=np.bool_)
+    ngram = ngram.lower()
+    if starts:
+        return _bools((t.lower.startswith(ngram) if t else False for t in col), len(col))
+    return _bools((t.lower.endswith(ngram) if t else False for t in col), len(col))
+
+def _set_confidence(objs, c):
+    for obj, value in zip(objs, c.tolist()):
+        obj.confidence = value
+    return objs
+
+def _float_op(op):
+    def kernel(*cols):
+        with np.errstate(all="ignore"): # inf/nan like Python floats, no warnings
+            return op(*cols)
+    return kernel
+
+# name -> (kernel, positions of parameter arguments). A parameter (type filter,
+# shape, n-gram) is passed as a plain value; a node whose parameter is not
+# constant runs per entry instead. MAP: the primitive has loops or branches of
+# its own and is mapped over the columns as registered in the pset.
+MAP = None
+
+KERNELS: Dict[str, Tuple[Callable, Tuple[int, ...]]] = {
+    # -- Control Flow --
+    "if_bool_string": (_if_bool_string, ()),
+    "if_bool_tokenlist": (_if_bool_tokenlist, ()),
+    "bool_to_int": (lambda c: c.astype(np.int64), ()),
+    "bool_to_float": (lambda c: c.astype(np.float64), ()),
+    # -- Scoring Math (same comparisons as the scalar versions, so -0.0 and nan agree) --
+    "float_min": (_float_op(lambda a, b: np.where(a < b, a, b)), ()),
+    "float_max": (_float_op(lambda a, b: np.where(a > b, a, b)), ()),
+    "clamp_float": (_float_op(lambda x, lo, hi: np.where(x < lo, lo, np.where(x > hi, hi, x))), ()),
+    "mul": (_float_op(lambda a, b: a * b), ()),
+    # -- String/List Ops --
+    "default_str_if_empty": (lambda s, fb: [x if x else y for x, y in zip(s, fb)], ()),
+    "tokens_to_stringlist": (lambda col: [StringList([t.value for t in ts]) for ts in col], ()),
+    "token_to_tokenlist": (lambda col: [TokenList([t]) if t else TokenList([]) for t in col], ()),
+    "token_to_stringlist": (lambda col: [StringList([t.value]) if t else StringList([]) for t in col], ()),
+    "is_not_empty_tokenlist": (lambda col: _bools(map(bool, col), len(col)), ()),
+    "is_not_empty_stringlist": (lambda col: _bools(map(bool, col), len(col)), ()),
+    "trim": (lambda col: [s.strip() for s in col], ()),
+    "to_lower": (lambda col: [s.lower() for s in col], ()),
+    "split_on_comma": (MAP, ()),
+    "get_first_string": (lambda col: [l[0] if l else "" for l in col], ()),
+    "get_last_string": (lambda col: [l[-1] if l else "" for l in col], ()),
+    "get_first_token": (lambda col: [l[0] if l else None for l in col], ()),
+    "get_last_token": (lambda col: [l[-1] if l else None for l in col], ()),
+    "slice_tokens": (MAP, ()),
+    "len_tokens": (lambda col: _ints(map(len, col), len(col)), ()),
+    "drop_first": (lambda col: [TokenList(l[1:]) if l else TokenList([]) for l in col], ()),
+    "drop_last": (lambda col: [TokenList(l[:-1]) if l else TokenList([]) for l in col], ()),
+    "remove_type": (_remove_type, (1,)),
+    "is_conjunction": (_token_is(CONJUNCTION), ()),
+    "merge_particles": (MAP, ()),
+    "get_remainder_tokens": (MAP, ()),
+    # -- Token Muscles --
+    "tokenize": (MAP, ()),
+    "filter_by_type": (_filter_by_type, (1,)),
+    "get_gender_from_salutation": (MAP, ()),
+    "get_gender_from_name": (MAP, ()),
+    "is_male": (lambda col: _bools((g == MALE for g in col), len(col)), ()),
+    "is_female": (lambda col: _bools((g == FEMALE for g in col), len(col)), ()),
+    # -- Feature Detectors --
+    "has_comma": (lambda col: _bools(("," in s for s in col), len(col)), ()),
+    "is_title": (_token_is(TITLE), ()),
+    "is_salutation": (_token_is(SALUTATION), ()),
+    "identity_token_type": (lambda col: col, ()),
+    # -- Token Accessors --
+    "token_value": (lambda col: [t.value if t else "" for t in col], ()),
+    "token_type_of": (lambda col: [t.type if t else WORD for t in col], ()),
+    "token_index": (lambda col: _ints((t.index if t else -1 for t in col), len(col)), ()),
+    "token_span_start": (lambda col: _ints((t.span[0] if t else -1 for t in col), len(col)), ()),
+    "token_span_end": (lambda col: _ints((t.span[1] if t else -1 for t in col), len(col)), ()),
+    "default_token_if_none": (lambda col, fb: [t if t else f for t, f in zip(col, fb)], ()),
+    # -- Context Primitives --
+    "get_prev_token": (MAP, ()),
+    "get_next_token": (MAP, ()),
+    "is_first_token": (lambda col: _bools((bool(t and t.index == 0) for t in col), len(col)), ()),
+    "is_last_token_in_list": (MAP, ()),
+    # -- New Context Primitives (Old) --
+    "get_tokens_before_comma": (MAP, ()),
+    "get_tokens_after_comma": (MAP, ()),
+    "is_all_caps": (lambda col: _bools((t.value.isupper() and len(t.value) > 1 if t else False for t in col), len(col)), ()),
+    "is_capitalized": (lambda col: _bools((t.value[0].isupper() if t else False for t in col), len(col)), ()),
+    "is_short": (lambda col: _bools((len(t.value) <= 3 if t else False for t in col), len(col)), ()),
+    "is_common_given_name": (_token_flag(LEX_GIVEN_NAME), ()),
+    "is_common_family_name": (_token_flag(LEX_FAMILY_NAME), ()),
+    # -- Statistical & Feature Primitives --
+    "token_length": (lambda col: _ints((len(t.value) if t else 0 for t in col), len(col)), ()),
+    "is_initial": (MAP, ()),
+    "has_hyphen": (lambda col: _bools(("-" in t.value if t else False for t in col), len(col)), ()),
+    "has_period": (lambda col: _bools(("." in t.value if t else False for t in col), len(col)), ()),
+    "is_roman_numeral": (_token_flag(LEX_ROMAN_NUMERAL), ()),
+    "is_particle": (_token_is(PARTICLE), ()),
+    "is_suffix": (_token_is(SUFFIX), ()),
+    # -- Shape & N-Grams --
+    "get_token_shape": (lambda col: [t.shape if t else "" for t in col], ()),
+    "is_shape": (_is_shape, (1,)),
+    "ends_with_ngram": (lambda col, ngram: _ngram(col, ngram, starts=False), (1,)),
+    "starts_with_ngram": (lambda col, ngram: _ngram(col, ngram, starts=True), (1,)),
+    "filter_by_shape": (_filter_by_shape, (1,)),
+    # -- Macro-Primitives (Boosters) --
+    "extract_middle_str": (MAP, ()),
+    "extract_suffix_list": (_extract(SUFFIX), ()),
+    "extract_degree_list": (_extract(DEGREE), ()),
+    "extract_particles_list": (_extract(PARTICLE), ()),
+    # -- Object Builder --
+    "make_name_obj": (MAP, ()),
+    "set_confidence": (_set_confidence, ()),
+}
+
+# Kernels over the dataset's FeatureIndex: name -> (kernel(index, *inputs), parameter
+# positions). They apply when the first argument is the raw_input column (tokenize)
+# or the indexed tokenize(raw_input) column, and look features up instead of scanning.
+INDEXED_KERNELS: Dict[str, Tuple[Callable, Tuple[int, ...]]] = {
+    "tokenize": (lambda index, raws: index.tokens, ()),
+    "filter_by_type": (lambda index, tokens, type_: index.by_type(type_), (1,)),
+    "remove_type": (lambda index, tokens, type_: index.by_type(type_, keep=False), (1,)),
+    "filter_by_shape": (lambda index, tokens, shape: index.by_shape(shape), (1,)),
+    "get_tokens_before_comma": (lambda index, tokens: index.before_comma(), ()),
+    "get_tokens_after_comma": (lambda index, tokens: index.after_comma(), ()),
+    "len_tokens": (lambda index, tokens: index.lengths(), ()),
+}
+
+def shares_result_object(nodes) -> bool:
+    """
+    True if the program returns a NameObj terminal (EMPTY_NAME_OBJ, possibly through
+    set_confidence): one object for every entry, which set_confidence and the
+    post-processor mutate between entries. Such programs must run entry by entry.
+    """
+    i = 0
+    while not isinstance(nodes[i], gp.Terminal) and nodes[i].name == "set_confidence":
+        i += 1 # The NameObj argument directly follows its parent in prefix order
+    return isinstance(nodes[i], gp.Terminal)
+
+def materialize(column, type_, n: int):
+    """Const -> full column in the representation of the argument type."""
+    if isinstance(column, Const):
+        dtype = NUMPY_TYPES.get(type_)
+        return np.full(n, column.value, dtype=dtype) if dtype is not None else [column.value] * n
+    return column
+
+def as_list(column) -> List:
+    return column.tolist() if isinstance(column, np.ndarray) else column
+
+class ColumnarInterpreter:
+    """
+    Runs a program over a whole dataset, one batch kernel per node.
+
+    Outputs agree with the compiled program on every entry: kernels compute what the
+    scalar primitives return, and a node the kernels cannot take (no kernel, a kernel
+    raised, an input has FAILED entries, a parameter is not constant) runs entry by
+    entry through the semantic cache's failure handling instead. Identical subtrees
+    within one program are evaluated once. Across programs only the dataset's FeatureIndex
+    is kept (tokens, token features and derived token-list columns, see feature_index.py).
+    """
+    def __init__(self, kernels: Dict[str, Tuple[Optional[Callable], Tuple[int, ...]]] = KERNELS,
+                 indexed: bool = True):
+        self.kernels = kernels
+        self.indexed = indexed
+        self.indexed_calls = 0
+        self.kernel_calls = 0
+        self.folded = 0
+        self.fallbacks = 0
+
+    def supports(self, individual, pset) -> bool:
+        return not shares_result_object(as_nodes(individual, pset))
+
+    def predict(self, individual, pset, ctx, strict: bool = True) -> Optional[List]:
+        """
+        Per-entry outputs of the program over ctx (FAILED where it raised), or None
+        in strict mode once any entry fails. Same contract as SubtreeCache.predict.
+        """
+        # The index holds default-locale tokens: only for the registered tokenize
+        index = index_for(ctx) if self.indexed and pset.context["tokenize"] is tokenize else None
+        raws = index.raws if index is not None else [entry.raw for entry in ctx.entries]
+        n = len(raws)
+        memo = {}
+        stack = []
+        for node in as_nodes(individual, pset):
+            stack.append((node, []))
+            while len(stack[-1][1]) == stack[-1][0].arity:
+                node, args = stack.pop()
+                key, column, failed = self._node(node, args, pset, raws, strict, memo, index)
+                if failed and strict:
+                    return None
+                if not stack:
+                    if isinstance(column, Const):
+                        return [column.value] * n
+                    return as_list(column)
+                stack[-1][1].append((key, column, failed))
+        return None
+
+    def _node(self, node, args, pset, raws, strict, memo, index):
+        if isinstance(node, gp.Terminal):
+            if node.value in pset.arguments:
+                return node.value, raws, False
+            value = pset.context[node.value] if node.conv_fct is str else node.value
+            return node.format(), Const(value), False
+
+        key = (node.name,) + tuple(a[0] for a in args)
+        hit = memo.get(key)
+        if hit is not None:
+            return hit
+
+        column, failed = self._apply(node, args, pset, len(raws), strict, index)
+        if node.ret is not NameObj: # NameObj outputs are mutated downstream, never shared
+            memo[key] = key, column, failed
+        return key, column, failed
+
+    def _apply(self, node, args, pset, n, strict, index: Optional[FeatureIndex]):
+        func = pset.context[node.name]
+        columns = [a[1] for a in args]
+        foldable = node.ret is not NameObj
+        if foldable and all(isinstance(c, Const) for c in columns):
+            self.folded += 1
+            return SubtreeCache._apply(func, args, n, strict, foldable)
+
+        entry = INDEXED_KERNELS.get(node.name) if index is not None else None
+        if (entry is not None and columns[0] is (index.raws if node.name == "tokenize" else index.tokens)
+                and all(isinstance(columns[p], Const) for p in entry[1])):
+            kernel, params = entry
+            try:
+                column = kernel(index, *[c.value if i in params else c for i, c in enumerate(columns)])
+                self.indexed_calls += 1
+                return column, False
+            except Exception:
+                pass # Same failure handling as the plain kernels
+
+        entry = self.kernels.get(node.name)
+        if (entry is not None and not any(a[2] for a in args)
+                and all(isinstance(columns[p], Const) for p in entry[1])):
+            kernel, params = entry
+            inputs = [columns[i].value if i in params else materialize(columns[i], type_, n)
+                      for i, type_ in enumerate(node.args)]
+            try:
+                if kernel is MAP:
+                    column = list(map(func, *map(as_list, inputs)))
+                    dtype = NUMPY_TYPES.get(node.ret)
+                    if dtype is not None:
+                        column = np.array(column, dtype=dtype)
+                else:
+                    column = kernel(*inputs)
+                self.kernel_calls += 1
+                return column, False
+            except Exception:
+                pass # The scalar path finds (and marks) the failing entries
+
+        self.fallbacks += 1
+        column, failed = SubtreeCache._apply(func, [(None, as_list(c), f) for _, c, f in args], n, strict, foldable)
+        dtype = NUMPY_TYPES.get(node.ret)
+        if dtype is not None and isinstance(column, list) and not failed:
+            column = np.array(column, dtype=dtype)
+        return column, failed
+
+    def stats(self) -> Dict[str, Any]:
+        """Node counters; kernel_rate is the share of per-entry nodes that ran as a kernel."""
+        total = self.indexed_calls + self.kernel_calls + self.fallbacks
+        return {
+            "indexed_calls": self.indexed_calls,
+            "kernel_calls": self.kernel_calls,
+            "folded": self.folded,
+            "fallbacks": self.fallbacks,
+            "kernel_rate": (self.indexed_calls + self.kernel_calls) / total if total else 0.0
+        }
+
+COLUMNAR = ColumnarInterpreter()
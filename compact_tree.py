@@ -0,0 +1,277 @@
+import sys
+import random
+import hashlib
+from array import array
+from collections import defaultdict
+from typing import List, Dict, Tuple, Any
+
+from deap import gp
+
+# Opcode kinds
+NAMED, EPHEMERAL, LITERAL = 0, 1, 2
+
+class CompactTree:
+    """
+    A GP tree as opcodes: `codes` holds one little-endian uint16 per node (prefix
+    order, see OpcodeTable), `consts` the values of the constant nodes in the same
+    order. Both are immutable, so copies share them and (codes, consts) is the
+    tree's hash key for caches and the payload for IPC.
+    """
+    __slots__ = ("codes", "consts")
+
+    def __init__(self, codes: bytes, consts: Tuple = ()):
+        self.codes = codes
+        self.consts = consts
+
+    @property
+    def key(self) -> Tuple[bytes, Tuple]:
+        return self.codes, self.consts
+
+    def __len__(self):
+        return len(self.codes) // 2
+
+    def __eq__(self, other):
+        return isinstance(other, CompactTree) and self.codes == other.codes and self.consts == other.consts
+
+    def __hash__(self):
+        return hash((self.codes, self.consts))
+
+class CompactIndividual(CompactTree):
+    """
+    Population member: a CompactTree plus the attributes the Trainer keeps on
+    individuals (fitness, and metrics / race_aborted where set). Copies share the
+    tree and only duplicate the fitness object.
+    """
+    __slots__ = ("fitness", "metrics", "race_aborted")
+
+    def __init__(self, codes: bytes, consts: Tuple = (), fitness=None):
+        self.codes = codes
+        self.consts = consts
+        self.fitness = fitness
+
+    def __deepcopy__(self, memo):
+        copy_ = CompactIndividual(self.codes, self.consts, self.fitness.__deepcopy__(memo))
+        for attr in ("metrics", "race_aborted"):
+            if hasattr(self, attr):
+                setattr(copy_, attr, getattr(self, attr)) # Metric matrices are never modified in place
+        return copy_
+
+def _to_ops(codes: bytes) -> array:
+    ops = array("H")
+    ops.frombytes(codes)
+    if sys.byteorder != "little":
+        ops.byteswap()
+    return ops
+
+def _to_codes(ops: array) -> bytes:
+    if sys.byteorder != "little":
+        ops = array("H", ops)
+        ops.byteswap()
+    return ops.tobytes()
+
+def _type_name(t) -> str:
+    return f"{t.__module__}.{t.__qualname__}"
+
+class OpcodeTable:
+    """
+    Integer opcodes for a primitive set. Primitives, named terminals, arguments
+    and ephemeral constants are numbered by name, followed by one literal opcode
+    per terminal type (unnamed values, e.g. folded by simplify.py). Ephemeral and
+    literal nodes read their value from the tree's constant pool.
+    The numbering only depends on the pset's names and types, so every process
+    building the same pset decodes the same codes (see `signature`).
+    """
+    def __init__(self, pset):
+        self.pset = pset
+        self.nodes = [] # opcode -> Primitive / Terminal, ephemeral class or literal type
+        self.kinds = []
+        self.opcode: Dict[str, int] = {}
+        self.literal_op: Dict[type, int] = {}
+
+        for name in sorted(pset.mapping):
+            node = pset.mapping[name]
+            self.opcode[name] = len(self.nodes)
+            self.nodes.append(node)
+            self.kinds.append(EPHEMERAL if isinstance(node, gp.MetaEphemeral) else NAMED)
+        for ret_type in sorted(pset.terminals, key=_type_name):
+            self.literal_op[ret_type] = len(self.nodes)
+            self.nodes.append(ret_type)
+            self.kinds.append(LITERAL)
+
+        self.arity = bytes(getattr(node, "arity", 0) if kind == NAMED else 0 for node, kind in zip(self.nodes, self.kinds))
+        self.ret = [node.ret if kind != LITERAL else node for node, kind in zip(self.nodes, self.kinds)]
+        self.has_const = bytes(kind != NAMED for kind in self.kinds)
+
+        lines = []
+        for node, kind in zip(self.nodes, self.kinds):
+            if kind == LITERAL:
+                lines.append(f"literal:{_type_name(node)}")
+            else:
+                lines.append(f"{node.name}:{self.arity[len(lines)]}:{_type_name(node.ret)}:{[_type_name(a) for a in getattr(node, 'args', [])]}")
+        self.signature = hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+    # --- Conversion ---
+
+    def encode(self, nodes) -> Tuple[bytes, Tuple]:
+        """(codes, consts) of a prefix node list (PrimitiveTree or genFull output)."""
+        ops = array("H")
+        consts = []
+        for node in nodes:
+            if isinstance(node, gp.Primitive):
+                ops.append(self.opcode[node.name])
+            elif isinstance(type(node), gp.MetaEphemeral):
+                ops.append(self.opcode[node.name])
+                consts.append(node.value)
+            elif node.conv_fct is str:
+                ops.append(self.opcode[node.value])
+            else:
+                ops.append(self.literal_op[node.ret])
+                consts.append(node.value)
+        return _to_codes(ops), tuple(consts)
+
+    def individual(self, nodes):
+        """Initializer for toolbox.individual: a CompactIndividual with an empty creator.FitnessMax."""
+        from deap import creator
+        return CompactIndividual(*self.encode(nodes), creator.FitnessMax())
+
+    def from_individual(self, individual):
+        """CompactIndividual from a PrimitiveTree individual (fitness copied)."""
+        compact = CompactIndividual(*self.encode(individual), individual.fitness.__deepcopy__({}))
+        if hasattr(individual, "metrics"):
+            compact.metrics = individual.metrics
+        return compact
+
+    def to_nodes(self, tree: CompactTree) -> List:
+        """Prefix node list: shared pset nodes, fresh terminals for pooled constants."""
+        nodes = []
+        consts = iter(tree.consts)
+        for op in _to_ops(tree.codes):
+            kind = self.kinds[op]
+            if kind == NAMED:
+                nodes.append(self.nodes[op])
+            elif kind == EPHEMERAL:
+                term = self.nodes[op].__new__(self.nodes[op])
+                term.value = next(consts) # Name, type and repr come from the ephemeral class
+                nodes.append(term)
+            else:
+                nodes.append(gp.Terminal(next(consts), False, self.nodes[op]))
+        return nodes
+
+    def to_tree(self, tree: CompactTree) -> gp.PrimitiveTree:
+        return gp.PrimitiveTree(self.to_nodes(tree))
+
+    def to_individual(self, individual):
+        """creator.Individual copy of a CompactIndividual (e.g. for champion.pkl)."""
+        from deap import creator
+        ind = creator.Individual(self.to_nodes(individual))
+        ind.fitness = individual.fitness.__deepcopy__({})
+        return ind
+
+    def to_string(self, tree: CompactTree) -> str:
+        return str(self.to_tree(tree))
+
+    def assign(self, tree: CompactTree, nodes):
+        """Replaces the tree's nodes in place (the object keeps its fitness etc.)."""
+        tree.codes, tree.consts = self.encode(nodes)
+
+    # --- Structure ---
+
+    def subtree_end(self, ops, begin: int) -> int:
+        """End (exclusive) of the subtree rooted at ops[begin] (PrimitiveTree.searchSubtree)."""
+        arity = self.arity
+        end = begin + 1
+        total = arity[ops[begin]]
+        while total > 0:
+            total += arity[ops[end]] - 1
+            end += 1
+        return end
+
+    def height(self, tree: CompactTree) -> int:
+        """Depth of the deepest node (PrimitiveTree.height)."""
+        stack = [0]
+        max_depth = 0
+        for arity in map(self.arity.__getitem__, _to_ops(tree.codes)):
+            depth = stack.pop()
+            if arity:
+                depth += 1 # Depth of the children
+                if depth > max_depth:
+                    max_depth = depth
+                stack.extend([depth] * arity)
+        return max_depth
+
+    def const_index(self, ops, end: int) -> int:
+        """Number of pooled constants among ops[:end]."""
+        return sum(map(self.has_const.__getitem__, ops[:end]))
+
+    def splice(self, tree: CompactTree, ops, begin: int, end: int, new_codes: bytes, new_consts: Tuple):
+        """Replaces nodes [begin, end) of tree (decoded as ops) with an encoded subtree."""
+        consts = tree.consts
+        if consts or new_consts:
+            consts = consts[:self.const_index(ops, begin)] + tuple(new_consts) + consts[self.const_index(ops, end):]
+        tree.codes = tree.codes[:2 * begin] + new_codes + tree.codes[2 * end:]
+        tree.consts = consts
+
+    def subtree(self, tree: CompactTree, ops, begin: int, end: int) -> Tuple[bytes, Tuple]:
+        consts = tree.consts
+        if consts:
+            consts = consts[self.const_index(ops, begin):self.const_index(ops, end)]
+        return tree.codes[2 * begin:2 * end], consts
+
+_TABLES: Dict[int, OpcodeTable] = {}
+
+def opcode_table(pset) -> OpcodeTable:
+    """The (per-process cached) OpcodeTable of pset."""
+    table = _TABLES.get(id(pset))
+    if table is None or table.pset is not pset:
+        table = _TABLES[id(pset)] = OpcodeTable(pset)
+    return table
+
+def as_nodes(individual, pset):
+    """Prefix nodes of a PrimitiveTree or CompactTree (PrimitiveTrees are returned as is)."""
+    if isinstance(individual, CompactTree):
+        return opcode_table(pset).to_nodes(individual)
+    return individual
+
+def tree_key(individual) -> Any:
+    """Hashable structural identity: (codes, consts) for compact trees, the expression string otherwise."""
+    if isinstance(individual, CompactTree):
+        return individual.key
+    return str(individual)
+
+# --- Variation on opcodes (same random draws as the deap.gp operators) ---
+
+def cx_one_point(ind1, ind2, table: OpcodeTable):
+    """gp.cxOnePoint for CompactTrees of a typed pset: swaps two random subtrees of equal type."""
+    if len(ind1) < 2 or len(ind2) < 2:
+        return ind1, ind2
+
+    ops1, ops2 = _to_ops(ind1.codes), _to_ops(ind2.codes)
+    ret = table.ret.__getitem__
+    types1 = defaultdict(list)
+    types2 = defaultdict(list)
+    for idx, type_ in enumerate(map(ret, ops1[1:]), 1):
+        types1[type_].append(idx)
+    for idx, type_ in enumerate(map(ret, ops2[1:]), 1):
+        types2[type_].append(idx)
+    common_types = set(types1.keys()).intersection(set(types2.keys()))
+
+    if len(common_types) > 0:
+        type_ = random.choice(list(common_types))
+        index1 = random.choice(types1[type_])
+        index2 = random.choice(types2[type_])
+        end1 = table.subtree_end(ops1, index1)
+        end2 = table.subtree_end(ops2, index2)
+        sub1 = table.subtree(ind1, ops1, index1, end1)
+        sub2 = table.subtree(ind2, ops2, index2, end2)
+        table.splice(ind1, ops1, index1, end1, *sub2)
+        table.splice(ind2, ops2, index2, end2, *sub1)
+    return ind1, ind2
+
+def mut_uniform(individual, expr, pset, table: OpcodeTable):
+    """gp.mutUniform for CompactTrees: replaces a random subtree with expr(pset=pset, type_=...)."""
+    ops = _to_ops(individual.codes)
+    index = random.randrange(len(ops))
+    end = table.subtree_end(ops, index)
+    type_ = table.ret[ops[index]]
+    table.splice(individual, ops, index, end, *table.encode(expr(pset=pset, type_=type_)))
+    return individual,
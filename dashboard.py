@@ -107,7 +107,9 @@ def transpile_champion():
              return jsonify({"status": "error", "message": "No runs found"}), 404
              
         latest_run = runs[-1]
-        champion_path = os.path.join(runs_dir, latest_run, "artifacts", "champion.pkl")
+        champion_path = os.path.join(runs_dir, latest_run, "artifacts", "champion.json")
+        if not os.path.exists(champion_path): # Runs from before champion.json
+            champion_path = os.path.join(runs_dir, latest_run, "artifacts", "champion.pkl")
         
         if not os.path.exists(champion_path):
             return jsonify({"status": "error", "message": "Champion not found in latest run"}), 404
@@ -1,6 +1,7 @@
 import pickle
 import sys
 import os
+import random
 from deap import gp, creator, base
 from primitive_set import *
 
@@ -1,6 +1,6 @@
 from collections import Counter
 from typing import List, Dict, Any
-from deap import gp
+from tree_compiler import compile_tree
 
 class DifficultyTracker:
     def __init__(self):
@@ -15,7 +15,7 @@ class DifficultyTracker:
         """
         # Find best individual
         best_ind = max(population, key=lambda ind: ind.fitness.values[0])
-        func = gp.compile(best_ind, pset)
+        func = compile_tree(best_ind, pset)
         
         for entry in data:
             raw = entry['raw']
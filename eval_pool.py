@@ -0,0 +1,207 @@
+import os
+import time
+import heapq
+import signal
+import multiprocessing
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from deap import gp
+
+from primitive_set import create_pset
+from evaluator import EvalContext, evaluate_metrics, score_metrics, race_individual
+import semantic_cache
+from tree_compiler import COMPILE_CACHE
+from compact_tree import CompactTree
+
+# Per-process evaluation state, filled by load_worker_state
+_WORKER: Dict[str, Any] = {}
+RELOAD_TIMEOUT = 60.0
+
+def load_worker_state(ctx: EvalContext, semantic_cache_bytes: int = 0):
+    """
+    Keeps the compiled dataset and a primitive set resident in this process.
+    Called again with a new dataset, the primitive set (and with it the compile cache) is kept.
+    """
+    _WORKER["ctx"] = ctx
+    _WORKER["semantic_cache_bytes"] = semantic_cache_bytes
+    if "pset" not in _WORKER:
+        _WORKER["pset"] = create_pset()
+    semantic_cache.configure(semantic_cache_bytes)
+
+def init_worker(ctx: EvalContext, semantic_cache_bytes: int = 0, barrier=None):
+    """Initializer for pool workers: ignore SIGINT and load the evaluation state."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WORKER["barrier"] = barrier
+    load_worker_state(ctx, semantic_cache_bytes)
+
+def reload_worker(ctx: EvalContext) -> int:
+    """
+    Pool task that swaps this worker's dataset. Waiting on the pool-wide barrier keeps
+    a worker from taking a second reload task, so one map() reaches every worker once.
+    """
+    load_worker_state(ctx, _WORKER["semantic_cache_bytes"])
+    _WORKER["barrier"].wait(timeout=RELOAD_TIMEOUT)
+    return os.getpid()
+
+def encode_tree(individual):
+    """
+    Task payload for a tree: (codes, consts) of a CompactTree (see compact_tree.py),
+    the canonical expression string of any other PrimitiveTree.
+    """
+    if isinstance(individual, CompactTree):
+        return individual.key
+    return str(individual)
+
+def decode_tree(code, pset):
+    if isinstance(code, str):
+        return gp.PrimitiveTree.from_string(code, pset)
+    return CompactTree(*code)
+
+def evaluate_batch(items: List[Tuple], params: List[Tuple], semantic: bool = False, columnar: bool = False) -> Tuple:
+    """
+    Evaluates encoded trees against the worker-resident dataset.
+    items: (group, position, encode_tree payload) triples; params[group] = (weights, gates, with_metrics, threshold).
+    Returns (results, counters) with one (group, position, fitness, metrics or None, aborted_at)
+    per item. metrics are only set with with_metrics; aborted_at only when racing (threshold set).
+    counters: subtree cache and compile cache activity of this batch, plus its run time.
+    """
+    start = time.perf_counter()
+    ctx, pset = _WORKER["ctx"], _WORKER["pset"]
+    cache = semantic_cache.SUBTREE_CACHE
+    before = (cache.hits, cache.misses, cache.evictions)
+    compiled_before = (COMPILE_CACHE.misses, COMPILE_CACHE.hits, COMPILE_CACHE.seconds)
+
+    results = []
+    for group, position, code in items:
+        weights, gates, with_metrics, threshold = params[group]
+        tree = decode_tree(code, pset)
+        aborted_at = None
+        if threshold is not None:
+            values, metrics, aborted_at = race_individual(tree, pset, ctx, weights, gates, threshold, with_metrics, semantic, columnar=columnar)
+        else:
+            metrics = evaluate_metrics(tree, pset, ctx, semantic=semantic, columnar=columnar)
+            values = (score_metrics(metrics, weights, gates),)
+        results.append((group, position, float(values[0]), metrics if with_metrics else None, aborted_at))
+
+    stats = {
+        "pid": os.getpid(),
+        "items": len(items),
+        "hits": cache.hits - before[0],
+        "misses": cache.misses - before[1],
+        "evictions": cache.evictions - before[2],
+        "bytes": cache.bytes,
+        "compiled": COMPILE_CACHE.misses - compiled_before[0],
+        "compile_reused": COMPILE_CACHE.hits - compiled_before[1],
+        "compile_seconds": COMPILE_CACHE.seconds - compiled_before[2],
+        "seconds": time.perf_counter() - start
+    }
+    return results, stats
+
+def balance_chunks(sizes: List[int], n_chunks: int) -> List[List[int]]:
+    """
+    Splits item indices into at most n_chunks bins of similar total size
+    (longest-processing-time first: biggest item into the lightest bin).
+    Bins are returned heaviest first, so the slowest work starts earliest.
+    """
+    n_chunks = max(1, min(n_chunks, len(sizes)))
+    heap = [(0, b) for b in range(n_chunks)]
+    bins = [[] for _ in range(n_chunks)]
+    loads = [0] * n_chunks
+    for k in sorted(range(len(sizes)), key=lambda k: -sizes[k]):
+        load, b = heapq.heappop(heap)
+        bins[b].append(k)
+        loads[b] = load + sizes[k]
+        heapq.heappush(heap, (loads[b], b))
+    order = sorted(range(n_chunks), key=lambda b: -loads[b])
+    return [sorted(bins[b]) for b in order if bins[b]]
+
+class EvalPool:
+    """
+    Evaluation front end for the Trainer. With jobs > 1 the dataset is handed to
+    every worker once (pool initializer); each task afterwards only carries encoded
+    trees plus the weight/gate sets, so IPC volume does not grow with the dataset.
+    With jobs == 1 batches run in-process through the same code path.
+    """
+    def __init__(self, ctx: EvalContext, jobs: int = 1, semantic_cache_bytes: int = 0):
+        self.ctx = ctx
+        self.jobs = max(1, jobs)
+        self.semantic_cache_bytes = semantic_cache_bytes
+        self.pool = None
+        if self.jobs > 1:
+            barrier = multiprocessing.Barrier(self.jobs)
+            self.pool = multiprocessing.Pool(processes=self.jobs, initializer=init_worker, initargs=(ctx, semantic_cache_bytes, barrier))
+        else:
+            load_worker_state(ctx, semantic_cache_bytes)
+
+    def load_dataset(self, ctx: EvalContext):
+        """Replaces the dataset held by every worker without restarting the pool."""
+        self.ctx = ctx
+        if self.pool:
+            self.pool.map(reload_worker, [ctx] * self.jobs, chunksize=1)
+        else:
+            load_worker_state(ctx, self.semantic_cache_bytes)
+
+    def evaluate(self, individuals, weights: Dict[str, float] = None, gates: Dict[str, float] = None,
+                 with_metrics: bool = False, threshold: Optional[float] = None, semantic: bool = False, columnar: bool = False) -> Tuple:
+        """
+        Evaluates individuals (without touching them) and returns
+        (fitness array, metrics list or None, aborted_at list or None, per-batch cache counters).
+        """
+        results, stats = self.evaluate_groups([(individuals, weights, gates, with_metrics, threshold)], semantic=semantic, columnar=columnar)
+        return (*results[0], stats)
+
+    def evaluate_groups(self, groups: List[Tuple], semantic: bool = False, columnar: bool = False) -> Tuple:
+        """
+        Evaluates several groups of individuals in one submission, each with its own
+        parameters: groups = [(individuals, weights, gates, with_metrics, threshold), ...].
+        Trees are binned by node count so every worker gets a similar amount of work,
+        independent of which group they came from.
+        Returns ([(fitness array, metrics list or None, aborted_at list or None) per group],
+        per-batch counters).
+        Semantic mode uses one bin per worker so each subtree cache sees a larger share.
+        Columnar mode runs every tree as batch kernels over the dataset (columnar.py).
+        """
+        params = [(weights, gates, with_metrics, threshold) for _, weights, gates, with_metrics, threshold in groups]
+        items, sizes = [], []
+        for g, group in enumerate(groups):
+            for k, ind in enumerate(group[0]):
+                items.append((g, k, encode_tree(ind)))
+                sizes.append(len(ind))
+
+        n_chunks = self.jobs if semantic else self.jobs * 4
+        args = [([items[k] for k in chunk], params, semantic, columnar) for chunk in balance_chunks(sizes, n_chunks)]
+        outputs = self.map_batches(args)
+
+        results = []
+        for individuals, _, _, with_metrics, threshold in groups:
+            n = len(individuals)
+            results.append((np.zeros(n, dtype=np.float64), [None] * n if with_metrics else None,
+                            [None] * n if threshold is not None else None))
+        for batch, _ in outputs:
+            for g, k, fit, metrics, aborted_at in batch:
+                fitness, metrics_out, aborted_out = results[g]
+                fitness[k] = fit
+                if metrics_out is not None:
+                    metrics_out[k] = metrics
+                if aborted_out is not None:
+                    aborted_out[k] = aborted_at
+        return results, [o[1] for o in outputs]
+
+    def map_batches(self, args: List[Tuple]) -> List[Tuple]:
+        """Runs evaluate_batch over argument tuples, outputs in order."""
+        if self.pool:
+            return self.pool.starmap(evaluate_batch, args, chunksize=1)
+        return [evaluate_batch(*a) for a in args]
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def terminate(self):
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
@@ -1,439 +1,447 @@
 import json
-from typing import List, Dict, Tuple
-from deap import gp
+import hashlib
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional
+import numpy as np
 from primitive_set import NameObj
 from post_processor import repair_name_object
+from semantic_cache import SUBTREE_CACHE
+from columnar import COLUMNAR
+from tree_compiler import compile_tree
 
-def calculate_f1(pred: List[str] | str, truth: List[str] | str) -> float:
-    """
-    Calculates F1 score for strings or lists of strings.
-    Case-insensitive comparison.
-    """
-    # Normalize inputs to sets of lowercase strings
-    if isinstance(pred, str):
-        pred_set = {pred.lower().strip()} if pred.strip() else set()
-    else:
-        pred_set = {p.lower().strip() for p in pred if p.strip()}
-        
-    if isinstance(truth, str):
-        truth_set = {truth.lower().strip()} if truth.strip() else set()
-    else:
-        truth_set = {t.lower().strip() for t in truth if t.strip()}
+# --- Field Layout ---
+# Bit i of every emptiness mask refers to FIELDS[i].
+FIELDS = ["given", "family", "salutation", "title", "middle", "suffix", "particles"]
+FIELD_BITS = {field: 1 << i for i, field in enumerate(FIELDS)}
+
+OPT_FIELDS = ["middle", "suffix", "particles"]              # Coverage bonus
+UNC_FIELDS = ["salutation", "title", "middle", "suffix", "particles"] # Uncertainty bonus
+OPT_MASK = sum(FIELD_BITS[f] for f in OPT_FIELDS)
+UNC_MASK = sum(FIELD_BITS[f] for f in UNC_FIELDS)
 
+def normalize_set(val: List[str] | str) -> set:
+    """Lowercased, stripped, non-empty values of a string or list of strings."""
+    if isinstance(val, str):
+        return {val.lower().strip()} if val.strip() else set()
+    return {v.lower().strip() for v in val if v.strip()}
+
+def f1_from_sets(pred_set: set, truth_set: set) -> float:
     if not pred_set and not truth_set:
         return 1.0 # Both empty = Match
-    
-    tp = len(pred_set.intersection(truth_set))
-    fp = len(pred_set - truth_set)
-    fn = len(truth_set - pred_set)
-    
+
+    tp = len(pred_set & truth_set)
     if tp == 0:
         return 0.0
-        
-    precision = tp / (tp + fp)
-    recall = tp / (tp + fn)
-    
+
+    precision = tp / len(pred_set)
+    recall = tp / len(truth_set)
+
     return 2 * (precision * recall) / (precision + recall)
 
-def evaluate_individual(individual, pset, data: List[Dict], weights: Dict[str, float] = None, gates: Dict[str, float] = None) -> Tuple[float]:
-    func = gp.compile(individual, pset)
-    
-    # Default Weights (Balanced)
-    if weights is None:
-        weights = {
-            "core_family": 0.4, "core_given": 0.4, "core_title": 0.1, "core_gender": 0.1,
-            "bonus_exact": 0.1, "bonus_coverage": 0.1, "bonus_uncertainty": 0.1,
-            "penalty_hallucination": 0.2, "penalty_vital": 0.1, "penalty_lazy": 0.5
-        }
-    
-    # Core F1 Sums
-    sum_f1_given = 0.0
-    sum_f1_family = 0.0
-    sum_f1_title = 0.0
-    sum_f1_suffix = 0.0
-    sum_f1_gender = 0.0
-    
-    # Bonus Counters
-    count_exact_match = 0
-    sum_coverage_score = 0.0
-    sum_unknown_handling = 0.0
-    
-    # Penalty Counters
-    sum_hallucination_rate = 0.0
-    sum_vital_penalty = 0.0
-    
-    n = len(data)
-    if n == 0: return 0.0,
+def calculate_f1(pred: List[str] | str, truth: List[str] | str) -> float:
+    """
+    Calculates F1 score for strings or lists of strings.
+    Case-insensitive comparison.
+    """
+    return f1_from_sets(normalize_set(pred), normalize_set(truth))
 
-    valid_gender_count = 0
-    
+def emptiness_masks(obj) -> Tuple[int, int]:
+    """
+    Returns (blank_mask, falsy_mask) over FIELDS for a NameObj or solution dict.
+    blank: falsy or whitespace-only string (uncertainty rule).
+    falsy: falsy only (hallucination rule).
+    """
+    get = obj.get if isinstance(obj, dict) else lambda f: getattr(obj, f)
+    blank = 0
+    falsy = 0
+    for field, bit in FIELD_BITS.items():
+        val = get(field)
+        if not val:
+            blank |= bit
+            falsy |= bit
+        elif isinstance(val, str) and not val.strip():
+            blank |= bit
+    return blank, falsy
+
+# --- Evaluation Context ---
+
+@dataclass
+class CompiledEntry:
+    raw: str
+    raw_stripped: str
+    truth: Dict[str, set]       # Normalized truth set per field
+    gender: str                 # Raw truth gender (may be "null")
+    gender_valid: bool
+    present_mask: int           # Optional fields with content (coverage)
+    blank_mask: int             # See emptiness_masks()
+    falsy_mask: int
+    has_family: bool
+    has_given: bool
+
+@dataclass
+class EvalContext:
+    """
+    One-time compiled dataset: all truth-side normalization happens here,
+    so evaluation only has to normalize the prediction.
+    """
+    entries: List[CompiledEntry]
+    valid_gender_count: int
+    fingerprint: str
+
+    def __len__(self):
+        return len(self.entries)
+
+def compile_dataset(data: List[Dict]) -> EvalContext:
+    entries = []
     for entry in data:
         raw = entry["raw"]
         solution = entry["solution"]
-        
+
+        present = 0
+        for f in OPT_FIELDS:
+            truth_val = solution.get(f)
+            if (isinstance(truth_val, list) and truth_val) or (isinstance(truth_val, str) and truth_val.strip()):
+                present |= FIELD_BITS[f]
+
+        blank, falsy = emptiness_masks(solution)
+        gender = solution.get("gender", "null")
+
+        entries.append(CompiledEntry(
+            raw=raw,
+            raw_stripped=raw.strip(),
+            truth={f: normalize_set(solution.get(f) or "") for f in FIELDS},
+            gender=gender,
+            gender_valid=bool(gender and gender != "null"),
+            present_mask=present,
+            blank_mask=blank,
+            falsy_mask=falsy,
+            has_family=bool(solution.get("family")),
+            has_given=bool(solution.get("given"))
+        ))
+
+    fingerprint = hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return EvalContext(
+        entries=entries,
+        valid_gender_count=sum(1 for e in entries if e.gender_valid),
+        fingerprint=fingerprint
+    )
+
+def ensure_context(data: "EvalContext | List[Dict]") -> EvalContext:
+    return data if isinstance(data, EvalContext) else compile_dataset(data)
+
+def score_entry(entry: CompiledEntry, pred_obj: NameObj) -> Tuple:
+    """
+    Per-entry metrics:
+    (f1_given, f1_family, f1_title, f1_suffix, gender_hit, exact, coverage,
+     uncertainty, hallucination, vital_count, lazy_count)
+    gender_hit is None when the entry has no valid truth gender.
+    """
+    truth = entry.truth
+    pred = {f: normalize_set(getattr(pred_obj, f)) for f in FIELDS}
+
+    # --- 1. CORE ---
+    f1_given = f1_from_sets(pred["given"], truth["given"])
+    f1_family = f1_from_sets(pred["family"], truth["family"])
+    f1_title = f1_from_sets(pred["title"], truth["title"])
+    f1_suffix = f1_from_sets(pred["suffix"], truth["suffix"])
+
+    p_gen = pred_obj.gender.value if pred_obj.gender else "null"
+    gender_hit = None
+    if entry.gender_valid:
+        gender_hit = 1.0 if p_gen == entry.gender else 0.0
+
+    # --- 2. BONUS ---
+    # F1 == 1.0 exactly when the normalized sets are equal
+    exact = 1.0 if (p_gen == entry.gender and all(pred[f] == truth[f] for f in FIELDS)) else 0.0
+
+    opt_total = entry.present_mask.bit_count()
+    if opt_total > 0:
+        opt_correct = sum(1 for f in OPT_FIELDS if entry.present_mask & FIELD_BITS[f] and pred[f] == truth[f])
+        coverage = opt_correct / opt_total
+    else:
+        coverage = 1.0
+
+    pred_blank, pred_falsy = emptiness_masks(pred_obj)
+    unc_empty = entry.blank_mask & UNC_MASK
+    unc_total = unc_empty.bit_count()
+    uncertainty = (unc_empty & pred_blank).bit_count() / unc_total if unc_total > 0 else 1.0
+
+    # --- 3. PENALTY ---
+    halluc_total = entry.falsy_mask.bit_count()
+    hallucination = (entry.falsy_mask & ~pred_falsy).bit_count() / halluc_total if halluc_total > 0 else 0.0
+
+    # Vital (Family & Given missing)
+    vital = 0
+    if entry.has_family and pred_blank & FIELD_BITS["family"]:
+        vital += 1
+    if entry.has_given and pred_blank & FIELD_BITS["given"]:
+        vital += 1
+
+    # Lazy (whole raw input copied into a field)
+    lazy = 0
+    if pred_obj.given and pred_obj.given.strip() == entry.raw_stripped:
+        lazy += 1
+    if pred_obj.family and pred_obj.family.strip() == entry.raw_stripped:
+        lazy += 1
+
+    return (f1_given, f1_family, f1_title, f1_suffix, gender_hit, exact,
+            coverage, uncertainty, hallucination, vital, lazy)
+
+# --- Metric Matrix ---
+# One row per dataset entry, one column per metric. Fitness is a weighted
+# reduction over the column means, so new weights/gates never require
+# running the program again.
+METRIC_COLUMNS = [
+    "given", "family", "title", "suffix", "gender",     # Core F1s (gender: NaN = no truth)
+    "exact", "coverage", "uncertainty",                  # Bonuses
+    "hallucination", "vital", "lazy"                     # Penalties (vital/lazy are counts)
+]
+COL = {name: i for i, name in enumerate(METRIC_COLUMNS)}
+# float32 halves the matrices kept per individual. Each stored value is rounded
+# (relative error <= 2**-24, about 6e-8), and the means are taken in float64, so
+# a score can move by up to sum(|weight| * column max) * 2**-24 (about 2e-7 with
+# DEFAULT_WEIGHTS) versus float64 storage. On full datasets rounding mostly
+# cancels out in the means (~1e-9 on data/train.json).
+METRICS_DTYPE = np.float32
+
+DEFAULT_WEIGHTS = {
+    "core_family": 0.4, "core_given": 0.4, "core_title": 0.1, "core_gender": 0.1,
+    "bonus_exact": 0.1, "bonus_coverage": 0.1, "bonus_uncertainty": 0.1,
+    "penalty_hallucination": 0.2, "penalty_vital": 0.1, "penalty_lazy": 0.5
+}
+
+def metrics_row(entry: CompiledEntry, pred_obj: NameObj) -> Tuple:
+    row = score_entry(entry, pred_obj)
+    return row[:4] + (np.nan if row[4] is None else row[4],) + row[5:]
+
+def evaluate_metrics(individual, pset, data: "EvalContext | List[Dict]", strict: bool = True, semantic: bool = False, race: "Race" = None,
+                     columnar: bool = False) -> Optional[np.ndarray]:
+    """
+    Runs the program over the dataset and returns its metric matrix
+    (len(data) x len(METRIC_COLUMNS)).
+    strict: any runtime error or non-NameObj result kills the individual (returns None).
+    Otherwise failed entries become zero rows with no gender truth (explain_fitness semantics).
+    semantic: run node by node through the process-wide subtree cache (semantic_cache.py).
+    columnar: run node by node as batch kernels over the whole dataset (columnar.py);
+    takes precedence over semantic. Programs returning a shared NameObj terminal run compiled.
+    race: checked after every mini-batch; returns None once race.aborted_at is set.
+    """
+    ctx = ensure_context(data)
+    columnar = columnar and COLUMNAR.supports(individual, pset)
+    batched = columnar or semantic
+    if batched:
+        preds = (COLUMNAR if columnar else SUBTREE_CACHE).predict(individual, pset, ctx, strict=strict)
+        if preds is None:
+            return None
+    else:
+        func = compile_tree(individual, pset)
+
+    metrics = np.zeros((len(ctx), len(METRIC_COLUMNS)), dtype=METRICS_DTYPE)
+    for i, entry in enumerate(ctx.entries):
         try:
-            pred_obj = func(raw)
+            pred_obj = preds[i] if batched else func(entry.raw)
             # Check if it's actually a NameObj (LLM might return StringList etc.)
             if not isinstance(pred_obj, NameObj):
-                return 0.0,
-                
+                raise TypeError(f"Program returned {type(pred_obj).__name__}, expected NameObj")
+
             # --- POST-PROCESSING ---
             pred_obj = repair_name_object(pred_obj)
+            metrics[i] = metrics_row(entry, pred_obj)
         except Exception:
-            return 0.0, # Runtime error is still death
-
-        # --- 1. CORE SCORE CALCULATION ---
-        f1_given = calculate_f1(pred_obj.given, solution["given"])
-        f1_family = calculate_f1(pred_obj.family, solution["family"])
-        f1_title = calculate_f1(pred_obj.title, solution["title"])
-        f1_suffix = calculate_f1(pred_obj.suffix, solution["suffix"])
-        
-        # Gender
-        truth_gender = solution.get("gender")
-        f1_gender = 0.0
-        if truth_gender and truth_gender != "null":
-            valid_gender_count += 1
-            pred_gender_val = pred_obj.gender.value if pred_obj.gender else "null"
-            if pred_gender_val == truth_gender:
-                f1_gender = 1.0
-        else:
-            pass
-
-        sum_f1_given += f1_given
-        sum_f1_family += f1_family
-        sum_f1_title += f1_title
-        sum_f1_suffix += f1_suffix
-        sum_f1_gender += f1_gender
-
-        # --- 2. BONUS SCORE CALCULATION ---
-        
-        # 2.1 Exact Match Bonus
-        is_exact = True
-        if f1_given < 1.0 or f1_family < 1.0 or f1_title < 1.0: is_exact = False
-        if calculate_f1(pred_obj.middle, solution["middle"]) < 1.0: is_exact = False
-        if calculate_f1(pred_obj.suffix, solution["suffix"]) < 1.0: is_exact = False
-        if calculate_f1(pred_obj.particles, solution["particles"]) < 1.0: is_exact = False
-        if calculate_f1(pred_obj.salutation, solution["salutation"]) < 1.0: is_exact = False
-        
-        p_gen = pred_obj.gender.value if pred_obj.gender else "null"
-        t_gen = solution.get("gender", "null")
-        if p_gen != t_gen: is_exact = False
-        
-        if is_exact:
-            count_exact_match += 1
-            
-        # 2.2 Coverage Bonus (Optional Fields)
-        opt_fields = ["middle", "suffix", "particles"]
-        opt_correct = 0
-        opt_total_present = 0
-        
-        for field in opt_fields:
-            truth_val = solution.get(field)
-            has_content = False
-            if isinstance(truth_val, list) and truth_val: has_content = True
-            elif isinstance(truth_val, str) and truth_val.strip(): has_content = True
-            
-            if has_content:
-                opt_total_present += 1
-                if calculate_f1(getattr(pred_obj, field), truth_val) == 1.0:
-                    opt_correct += 1
-        
-        if opt_total_present > 0:
-            sum_coverage_score += (opt_correct / opt_total_present)
-        else:
-            sum_coverage_score += 1.0
-
-        # 2.3 Uncertainty Bonus
-        unc_fields = ["salutation", "title", "middle", "suffix", "particles"]
-        unc_correct = 0
-        unc_total_empty = 0
-        
-        for field in unc_fields:
-            truth_val = solution.get(field)
-            is_empty = False
-            if not truth_val: is_empty = True
-            elif isinstance(truth_val, list) and not truth_val: is_empty = True
-            elif isinstance(truth_val, str) and not truth_val.strip(): is_empty = True
-            
-            if is_empty:
-                unc_total_empty += 1
-                pred_val = getattr(pred_obj, field)
-                pred_empty = False
-                if not pred_val: pred_empty = True
-                elif isinstance(pred_val, list) and not pred_val: pred_empty = True
-                elif isinstance(pred_val, str) and not pred_val.strip(): pred_empty = True
-                
-                if pred_empty:
-                    unc_correct += 1
-        
-        if unc_total_empty > 0:
-            sum_unknown_handling += (unc_correct / unc_total_empty)
-        else:
-            sum_unknown_handling += 1.0
-
-        # --- 3. PENALTY CALCULATION ---
-        
-        # 3.1 Hallucination Penalty
-        hallucinations = 0
-        total_fields = 0
-        all_fields = ["given", "family", "salutation", "title", "middle", "suffix", "particles"]
-        
-        for field in all_fields:
-            truth_val = solution.get(field)
-            is_truth_empty = not truth_val or (isinstance(truth_val, list) and not truth_val)
-            
-            if is_truth_empty:
-                total_fields += 1
-                pred_val = getattr(pred_obj, field)
-                is_pred_empty = not pred_val or (isinstance(pred_val, list) and not pred_val)
-                
-                if not is_pred_empty:
-                    hallucinations += 1
-        
-        if total_fields > 0:
-            sum_hallucination_rate += (hallucinations / total_fields)
-
-        # 3.2 Vital Penalty (Family & Given)
-        if solution.get("family"):
-            p_fam = pred_obj.family
-            if not p_fam or (isinstance(p_fam, str) and not p_fam.strip()):
-                 sum_vital_penalty += weights.get("penalty_vital", 0.1)
-        
-        if solution.get("given"):
-            p_giv = pred_obj.given
-            if not p_giv or (isinstance(p_giv, str) and not p_giv.strip()):
-                sum_vital_penalty += weights.get("penalty_vital", 0.1)
-
-        # 3.3 Lazy Penalty
-        if pred_obj.given and pred_obj.given.strip() == raw.strip():
-             sum_vital_penalty += weights.get("penalty_lazy", 0.5)
-             
-        if pred_obj.family and pred_obj.family.strip() == raw.strip():
-             sum_vital_penalty += weights.get("penalty_lazy", 0.5)
-
-    # --- AGGREGATION ---
-    
-    # Averages
-    avg_given = sum_f1_given / n
-    avg_family = sum_f1_family / n
-    avg_title = sum_f1_title / n
-    avg_gender = sum_f1_gender / valid_gender_count if valid_gender_count > 0 else 1.0
-    
-    exact_rate = count_exact_match / n
-    avg_coverage = sum_coverage_score / n
-    avg_uncertainty = sum_unknown_handling / n
-    avg_hallucination = sum_hallucination_rate / n
-    avg_vital_penalty = sum_vital_penalty / n
-    
-    # Weighted Score Calculation
-    core_score = (weights["core_family"] * avg_family) + \
-                 (weights["core_given"] * avg_given) + \
-                 (weights["core_title"] * avg_title) + \
-                 (weights["core_gender"] * avg_gender)
-    
-    bonus_score = (weights["bonus_exact"] * exact_rate) + \
-                  (weights["bonus_coverage"] * avg_coverage) + \
-                  (weights["bonus_uncertainty"] * avg_uncertainty)
-    
-    penalty_score = (weights["penalty_hallucination"] * avg_hallucination) + avg_vital_penalty
-    
-    final_score = core_score + bonus_score - penalty_score
-    
-    # --- GATE LOGIC (Soft Gates) ---
-    if gates:
-        min_fam = gates.get("min_family", 0.0)
-        min_giv = gates.get("min_given", 0.0)
-        max_pen = gates.get("max_penalty", 0.0)
-        
-        gap_fam = max(0.0, min_fam - avg_family)
-        gap_giv = max(0.0, min_giv - avg_given)
-        
-        gap = max(gap_fam, gap_giv)
-        if gap > 0:
-            # Soft Gate: factor = 1.0 - (gap * max_pen)
-            # Ensure we don't go below 0.1 (never kill completely)
-            factor = max(0.1, 1.0 - (gap * max_pen))
-            final_score *= factor
-    
+            if strict:
+                return None # Runtime error is still death
+            metrics[i, COL["gender"]] = np.nan
+
+        seen = i + 1
+        if race is not None and seen % race.batch_size == 0 and seen < len(ctx) and race.check(metrics, seen, ctx):
+            return None
+
+    return metrics
+
+def summarize_metrics(metrics: np.ndarray) -> np.ndarray:
+    """
+    Column means of one (n x K) matrix or a stack (P x n x K) -> (K,) / (P x K).
+    Gender is averaged over entries with a truth gender (1.0 if there are none).
+    """
+    metrics = np.asarray(metrics)
+    means = metrics.mean(axis=-2, dtype=np.float64)
+
+    gender = metrics[..., COL["gender"]]
+    valid = ~np.isnan(gender)
+    valid_count = valid.sum(axis=-1)
+    gender_sum = np.where(valid, gender, 0.0).sum(axis=-1, dtype=np.float64)
+    means[..., COL["gender"]] = np.where(valid_count > 0, gender_sum / np.maximum(valid_count, 1), 1.0)
+    return means
+
+def weight_vector(weights: Dict[str, float], include_suffix: bool = False) -> np.ndarray:
+    """Signed per-column weights: score = means @ weight_vector (before gates)."""
+    w = np.zeros(len(METRIC_COLUMNS), dtype=np.float64)
+    w[COL["family"]] = weights["core_family"]
+    w[COL["given"]] = weights["core_given"]
+    w[COL["title"]] = weights["core_title"]
+    w[COL["gender"]] = weights["core_gender"]
+    # evaluate_individual has never weighted core_suffix; explain_fitness reports it
+    if include_suffix:
+        w[COL["suffix"]] = weights.get("core_suffix", 0.0)
+    w[COL["exact"]] = weights["bonus_exact"]
+    w[COL["coverage"]] = weights["bonus_coverage"]
+    w[COL["uncertainty"]] = weights["bonus_uncertainty"]
+    w[COL["hallucination"]] = -weights["penalty_hallucination"]
+    w[COL["vital"]] = -weights.get("penalty_vital", 0.1)
+    w[COL["lazy"]] = -weights.get("penalty_lazy", 0.5)
+    return w
+
+def gate_factor(means: np.ndarray, gates: Dict[str, float] = None) -> np.ndarray:
+    """Soft gate multiplier for (K,) or (P x K) means."""
+    if not gates:
+        return np.ones(means.shape[:-1])
+    min_fam = gates.get("min_family", 0.0)
+    min_giv = gates.get("min_given", 0.0)
+    max_pen = gates.get("max_penalty", 0.0)
+
+    gap_fam = np.maximum(0.0, min_fam - means[..., COL["family"]])
+    gap_giv = np.maximum(0.0, min_giv - means[..., COL["given"]])
+    gap = np.maximum(gap_fam, gap_giv)
+    # Soft Gate: factor = 1.0 - (gap * max_pen)
+    # Ensure we don't go below 0.1 (never kill completely)
+    return np.where(gap > 0, np.maximum(0.1, 1.0 - (gap * max_pen)), 1.0)
+
+def score_means(means: np.ndarray, weights: Dict[str, float] = None, gates: Dict[str, float] = None, include_suffix: bool = False) -> np.ndarray:
+    """Vectorized fitness for (K,) or (P x K) column means."""
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
     # Allow negative fitness (important for curriculum learning)
-    return final_score,
+    return (means @ weight_vector(weights, include_suffix)) * gate_factor(means, gates)
+
+def score_metrics(metrics: Optional[np.ndarray], weights: Dict[str, float] = None, gates: Dict[str, float] = None) -> float:
+    """Fitness of a single metric matrix (None / empty = dead individual)."""
+    if metrics is None or len(metrics) == 0:
+        return 0.0
+    return float(score_means(summarize_metrics(metrics), weights, gates))
+
+def rescore_population(population, weights: Dict[str, float], gates: Dict[str, float] = None) -> int:
+    """
+    Re-weights every individual carrying a `metrics` matrix in one vectorized pass.
+    Individuals with metrics=None (dead) score 0.0. Returns how many were rescored.
+    """
+    carriers = [ind for ind in population if ind.fitness.valid and hasattr(ind, "metrics")]
+    alive = [ind for ind in carriers if ind.metrics is not None]
+    if alive:
+        shapes = {ind.metrics.shape for ind in alive}
+        if len(shapes) == 1:
+            scores = score_means(summarize_metrics(np.stack([ind.metrics for ind in alive])), weights, gates)
+        else:
+            scores = [score_metrics(ind.metrics, weights, gates) for ind in alive]
+        for ind, score in zip(alive, scores):
+            ind.fitness.values = (float(score),)
+    for ind in carriers:
+        if ind.metrics is None:
+            ind.fitness.values = (0.0,)
+    return len(carriers)
+
+# --- Racing ---
+# Highest value one entry can contribute to each metric column (all lows are 0).
+COL_MAX = np.array([1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2], dtype=np.float64)
+RACE_BATCH = 100
 
-def explain_fitness(individual, pset, data: List[Dict], weights: Dict[str, float] = None, gates: Dict[str, float] = None, export_path: str = None):
+def fitness_upper_bound(metrics: np.ndarray, seen: int, ctx: EvalContext, weights: Dict[str, float] = None, gates: Dict[str, float] = None) -> float:
+    """
+    Best fitness still reachable after scoring the first `seen` rows of `metrics`:
+    every remaining entry is assumed perfect on positively weighted columns and
+    clean on penalties. The gate factor is bounded from the best (or, for a negative
+    sum, the worst) family/given means still possible.
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+    w = weight_vector(weights)
+    n = len(ctx)
+    rest = n - seen
+    rows = metrics[:seen]
+    sums = rows.sum(axis=0, dtype=np.float64)
+
+    best = (sums + rest * np.where(w > 0, COL_MAX, 0.0)) / n
+    gate_means = (sums + rest * COL_MAX) / n
+
+    gender = rows[:, COL["gender"]]
+    gender_seen = int((~np.isnan(gender)).sum())
+    if ctx.valid_gender_count:
+        gender_best = 1.0 if w[COL["gender"]] > 0 else 0.0
+        best[COL["gender"]] = (np.nansum(gender, dtype=np.float64) + (ctx.valid_gender_count - gender_seen) * gender_best) / ctx.valid_gender_count
+    else:
+        best[COL["gender"]] = 1.0
+
+    raw = float(best @ w)
+    if raw >= 0:
+        return raw * float(gate_factor(gate_means, gates))
+    # A negative sum is best off under the strongest gate (no family/given hits left)
+    return raw * float(gate_factor(sums / n, gates))
+
+@dataclass
+class Race:
+    """Early-abort state for one evaluation (see race_individual)."""
+    threshold: float
+    weights: Dict[str, float] = None
+    gates: Dict[str, float] = None
+    batch_size: int = RACE_BATCH
+    aborted_at: Optional[int] = None
+    bound: Optional[float] = None
+
+    def check(self, metrics: np.ndarray, seen: int, ctx: EvalContext) -> bool:
+        bound = fitness_upper_bound(metrics, seen, ctx, self.weights, self.gates)
+        if bound < self.threshold:
+            self.aborted_at = seen
+            self.bound = bound
+            return True
+        return False
+
+def race_individual(individual, pset, data: "EvalContext | List[Dict]", weights: Dict[str, float] = None, gates: Dict[str, float] = None,
+                    threshold: float = 0.0, with_metrics: bool = False, semantic: bool = False, batch_size: int = RACE_BATCH,
+                    columnar: bool = False) -> Tuple[Tuple[float], Optional[np.ndarray], Optional[int]]:
+    """
+    Racing evaluation: scores the dataset in mini-batches and gives up as soon as the
+    best reachable fitness is below `threshold`.
+    Returns (fitness values, metrics, aborted_at). aborted_at is the number of entries
+    scored before giving up (None for a full run); an aborted individual gets the
+    upper bound as its fitness and no metric matrix.
+    """
+    race = Race(threshold, weights, gates, batch_size)
+    metrics = evaluate_metrics(individual, pset, data, semantic=semantic, race=race, columnar=columnar)
+    if race.aborted_at is not None:
+        return (race.bound,), None, race.aborted_at
+    return (score_metrics(metrics, weights, gates),), metrics if with_metrics else None, None
+
+def evaluate_individual(individual, pset, data: "EvalContext | List[Dict]", weights: Dict[str, float] = None, gates: Dict[str, float] = None, semantic: bool = False) -> Tuple[float]:
+    return score_metrics(evaluate_metrics(individual, pset, data, semantic=semantic), weights, gates),
+
+def evaluate_individual_metrics(individual, pset, data: "EvalContext | List[Dict]", weights: Dict[str, float] = None, gates: Dict[str, float] = None, semantic: bool = False) -> Tuple[Tuple[float], Optional[np.ndarray]]:
+    """Like evaluate_individual, but also returns the metric matrix for later re-weighting."""
+    metrics = evaluate_metrics(individual, pset, data, semantic=semantic)
+    return (score_metrics(metrics, weights, gates),), metrics
+
+def explain_fitness(individual, pset, data: "EvalContext | List[Dict]", weights: Dict[str, float] = None, gates: Dict[str, float] = None, export_path: str = None):
     """
     Runs evaluation but prints detailed breakdown instead of returning score.
     Optionally exports stats to a JSON file.
     """
-    func = gp.compile(individual, pset)
-    
-    # Default Weights (Balanced)
     if weights is None:
-        weights = {
-            "core_family": 0.4, "core_given": 0.4, "core_title": 0.1, "core_gender": 0.1,
-            "bonus_exact": 0.1, "bonus_coverage": 0.1, "bonus_uncertainty": 0.1,
-            "penalty_hallucination": 0.2, "penalty_vital": 0.1, "penalty_lazy": 0.5
-        }
-    
-    # Core F1 Sums
-    sum_f1_given = 0.0
-    sum_f1_family = 0.0
-    sum_f1_title = 0.0
-    sum_f1_suffix = 0.0
-    sum_f1_gender = 0.0
-    
-    # Bonus Counters
-    count_exact_match = 0
-    sum_coverage_score = 0.0
-    sum_unknown_handling = 0.0
-    
-    # Penalty Counters
-    sum_hallucination_rate = 0.0
-    sum_vital_penalty = 0.0
-    
-    n = len(data)
-    valid_gender_count = 0
-    
-    for entry in data:
-        raw = entry["raw"]
-        solution = entry["solution"]
-        try:
-            pred_obj: NameObj = func(raw)
-            # --- POST-PROCESSING ---
-            pred_obj = repair_name_object(pred_obj)
-        except Exception:
-            continue
-
-        # --- 1. CORE SCORE CALCULATION ---
-        f1_given = calculate_f1(pred_obj.given, solution["given"])
-        f1_family = calculate_f1(pred_obj.family, solution["family"])
-        f1_title = calculate_f1(pred_obj.title, solution["title"])
-        f1_suffix = calculate_f1(pred_obj.suffix, solution["suffix"])
-        
-        # Gender
-        truth_gender = solution.get("gender")
-        f1_gender = 0.0
-        if truth_gender and truth_gender != "null":
-            valid_gender_count += 1
-            pred_gender_val = pred_obj.gender.value if pred_obj.gender else "null"
-            if pred_gender_val == truth_gender:
-                f1_gender = 1.0
-
-        sum_f1_given += f1_given
-        sum_f1_family += f1_family
-        sum_f1_title += f1_title
-        sum_f1_suffix += f1_suffix
-        sum_f1_gender += f1_gender
-
-        # --- 2. BONUS SCORE CALCULATION ---
-        is_exact = True
-        if f1_given < 1.0 or f1_family < 1.0 or f1_title < 1.0: is_exact = False
-        if calculate_f1(pred_obj.middle, solution["middle"]) < 1.0: is_exact = False
-        if calculate_f1(pred_obj.suffix, solution["suffix"]) < 1.0: is_exact = False
-        if calculate_f1(pred_obj.particles, solution["particles"]) < 1.0: is_exact = False
-        if calculate_f1(pred_obj.salutation, solution["salutation"]) < 1.0: is_exact = False
-        p_gen = pred_obj.gender.value if pred_obj.gender else "null"
-        t_gen = solution.get("gender", "null")
-        if p_gen != t_gen: is_exact = False
-        
-        if is_exact: count_exact_match += 1
-            
-        # Coverage
-        opt_fields = ["middle", "suffix", "particles"]
-        opt_correct = 0
-        opt_total_present = 0
-        for field in opt_fields:
-            truth_val = solution.get(field)
-            has_content = False
-            if isinstance(truth_val, list) and truth_val: has_content = True
-            elif isinstance(truth_val, str) and truth_val.strip(): has_content = True
-            if has_content:
-                opt_total_present += 1
-                if calculate_f1(getattr(pred_obj, field), truth_val) == 1.0:
-                    opt_correct += 1
-        if opt_total_present > 0: sum_coverage_score += (opt_correct / opt_total_present)
-        else: sum_coverage_score += 1.0
-
-        # Uncertainty
-        unc_fields = ["salutation", "title", "middle", "suffix", "particles"]
-        unc_correct = 0
-        unc_total_empty = 0
-        for field in unc_fields:
-            truth_val = solution.get(field)
-            is_empty = False
-            if not truth_val: is_empty = True
-            elif isinstance(truth_val, list) and not truth_val: is_empty = True
-            elif isinstance(truth_val, str) and not truth_val.strip(): is_empty = True
-            if is_empty:
-                unc_total_empty += 1
-                pred_val = getattr(pred_obj, field)
-                pred_empty = False
-                if not pred_val: pred_empty = True
-                elif isinstance(pred_val, list) and not pred_val: pred_empty = True
-                elif isinstance(pred_val, str) and not pred_val.strip(): pred_empty = True
-                
-                if pred_empty:
-                    unc_correct += 1
-        
-        if unc_total_empty > 0:
-            sum_unknown_handling += (unc_correct / unc_total_empty)
-        else:
-            sum_unknown_handling += 1.0
-
-        # --- 3. PENALTY CALCULATION ---
-        
-        # 3.1 Hallucination Penalty
-        hallucinations = 0
-        total_fields = 0
-        all_fields = ["given", "family", "salutation", "title", "middle", "suffix", "particles"]
-        
-        for field in all_fields:
-            truth_val = solution.get(field)
-            is_truth_empty = not truth_val or (isinstance(truth_val, list) and not truth_val)
-            
-            if is_truth_empty:
-                total_fields += 1
-                pred_val = getattr(pred_obj, field)
-                is_pred_empty = not pred_val or (isinstance(pred_val, list) and not pred_val)
-                
-                if not is_pred_empty:
-                    hallucinations += 1
-        
-        if total_fields > 0:
-            sum_hallucination_rate += (hallucinations / total_fields)
-
-        # 3.2 Vital Penalty (Family & Given)
-        if solution.get("family"):
-            p_fam = pred_obj.family
-            if not p_fam or (isinstance(p_fam, str) and not p_fam.strip()):
-                 sum_vital_penalty += weights.get("penalty_vital", 0.1)
-        
-        if solution.get("given"):
-            p_giv = pred_obj.given
-            if not p_giv or (isinstance(p_giv, str) and not p_giv.strip()):
-                sum_vital_penalty += weights.get("penalty_vital", 0.1)
-
-        # 3.3 Lazy Penalty
-        if pred_obj.given and pred_obj.given.strip() == raw.strip():
-             sum_vital_penalty += weights.get("penalty_lazy", 0.5)
-             
-        if pred_obj.family and pred_obj.family.strip() == raw.strip():
-             sum_vital_penalty += weights.get("penalty_lazy", 0.5)
-
-    # --- AGGREGATION ---
-    
-    # Averages
-    avg_given = sum_f1_given / n
-    avg_family = sum_f1_family / n
-    avg_title = sum_f1_title / n
-    avg_suffix = sum_f1_suffix / n
-    avg_gender = sum_f1_gender / valid_gender_count if valid_gender_count > 0 else 1.0
+        weights = DEFAULT_WEIGHTS
+
+    metrics = evaluate_metrics(individual, pset, data, strict=False)
+    means = summarize_metrics(metrics)
+    avg = {name: float(means[i]) for i, name in enumerate(METRIC_COLUMNS)}
+
+    avg_given = avg["given"]
+    avg_family = avg["family"]
+    avg_title = avg["title"]
+    avg_suffix = avg["suffix"]
+    avg_gender = avg["gender"]
     
-    exact_rate = count_exact_match / n
-    avg_coverage = sum_coverage_score / n
-    avg_uncertainty = sum_unknown_handling / n
-    avg_hallucination = sum_hallucination_rate / n
-    avg_vital_penalty = sum_vital_penalty / n
+    exact_rate = avg["exact"]
+    avg_coverage = avg["coverage"]
+    avg_uncertainty = avg["uncertainty"]
+    avg_hallucination = avg["hallucination"]
+    avg_vital_penalty = weights.get("penalty_vital", 0.1) * avg["vital"] + weights.get("penalty_lazy", 0.5) * avg["lazy"]
     
-    # Weighted Score Calculation
     # Weighted Score Calculation
     core_score = (weights["core_family"] * avg_family) + \
                  (weights["core_given"] * avg_given) + \
@@ -3,17 +3,13 @@ import random
 import pickle
 import os
 import datetime
-import operator
-import multiprocessing
 import signal
 import sys
-import urllib.request
 import time
 from typing import List, Dict, Any, Tuple
 
 from rich.console import Console
 from rich.table import Table
-from oracle import OracleParser
 
 
 from deap import base, creator, tools, gp
@@ -22,7 +18,11 @@ from deap import base, creator, tools, gp
 from primitive_set import create_pset
 from difficulty_tracker import DifficultyTracker
 from usage_stats import PrimitiveUsageTracker
-from evaluator import evaluate_individual, explain_fitness
+from evaluator import (
+    evaluate_individual, evaluate_metrics, summarize_metrics, METRIC_COLUMNS,
+    explain_fitness, compile_dataset, rescore_population
+)
+import numpy as np
 from config import (
     get_main_weights, get_main_gates,
     weights_main_strict, weights_detail, weights_structure,
@@ -30,28 +30,28 @@ from config import (
     DEFAULT_CXPB, DEFAULT_MUTPB, BLOAT_LIMIT,
     WARMUP_GENS, RAMP_SPAN
 )
+from fitness_cache import FitnessCache
+from eval_pool import EvalPool
+from tree_compiler import compile_tree
+from compact_tree import CompactIndividual, opcode_table, cx_one_point, mut_uniform
+from simplify import simplify_tree
+from variation import vary_copy_on_write
+from checkpoint import CheckpointWriter, load_stream
+from champion_artifact import build_artifact, save_artifact
 from ui import draw_bar, print_header
-
-def init_worker():
-    """Initializer for pool workers to ignore SIGINT."""
-    signal.signal(signal.SIGINT, signal.SIG_IGN)
-
-def query_ollama(prompt, model="qwen2.5-coder:1.5b"):
-    url = "http://localhost:11434/api/generate"
-    data = {
-        "model": model,
-        "prompt": prompt,
-        "stream": False
-    }
-    
-    try:
-        req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'), headers={'Content-Type': 'application/json'})
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result.get("response", "")
-    except Exception as e:
-        print(f"❌ Error connecting to Ollama: {e}")
-        return None
+from async_islands import run_async_islands
+from cluster import Coordinator, RemotePool, parse_address
+
+# Migration routes: (Source Index, Destination Index)
+# 0=Main, 1=Detail, 2=Structure
+# Hub-and-Spoke: Satellites <-> Hub
+MIGRATION_ROUTES = [
+    (1, 0), # Detail -> Main
+    (2, 0), # Structure -> Main
+    (0, 1), # Main -> Detail
+    (0, 2)  # Main -> Structure
+]
+MIGRANTS = 5
 
 class Trainer:
     def __init__(self, args, train_data, val_data):
@@ -59,9 +59,13 @@ class Trainer:
         self.train_data = train_data
         self.val_data = val_data
         
+        # Pre-normalized datasets (truth sets, emptiness masks) shared by all evaluations
+        self.train_ctx = compile_dataset(train_data)
+        self.val_ctx = compile_dataset(val_data) if val_data else None
+        
         self.console = Console()
-        # self.oracle = OracleParser() # PAUSED
         self.pset = create_pset()
+        self.opcodes = opcode_table(self.pset) # Islands hold CompactIndividuals (opcode arrays)
         self.toolbox = self.setup_toolbox()
         
         self.tracker = DifficultyTracker()
@@ -75,6 +79,24 @@ class Trainer:
         self.stats.register("avg", lambda x: sum(x)/len(x) if x else 0)
         self.stats.register("max", max)
         
+        self.island_names = ["Main", "Detail", "Structure"]
+        # Weight/gate set per island (Main is updated by the curriculum)
+        self.island_params = [(None, None), (weights_detail, GATES_DETAIL), (weights_structure, GATES_STRUCTURE)]
+        self.main_weights_state = None
+        self.islands = []
+        self.generation = 0
+        self.fitness_cache = FitnessCache(maxsize=args.fitness_cache)
+        # Semantic mode: subtree outputs are shared across individuals (per process, MB budget)
+        self.semantic = args.semantic_cache > 0
+        self.semantic_bytes = args.semantic_cache * 1024 * 1024
+        self.semantic_stats = {}
+        # Columnar mode: every program runs as batch kernels over the whole dataset (columnar.py)
+        self.columnar = args.columnar
+        # Racing: offspring whose best reachable fitness is below this quantile of their island are cut short
+        self.race_quantile = args.race
+        self.race_stats = {}
+        self.gen_timing = {}
+        self.main_tracks_metrics = False
         self.best_fitness_so_far = 0.0
         self.stagnation_counter = 0
         self.mutpb = DEFAULT_MUTPB
@@ -90,16 +112,65 @@ class Trainer:
         os.makedirs(self.art_dir, exist_ok=True)
         os.makedirs(self.model_dir, exist_ok=True)
         
-        # Multiprocessing Pool
-        self.pool = None
-        if self.args.jobs > 1:
-            self.console.print(f"[bold yellow]Initializing Multiprocessing Pool with {self.args.jobs} processes...[/bold yellow]")
-            self.pool = multiprocessing.Pool(processes=self.args.jobs, initializer=init_worker)
+        # Checkpoint stream (checkpoint.py), written in the background every args.checkpoint_every generations
+        self.checkpoint_path = args.checkpoint or os.path.join(self.model_dir, "checkpoint.stream")
+        self.checkpoints = None
+        self.checkpoint_reported = None
+        self.checkpoint_rows = 0 # Logbook rows already sent to the writer
+        
+        # Cluster coordinator: remote workers connect over TCP (cluster.py)
+        self.coordinator = None
+        if args.listen:
+            self.coordinator = Coordinator(self.train_ctx, parse_address(args.listen), args.authkey, self.semantic_bytes)
+            host, port = self.coordinator.address
+            authkey = "KEY" if args.authkey else self.coordinator.authkey # Only a generated key is printed
+            self.console.print(f"[bold yellow]📡 Coordinator listening on {host}:{port} (workers: python cluster.py --connect HOST:{port} --authkey {authkey})[/bold yellow]")
+
+        # Evaluation Pool (workers keep the compiled dataset and pset resident)
+        # With --async-islands every island process brings its own share of the workers
+        jobs = 1 if args.async_islands else self.args.jobs
+        if self.coordinator and not args.async_islands:
+            self.eval_pool = RemotePool(self.coordinator)
+        else:
+            if jobs > 1:
+                self.console.print(f"[bold yellow]Initializing Multiprocessing Pool with {jobs} processes...[/bold yellow]")
+            self.eval_pool = EvalPool(self.train_ctx, jobs=jobs, semantic_cache_bytes=self.semantic_bytes)
 
     def __del__(self):
-        if self.pool:
-            self.pool.close()
-            self.pool.join()
+        if getattr(self, "eval_pool", None):
+            self.eval_pool.close()
+
+    def close(self):
+        """Shuts the evaluation pool (and cluster coordinator) down."""
+        self.eval_pool.terminate()
+        if self.checkpoints:
+            self.checkpoints.close()
+        if self.coordinator:
+            self.coordinator.close()
+
+    def set_data(self, train_data, val_data):
+        """
+        Swaps the datasets between train() calls. Workers reload the dataset in place
+        (compiled trees stay cached); island fitness and the Hall of Fame refer to the
+        old data, so they are invalidated and re-evaluated by the next train().
+        """
+        self.train_data = train_data
+        self.val_data = val_data
+        self.train_ctx = compile_dataset(train_data)
+        self.val_ctx = compile_dataset(val_data) if val_data else None
+        self.eval_pool.load_dataset(self.train_ctx)
+        for island in self.islands:
+            for ind in island:
+                del ind.fitness.values
+                if hasattr(ind, "metrics"):
+                    del ind.metrics
+        self.hof.clear()
+        self.best_fitness_so_far = 0.0
+
+    def reseed_satellites(self):
+        """Fresh blood: replaces the Detail and Structure islands with random populations (Main is kept)."""
+        for i in range(1, len(self.islands)):
+            self.islands[i] = self.toolbox.population(n=self.args.pop_size)
 
     def setup_toolbox(self):
         if not hasattr(creator, "FitnessMax"):
@@ -109,151 +180,284 @@ class Trainer:
 
         toolbox = base.Toolbox()
         toolbox.register("expr", gp.genHalfAndHalf, pset=self.pset, min_=1, max_=6)
-        toolbox.register("individual", tools.initIterate, creator.Individual, toolbox.expr)
+        toolbox.register("individual", tools.initIterate, self.opcodes.individual, toolbox.expr)
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-        toolbox.register("compile", gp.compile, pset=self.pset)
+        toolbox.register("compile", compile_tree, pset=self.pset)
 
         toolbox.register("select", tools.selTournament, tournsize=3)
-        toolbox.register("mate", gp.cxOnePoint)
+        # cxOnePoint / mutUniform working on the opcode arrays
+        # (bloat control: BLOAT_LIMIT is applied by vary, see variation.py)
+        toolbox.register("mate", cx_one_point, table=self.opcodes)
         toolbox.register("expr_mut", gp.genFull, min_=0, max_=2)
-        toolbox.register("mutate", gp.mutUniform, expr=toolbox.expr_mut, pset=self.pset)
-
-        # Bloat control
-        toolbox.decorate("mate", gp.staticLimit(key=operator.attrgetter("height"), max_value=BLOAT_LIMIT))
-        toolbox.decorate("mutate", gp.staticLimit(key=operator.attrgetter("height"), max_value=BLOAT_LIMIT))
+        toolbox.register("mutate", mut_uniform, expr=toolbox.expr_mut, pset=self.pset, table=self.opcodes)
 
         return toolbox
 
-    def mutate_llm(self, individual):
+    def register_main_evaluator(self, gen):
         """
-        Uses an LLM to try and repair/improve an individual based on a failure case.
+        Sets the Main island weights/gates for the curriculum of `gen`.
+        While the curriculum can still move (Bootstrap/Ramp), Main individuals keep
+        their metric matrix so later weight changes only need a re-weighting pass.
         """
-        # 1. Get a failure case from Hall of Shame
-        shame_list = self.tracker.get_hall_of_shame(10)
-        if not shame_list:
-            return individual, False, None
-            
-        target_name, _ = random.choice(shame_list)
-        
-        # 2. Convert individual to code
-        code_str = str(individual)
-        
-        # 3. Get Oracle Hint (Ground Truth)
-        oracle_hint = ""
-        try:
-            oracle_obj = self.oracle.parse(target_name)
-            # We want to show the JSON structure or a summary
-            oracle_hint = json.dumps(oracle_obj.to_json()["solution"], indent=2)
-        except Exception as e:
-            oracle_hint = "Unavailable"
-
-        # 4. Construct Prompt
-        prompt = f"""
-You are an expert in Genetic Programming and Python.
-The following expression is supposed to parse the name "{target_name}" into a structured object (NameObj), but it fails or produces a suboptimal result.
-
-Target Output (Oracle Hint):
-{oracle_hint}
-
-Current Expression:
-{code_str}
-
-Available Primitives (Signatures):
-- String Ops:
-  - trim(str) -> str
-  - to_lower(str) -> str
-  - split_on_comma(str) -> StringList
-  - get_first_string(StringList) -> str
-  - get_last_string(StringList) -> str
-- Token Ops:
-  - tokenize(str) -> TokenList
-  - filter_by_type(TokenList, RegexToken) -> TokenList
-  - get_first_token(TokenList) -> Token
-  - get_last_token(TokenList) -> Token
-  - slice_tokens(TokenList, start:int, end:int) -> TokenList
-  - remove_type(TokenList, RegexToken) -> TokenList
-  - get_remainder_tokens(original:TokenList, used:TokenList) -> TokenList
-- Shape & N-Grams:
-  - get_token_shape(Token) -> str
-  - is_shape(Token, shape:str) -> bool
-  - filter_by_shape(TokenList, shape:str) -> TokenList
-  - ends_with_ngram(Token, ngram:str) -> bool
-  - starts_with_ngram(Token, ngram:str) -> bool
-- Feature Detectors:
-  - has_comma(str) -> bool
-  - is_title(Token) -> bool
-  - is_salutation(Token) -> bool
-  - is_suffix(Token) -> bool
-  - is_common_family_name(Token) -> bool
-- Boosters (High Level):
-  - extract_salutation_str(TokenList) -> str
-  - extract_title_list(TokenList) -> StringList
-  - extract_given_str(TokenList) -> str
-  - extract_family_str(TokenList) -> str
-  - extract_middle_str(TokenList) -> StringList
-  - extract_suffix_list(TokenList) -> StringList
-  - extract_particles_list(TokenList) -> StringList
-- Object Builder:
-  - make_name_obj(raw:str, salutation:str, title:StringList, given:str, family:str, middle:StringList, gender:Gender, suffix:StringList, particles:StringList) -> NameObj
-
-Example Transformation:
-Input: make_name_obj(raw, "", [], split(raw), "", [], UNKNOWN, [], [])
-Goal: Extract title "Dr."
-Output: make_name_obj(raw, "", extract_title_list(tokenize(raw)), split(raw), "", [], UNKNOWN, [], [])
-
-Task:
-Modify the expression to better handle the name "{target_name}".
-CRITICAL: The expression MUST start with `make_name_obj(...)`. Do not return a list or string directly.
-Return ONLY the new expression string. Do not use markdown code blocks.
-"""
-
-        # 4. Query LLM
-        print(f"  🤖 Asking LLM to fix '{target_name}'...") 
-        # print(f"    (Oracle Hint: {oracle_hint[:100]}...)") # DEBUG
-        
-        response = query_ollama(prompt)
-        if not response:
-            print("    ❌ No response from LLM.")
-            return individual, False, None
-            
-        # Clean response (remove markdown if present)
-        cleaned_code = response.strip().replace("```python", "").replace("```", "").strip()
-        
-        # DEBUG: Show what we got
-        # print(f"    📝 LLM Response: {cleaned_code[:100]}...")
-        
-        # 5. Try to compile back to DEAP Individual
-        try:
-            # We need to use gp.PrimitiveTree.from_string but it requires a primitive set context
-            # DEAP's from_string is a bit tricky, it expects a list of primitives.
-            # A safer way is to use the compiler to check syntax, but to get a Tree object we need to parse it.
-            
-            new_ind = gp.PrimitiveTree.from_string(cleaned_code, self.pset)
+        weights = get_main_weights(gen)
+        gates = get_main_gates(gen)
+        self.main_tracks_metrics = gen <= WARMUP_GENS + RAMP_SPAN
+
+        if (weights, gates) != self.main_weights_state:
+            rescored = rescore_population(self.islands[0], weights, gates)
+            rescore_population(self.hof, weights, gates)
+            if rescored and self.args.info:
+                print(f"  ⚖️  Re-weighted {rescored} Main individuals without re-evaluation")
+            self.main_weights_state = (dict(weights), dict(gates)) # Copies: config weights may be adapted in place
+        self.island_params[0] = (weights, gates)
+        return weights, gates
+
+    def evaluate_islands(self, batches):
+        """
+        Evaluates individuals of several islands with a single pool submission.
+        batches: [(island index, individuals), ...]; each keeps island i's weight/gate
+        set and race threshold (taken from the current island, i.e. the parents).
+        """
+        groups = []
+        for i, individuals in batches:
+            weights, gates = self.island_params[i]
+            with_metrics = i == 0 and self.main_tracks_metrics
+            groups.append((individuals, weights, gates, with_metrics, self.race_threshold(self.islands[i])))
+        self.evaluate_groups(groups)
+
+    def race_threshold(self, island):
+        """
+        Fitness an offspring must be able to reach to stay in the race: the --race
+        quantile of the current (parent) island, ignoring bounded fitnesses.
+        None if racing is off or there is nothing to compare against.
+        """
+        if not self.race_quantile:
+            return None
+        fits = [ind.fitness.values[0] for ind in island if ind.fitness.valid and not getattr(ind, "race_aborted", False)]
+        if not fits:
+            return None
+        return float(np.quantile(fits, self.race_quantile))
+
+    def evaluate_population(self, individuals, weights, gates, with_metrics=False, threshold=None):
+        """Evaluates individuals in place with one weight/gate set (see evaluate_groups)."""
+        self.evaluate_groups([(individuals, weights, gates, with_metrics, threshold)])
+
+    def evaluate_groups(self, groups):
+        """
+        Evaluates groups of individuals in place (in parallel if a pool is available).
+        groups: [(individuals, weights, gates, with_metrics, threshold), ...]
+        The fitness cache is consulted first, structural duplicates within a group
+        are only submitted once, and all groups go to the pool together.
+        threshold: race offspring against this fitness (see race_individual).
+        Aborted individuals are flagged with race_aborted and never cached.
+        With --simplify, trees are simplified in place first (see simplify.py).
+        """
+        if self.args.simplify:
+            for individuals, *_ in groups:
+                for ind in individuals:
+                    self.gen_timing["nodes"] = self.gen_timing.get("nodes", 0) + len(ind)
+                    self.gen_timing["simplified"] = self.gen_timing.get("simplified", 0) + simplify_tree(ind, self.pset)
+
+        pendings = []
+        for individuals, weights, gates, with_metrics, threshold in groups:
+            pending = {} # cache key -> individuals sharing that tree
+            for ind in individuals:
+                key = FitnessCache.make_key(ind, self.train_ctx.fingerprint, weights, gates)
+                cached = self.fitness_cache.get(key, need_metrics=with_metrics)
+                if cached is not None:
+                    ind.fitness.values = cached[0]
+                    if with_metrics:
+                        ind.metrics = cached[1]
+                    if self.race_quantile:
+                        ind.race_aborted = False
+                else:
+                    pending.setdefault(key, []).append(ind)
+            pendings.append(pending)
+
+        if not any(pendings):
+            return
+        submit = [([inds[0] for inds in pending.values()], *group[1:]) for pending, group in zip(pendings, groups)]
+        start = time.perf_counter()
+        results, batch_stats = self.eval_pool.evaluate_groups(submit, semantic=self.semantic, columnar=self.columnar)
+        self.gen_timing["eval"] = self.gen_timing.get("eval", 0.0) + time.perf_counter() - start
+        for stats in batch_stats:
+            for k in ("compile_seconds", "compiled", "compile_reused"):
+                self.gen_timing[k] = self.gen_timing.get(k, 0) + stats[k]
+            self.gen_timing["batch_seconds"] = max(self.gen_timing.get("batch_seconds", 0.0), stats["seconds"])
+        self.gen_timing["batches"] = self.gen_timing.get("batches", 0) + len(batch_stats)
+        if self.semantic:
+            for stats in batch_stats:
+                for k in ("hits", "misses", "evictions"):
+                    self.semantic_stats[k] = self.semantic_stats.get(k, 0) + stats[k]
+                self.semantic_stats.setdefault("bytes", {})[stats["pid"]] = stats["bytes"]
+
+        for pending, group, (fitness, metrics_list, aborted_list) in zip(pendings, groups, results):
+            with_metrics, threshold = group[3], group[4]
+            self.apply_results(pending, fitness, metrics_list, aborted_list, with_metrics, threshold)
+
+    def apply_results(self, pending, fitness, metrics_list, aborted_list, with_metrics, threshold):
+        """Writes evaluated fitness (and metrics) to every individual of `pending` and caches it."""
+        for j, (key, inds) in enumerate(pending.items()):
+            values = (float(fitness[j]),)
+            metrics = metrics_list[j] if with_metrics else None
+            aborted_at = aborted_list[j] if threshold is not None else None
+            if threshold is not None:
+                self.race_stats["raced"] = self.race_stats.get("raced", 0) + 1
+                if aborted_at is not None:
+                    self.race_stats["aborted"] = self.race_stats.get("aborted", 0) + 1
+                    self.race_stats["skipped"] = self.race_stats.get("skipped", 0) + len(self.train_ctx) - aborted_at
+            if aborted_at is None:
+                self.fitness_cache.put(key, values, metrics, has_metrics=with_metrics)
+            for ind in inds:
+                ind.fitness.values = values
+                if self.race_quantile:
+                    ind.race_aborted = aborted_at is not None
+                if with_metrics:
+                    if aborted_at is None:
+                        ind.metrics = metrics
+                    elif hasattr(ind, "metrics"):
+                        del ind.metrics # Bounded fitness stays as is when Main is re-weighted
+
+    def vary(self, island):
+        """
+        Selection, crossover and mutation: offspring with invalidated fitness where changed.
+        Copy-on-write: unchanged offspring are the selected parents themselves (see variation.py).
+        """
+        offspring = self.toolbox.select(island, len(island))
+        offspring, counters = vary_copy_on_write(offspring, self.toolbox, DEFAULT_CXPB, self.mutpb, self.opcodes.height, BLOAT_LIMIT)
+        for k, v in counters.items():
+            self.gen_timing[k] = self.gen_timing.get(k, 0) + v
+        return offspring
+
+    def receive_migrants(self, dest_idx, migrants):
+        """Replaces random members of the lower half of island dest_idx with migrants (fitness invalidated)."""
+        for migrant in migrants:
+            # Tournament selection for replacement (crowding)
+            indexed_pop = list(enumerate(self.islands[dest_idx]))
+            # Sort by fitness (worst first for replacement candidates?)
+            # Actually we want to replace bad ones.
+            # The original code sorted by fitness.
+            sorted_indexed = sorted(indexed_pop, key=lambda x: x[1].fitness.values[0] if x[1].fitness.valid else -999.0)
             
-            # DEBUG
-            # print(f"DEBUG: LLM Code Root: {new_ind[0].name}")
+            # Select from the lower half (worst individuals)
+            cutoff = max(1, len(sorted_indexed) // 2)
+            candidates = sorted_indexed[:cutoff]
             
-            # CHECK ROOT NODE: Must be make_name_obj (Primitive) and name must match
-            if not isinstance(new_ind[0], gp.Primitive) or new_ind[0].name != "make_name_obj":
-                print(f"⚠️ LLM returned invalid root node: {new_ind[0].name}. REJECTING.")
-                return individual, False, None
+            victim_entry = random.choice(candidates)
+            victim_idx = victim_entry[0]
             
-            new_ind.fitness = self.toolbox.clone(individual.fitness) # Copy fitness type
-            del new_ind.fitness.values # Invalidate fitness
-            return new_ind, True, target_name
+            self.islands[dest_idx][victim_idx] = migrant
+            del self.islands[dest_idx][victim_idx].fitness.values
+
+    def track_stagnation(self, current_best):
+        """Main island: resets mutation on a breakthrough, boosts it after 10 stagnant generations."""
+        if current_best > self.best_fitness_so_far + 0.0001:
+            self.best_fitness_so_far = current_best
+            self.stagnation_counter = 0
+            if self.mutpb > DEFAULT_MUTPB:
+                self.mutpb = DEFAULT_MUTPB
+                self.console.print("[bold green]  🚀 Breakthrough! Mutation reset.[/bold green]")
+        else:
+            self.stagnation_counter += 1
             
-        except Exception as e:
-            # print(f"⚠️ LLM produced invalid code: {e}")
-            return individual, False, None
-
-    def initialize_islands(self):
+        if self.stagnation_counter >= 10 and self.mutpb < 0.8:
+            self.mutpb = min(0.8, self.mutpb + 0.1)
+            self.stagnation_counter = 0
+            self.console.print(f"[bold red]  🌋 Cataclysm! Stagnation detected. Boosting Mutation to {self.mutpb:.1f}[/bold red]")
+
+    def save_champion(self, generation, metrics=None, directories=None):
+        """champion.pkl/.txt and the pickle-free champion.json (champion_artifact.py) in each directory."""
+        champion = self.export_champion()
+        artifact = build_artifact(champion, metrics=metrics, generation=generation)
+        for directory in directories or [self.model_dir]:
+            with open(os.path.join(directory, "champion.pkl"), "wb") as f: pickle.dump(champion, f)
+            with open(os.path.join(directory, "champion.txt"), "w") as f: f.write(str(champion))
+            save_artifact(os.path.join(directory, "champion.json"), artifact)
+        return champion
+
+    def export_champion(self):
+        """Hall of Fame champion as written to disk: a creator.Individual (simplified with --simplify)."""
+        champion = self.opcodes.to_individual(self.hof[0])
+        if self.args.simplify:
+            simplify_tree(champion, self.pset)
+        return champion
+
+    def checkpoint_state(self, gen) -> Dict[str, Any]:
+        """Plain-data snapshot for the checkpoint stream (taken here, written by the background writer)."""
+        def encode(individuals):
+            return [(ind.key, tuple(map(float, ind.fitness.values)) if ind.fitness.valid else None) for ind in individuals]
+        return {
+            "gen": gen,
+            "signature": self.opcodes.signature,
+            "islands": [encode(island) for island in self.islands],
+            "hof": encode(self.hof),
+            "rng": random.getstate(),
+            "trainer": {
+                "mutpb": self.mutpb,
+                "stagnation_counter": self.stagnation_counter,
+                "best_fitness_so_far": float(self.best_fitness_so_far),
+            },
+            # Only rows added since the last snapshot; the writer keeps the rest
+            "logbook": [{k: v if isinstance(v, int) else float(v) for k, v in row.items()} for row in self.logbook[self.checkpoint_rows:]],
+        }
+
+    def checkpoint(self, gen):
+        if self.checkpoints is None:
+            self.checkpoints = CheckpointWriter(self.checkpoint_path)
+            self.checkpoint_rows = 0
+        self.checkpoints.submit(self.checkpoint_state(gen))
+        self.checkpoint_rows = len(self.logbook)
+
+    def restore_checkpoint(self) -> bool:
+        """Islands, Hall of Fame, RNG, stagnation state and logbook from the checkpoint stream."""
+        try:
+            state = load_stream(self.checkpoint_path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read checkpoint stream: {e}")
+            return False
+        if state is None:
+            return False
+        if state["signature"] != self.opcodes.signature:
+            print("Warning: Checkpoint was written for a different primitive set. Starting fresh.")
+            return False
+
+        def decode(entries):
+            individuals = []
+            for codes, consts, values in entries:
+                ind = CompactIndividual(codes, consts, creator.FitnessMax())
+                if values is not None:
+                    ind.fitness.values = values
+                individuals.append(ind)
+            return individuals
+
+        self.islands = [decode(island) for island in state["islands"]]
+        self.hof.clear()
+        for ind in decode(state["hof"]):
+            self.hof.insert(ind)
+        random.setstate(state["rng"])
+        for name, value in state["trainer"].items():
+            setattr(self, name, value)
+        for row in state["logbook"]:
+            self.logbook.record(**row)
+        self.generation = state["gen"]
+        print(f"Successfully restored {sum(map(len, self.islands))} individuals from {self.checkpoint_path}!")
+        return True
+
+    def initialize_islands(self) -> bool:
+        """Fills self.islands; True if they were restored from the checkpoint stream."""
         print("Initializing Islands...")
         
         pop_main = None
         pop_detail = None
         pop_structure = None
         
+        if (self.args.resume or self.args.checkpoint) and os.path.exists(self.checkpoint_path):
+            print(f"Attempting to resume from {self.checkpoint_path}...")
+            if self.restore_checkpoint():
+                return True
+        
         if self.args.resume:
+            # Island pickles written before the checkpoint stream
             print("Attempting to resume from saved islands...")
             try:
                 with open("model/island_main.pkl", "rb") as f: pop_main = pickle.load(f)
@@ -270,14 +474,22 @@ Return ONLY the new expression string. Do not use markdown code blocks.
             pop_structure = self.toolbox.population(n=self.args.pop_size)
         
         self.islands = [pop_main, pop_detail, pop_structure]
-        self.island_names = ["Main", "Detail", "Structure"]
-        
-        # Register fixed evaluators
-        self.toolbox.register("evaluate_detail", evaluate_individual, pset=self.pset, data=self.train_data, weights=weights_detail, gates=GATES_DETAIL)
-        self.toolbox.register("evaluate_structure", evaluate_individual, pset=self.pset, data=self.train_data, weights=weights_structure, gates=GATES_STRUCTURE)
+        # Island files written before the compact representation hold PrimitiveTree individuals
+        for island in self.islands:
+            island[:] = [ind if isinstance(ind, CompactIndividual) else self.opcodes.from_individual(ind) for ind in island]
+        return False
+
 
     def train(self):
-        self.initialize_islands()
+        """
+        Runs args.generations generations. Islands, caches and the evaluation pool stay
+        in memory afterwards, so calling train() again continues where it stopped
+        (see set_data and ActiveLearningLoop in active_trainer.py).
+        """
+        resumed_in_memory = bool(self.islands)
+        restored = False
+        if not resumed_in_memory:
+            restored = self.initialize_islands()
         print_header(self.console)
         
         # Graceful Shutdown Handler
@@ -304,8 +516,10 @@ Return ONLY the new expression string. Do not use markdown code blocks.
         if len(swap_rates) < 3:
             swap_rates.extend([swap_rates[-1]] * (3 - len(swap_rates)))
             
-        start_gen = 0
-        if self.args.resume and os.path.exists("model/state.json"):
+        start_gen = self.generation
+        if restored:
+            self.console.print(f"[bold blue]Resuming from Generation {start_gen}[/bold blue]")
+        elif not resumed_in_memory and self.args.resume and os.path.exists("model/state.json"):
             try:
                 with open("model/state.json", "r") as f:
                     state = json.load(f)
@@ -314,45 +528,43 @@ Return ONLY the new expression string. Do not use markdown code blocks.
             except Exception as e:
                 self.console.print(f"[bold red]Warning: Could not load state.json: {e}[/bold red]")
         
+        champion_means = None # Metric means of the champion, stored in champion.json
         try:
             # Run for specified number of generations *from current point*
             end_gen = start_gen + self.args.generations
-            current_gen = start_gen
+            current_gen = self.generation = start_gen
+            
+            if self.args.async_islands:
+                # Islands evolve in their own processes; the lock-step loop below is skipped
+                current_gen = self.generation = run_async_islands(self, start_gen, end_gen, swap_rates, MIGRATION_ROUTES)
+                cur_weights_main, cur_gates_main = get_main_weights(current_gen - 1), get_main_gates(current_gen - 1)
+                self.usage_tracker.update(self.islands[0])
+                self.tracker = DifficultyTracker()
+                self.tracker.load() # Updated by the Main island process
+                end_gen = start_gen
             
-            # Evaluate Initial Population if needed
-            if start_gen == 0:
-                # Register evaluate_main for Gen 0
-                cur_weights_main = get_main_weights(0)
-                cur_gates_main = get_main_gates(0)
-                self.toolbox.register("evaluate_main", evaluate_individual, pset=self.pset, data=self.train_data, weights=cur_weights_main, gates=cur_gates_main)
+            # Evaluate Initial Population if needed (fresh islands, new data, re-seeded satellites)
+            elif any(not ind.fitness.valid for island in self.islands for ind in island):
+                # Main weights/gates for the first generation
+                cur_weights_main, cur_gates_main = self.register_main_evaluator(start_gen)
 
                 self.console.print("[bold yellow]Evaluating Initial Population (this may take a moment)...[/bold yellow]")
-                for i, island in enumerate(self.islands):
-                    if i == 0: eval_func = self.toolbox.evaluate_main
-                    elif i == 1: eval_func = self.toolbox.evaluate_detail
-                    else: eval_func = self.toolbox.evaluate_structure
-                    
-                    # Evaluate invalid individuals
-                    invalid_ind = [ind for ind in island if not ind.fitness.valid]
-                    if self.pool:
-                        fitnesses = self.pool.map(eval_func, invalid_ind)
-                    else:
-                        fitnesses = map(eval_func, invalid_ind)
-                    
-                    for ind, fit in zip(invalid_ind, fitnesses):
-                        ind.fitness.values = fit
-                        
-                    # Update HoF and Stats for Gen 0
-                    if i == 0: self.hof.update(island)
+                # Evaluate invalid individuals of all islands in one batch
+                self.evaluate_islands([(i, [ind for ind in island if not ind.fitness.valid]) for i, island in enumerate(self.islands)])
+                # Update HoF and Stats for Gen 0
+                self.hof.update(self.islands[0])
             
             for gen in range(start_gen, end_gen):
                 if self.stop_requested:
                     break
+                self.fitness_cache.start_generation()
+                self.semantic_stats = {"bytes": self.semantic_stats.get("bytes", {})}
+                self.race_stats = {}
+                self.gen_timing = {}
+                gen_start = time.perf_counter()
             
                 # --- CURRICULUM UPDATE (Main Island) ---
-                cur_weights_main = get_main_weights(gen)
-                cur_gates_main = get_main_gates(gen)
-                self.toolbox.register("evaluate_main", evaluate_individual, pset=self.pset, data=self.train_data, weights=cur_weights_main, gates=cur_gates_main)
+                cur_weights_main, cur_gates_main = self.register_main_evaluator(gen)
                 
                 phase = "Strict"
                 llm_mutpb = 0.05
@@ -367,41 +579,14 @@ Return ONLY the new expression string. Do not use markdown code blocks.
                 # 1. Migration (Hub-and-Spoke)
                 mig_occurred = []
                 
-                # Define routes: (Source Index, Destination Index)
-                # 0=Main, 1=Detail, 2=Structure
-                # Hub-and-Spoke: Satellites <-> Hub
-                routes = [
-                    (1, 0), # Detail -> Main
-                    (2, 0), # Structure -> Main
-                    (0, 1), # Main -> Detail
-                    (0, 2)  # Main -> Structure
-                ]
-
-                for source_idx, dest_idx in routes:
+                for source_idx, dest_idx in MIGRATION_ROUTES:
                     rate = swap_rates[source_idx]
                     
                     if gen > 0 and gen % rate == 0:
-                        k = 5
+                        k = MIGRANTS
                         migrants = tools.selBest(self.islands[source_idx], k)
                         migrants = [self.toolbox.clone(ind) for ind in migrants]
-                        
-                        for migrant in migrants:
-                            # Tournament selection for replacement (crowding)
-                            indexed_pop = list(enumerate(self.islands[dest_idx]))
-                            # Sort by fitness (worst first for replacement candidates?)
-                            # Actually we want to replace bad ones.
-                            # The original code sorted by fitness.
-                            sorted_indexed = sorted(indexed_pop, key=lambda x: x[1].fitness.values[0] if x[1].fitness.valid else -999.0)
-                            
-                            # Select from the lower half (worst individuals)
-                            cutoff = max(1, len(sorted_indexed) // 2)
-                            candidates = sorted_indexed[:cutoff]
-                            
-                            victim_entry = random.choice(candidates)
-                            victim_idx = victim_entry[0]
-                            
-                            self.islands[dest_idx][victim_idx] = migrant
-                            del self.islands[dest_idx][victim_idx].fitness.values
+                        self.receive_migrants(dest_idx, migrants)
                         
                         mig_occurred.append(f"{self.island_names[source_idx]}->{self.island_names[dest_idx]}")
     
@@ -411,39 +596,19 @@ Return ONLY the new expression string. Do not use markdown code blocks.
                 island_stats = []
                 
                 # 2. Evolve Each Island
+                # Variation for all islands first, then a single evaluation batch
+                offspring_per_island = []
                 for i, island in enumerate(self.islands):
                     print(f"  > Processing Island {self.island_names[i]}...")
-                    offspring = self.toolbox.select(island, len(island))
-                    offspring = list(map(self.toolbox.clone, offspring))
-                    
-                    for child1, child2 in zip(offspring[::2], offspring[1::2]):
-                        if random.random() < DEFAULT_CXPB:
-                            self.toolbox.mate(child1, child2)
-                            del child1.fitness.values
-                            del child2.fitness.values
-                    for mutant in offspring:
-                        if random.random() < self.mutpb:
-                            self.toolbox.mutate(mutant)
-                            del mutant.fitness.values
-                    
-                    invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-                    
-                    if i == 0: eval_func = self.toolbox.evaluate_main
-                    elif i == 1: eval_func = self.toolbox.evaluate_detail
-                    else: eval_func = self.toolbox.evaluate_structure
-                    
-                    if len(invalid_ind) > 0:
-                        iterator = invalid_ind
-                        
-                        # Parallel Evaluation
-                        if self.pool:
-                            fitnesses = self.pool.map(eval_func, invalid_ind)
-                        else:
-                            fitnesses = map(eval_func, iterator)
-                            
-                        for ind, fit in zip(invalid_ind, fitnesses):
-                            ind.fitness.values = fit
-                    
+                    offspring_per_island.append(self.vary(island))
+                
+                # Parallel Evaluation (one pool submission, tagged with each island's weights/gates)
+                self.evaluate_islands([
+                    (i, [ind for ind in offspring if not ind.fitness.valid])
+                    for i, offspring in enumerate(offspring_per_island)
+                ])
+                
+                for i, (island, offspring) in enumerate(zip(self.islands, offspring_per_island)):
                     island[:] = offspring
                     
                     record = self.stats.compile(island)
@@ -470,20 +635,7 @@ Return ONLY the new expression string. Do not use markdown code blocks.
                         if gen % 10 == 0:
                             self.usage_tracker.update(island)
                         
-                        current_best = record['max']
-                        if current_best > self.best_fitness_so_far + 0.0001:
-                            self.best_fitness_so_far = current_best
-                            self.stagnation_counter = 0
-                            if self.mutpb > DEFAULT_MUTPB:
-                                self.mutpb = DEFAULT_MUTPB
-                                self.console.print("[bold green]  🚀 Breakthrough! Mutation reset.[/bold green]")
-                        else:
-                            self.stagnation_counter += 1
-                            
-                        if self.stagnation_counter >= 10 and self.mutpb < 0.8:
-                            self.mutpb = min(0.8, self.mutpb + 0.1)
-                            self.stagnation_counter = 0
-                            self.console.print(f"[bold red]  🌋 Cataclysm! Stagnation detected. Boosting Mutation to {self.mutpb:.1f}[/bold red]")
+                        self.track_stagnation(record['max'])
     
                 # 3. Report
                 row = f"{gen+1:<4} | "
@@ -494,17 +646,48 @@ Return ONLY the new expression string. Do not use markdown code blocks.
                 row += f"[cyan]{phase}[/cyan]"
                 self.console.print(row)
                 
+                cache_stats = self.fitness_cache.stats()
+                if cache_stats["gen_lookups"]:
+                    self.console.print(f"[italic grey]  💾 Fitness cache: {cache_stats['gen_hit_rate']:.0%} hits ({cache_stats['gen_hits']}/{cache_stats['gen_lookups']}), {cache_stats['size']} entries[/italic grey]")
+                lookups = self.semantic_stats.get("hits", 0) + self.semantic_stats.get("misses", 0)
+                if lookups:
+                    mb = sum(self.semantic_stats["bytes"].values()) / (1024 * 1024)
+                    self.console.print(f"[italic grey]  🧩 Subtree cache: {self.semantic_stats['hits'] / lookups:.0%} hits ({self.semantic_stats['hits']}/{lookups}), {self.semantic_stats['evictions']} evictions, {mb:.1f} MB[/italic grey]")
+                if self.race_stats.get("raced"):
+                    skipped = self.race_stats.get("skipped", 0) / (self.race_stats["raced"] * len(self.train_ctx))
+                    self.console.print(f"[italic grey]  🏁 Racing: {self.race_stats.get('aborted', 0)}/{self.race_stats['raced']} aborted, {skipped:.0%} of entries skipped[/italic grey]")
+                if self.args.info:
+                    t = self.gen_timing
+                    self.console.print(f"[italic grey]  ⏱️  Gen time {time.perf_counter() - gen_start:.2f}s | eval {t.get('eval', 0.0):.2f}s in {t.get('batches', 0)} batches (slowest {t.get('batch_seconds', 0.0):.2f}s) | compile {t.get('compile_seconds', 0.0):.3f}s worker CPU ({t.get('compiled', 0)} new, {t.get('compile_reused', 0)} reused)[/italic grey]")
+                    if t.get("offspring"):
+                        self.console.print(f"[italic grey]  🧬 Variation: {t['cloned']} clones for {t['offspring']} offspring, {t['shared']} shared with their parent, {t['reverted']} reverted at the bloat limit[/italic grey]")
+                    if t.get("nodes"):
+                        self.console.print(f"[italic grey]  ✂️  Simplified away {t['simplified']}/{t['nodes']} nodes ({t['simplified'] / t['nodes']:.0%})[/italic grey]")
+                    c = self.checkpoints.stats if self.checkpoints else {}
+                    if c and c is not self.checkpoint_reported:
+                        self.checkpoint_reported = c
+                        self.console.print(f"[italic grey]  📼 Checkpoint gen {c['gen']}: {c['kind']} record {c['bytes'] / 1024:.0f} KB ({c['trees']} new trees), stream {c['file_bytes'] / 1024:.0f} KB, {c['seconds'] * 1000:.0f} ms in the background[/italic grey]")
+                
                 # Save Champion
                 best_ind = self.hof[0]
                 if best_ind.fitness.values[0] >= self.best_fitness_so_far: # Use >= to ensure save
-                     with open("model/champion.pkl", "wb") as f:
-                        pickle.dump(best_ind, f)
+                    self.save_champion(gen + 1, directories=[self.art_dir, self.model_dir])
     
-                current_gen = gen + 1
+                current_gen = self.generation = gen + 1
+                if self.args.checkpoint_every and current_gen % self.args.checkpoint_every == 0:
+                    self.checkpoint(current_gen)
             
             # Always export stats for adaptive weighting (at end of cycle)
             if len(self.hof) > 0:
-                explain_fitness(self.hof[0], self.pset, self.train_data, weights=cur_weights_main, gates=cur_gates_main, export_path="cycle_stats.json")
+                explain_fitness(self.hof[0], self.pset, self.train_ctx, weights=cur_weights_main, gates=cur_gates_main, export_path="cycle_stats.json")
+                
+                # Metric matrix lets active_trainer preview new weights without re-running the champion
+                champion_metrics = evaluate_metrics(self.hof[0], self.pset, self.train_ctx)
+                if champion_metrics is not None:
+                    np.save("cycle_metrics.npy", champion_metrics)
+                    champion_means = dict(zip(METRIC_COLUMNS, map(float, summarize_metrics(champion_metrics))))
+                elif os.path.exists("cycle_metrics.npy"):
+                    os.remove("cycle_metrics.npy")
                 
                 # --- DIVERSITY CHECK ---
                 # Calculate Phenotypic Diversity (Unique outputs on validation set)
@@ -518,7 +701,7 @@ Return ONLY the new expression string. Do not use markdown code blocks.
                 
                 for ind in sample_pop:
                     try:
-                        func = gp.compile(ind, self.pset)
+                        func = compile_tree(ind, self.pset)
                         # Hash the outputs for a few examples
                         outputs = []
                         for entry in check_data[:5]: # Check first 5 examples
@@ -536,8 +719,7 @@ Return ONLY the new expression string. Do not use markdown code blocks.
                     json.dump({"diversity": diversity_score}, f)
 
             # Save Final State
-
-            # Save Final State
+            self.generation = current_gen
             with open("model/state.json", "w") as f:
                 json.dump({"gen": current_gen}, f)
 
@@ -546,37 +728,25 @@ Return ONLY the new expression string. Do not use markdown code blocks.
             self.console.print("[yellow]Saving current progress before exiting...[/yellow]")
         
         finally:
-            # Cleanup Pool
-            if self.pool:
-                self.pool.terminate()
-                self.pool.join()
-            
             # Restore signal handler
             signal.signal(signal.SIGINT, original_sigint_handler)
 
+            # Last completed generation, also after Ctrl-C or an error
+            if self.islands:
+                self.checkpoint(self.generation)
+                self.checkpoints.flush()
+
             self.console.print("\n[bold green]Training Completed/Stopped![/bold green]")
             if len(self.hof) > 0:
-                best_ind = self.hof[0]
+                best_ind = self.save_champion(self.generation, metrics=champion_means, directories=[self.art_dir, self.model_dir])
                 self.console.print(f"Final Best Fitness: {best_ind.fitness.values[0]}")
                 self.console.print(f"\n[bold green]🏆 HALL OF FAME (Champion) 🏆[/bold green]")
                 self.console.print(f"{best_ind}\n")
-                
-                # Save Artifacts
-                with open(os.path.join(self.art_dir, "champion.pkl"), "wb") as f: pickle.dump(best_ind, f)
-                with open(os.path.join(self.art_dir, "champion.txt"), "w") as f: f.write(str(best_ind))
-                
-                with open(os.path.join(self.model_dir, "champion.pkl"), "wb") as f: pickle.dump(best_ind, f)
-                with open(os.path.join(self.model_dir, "champion.txt"), "w") as f: f.write(str(best_ind))
-
-                print("Saving Island Populations...")
-                with open(os.path.join(self.model_dir, "island_main.pkl"), "wb") as f: pickle.dump(self.islands[0], f)
-                with open(os.path.join(self.model_dir, "island_detail.pkl"), "wb") as f: pickle.dump(self.islands[1], f)
-                with open(os.path.join(self.model_dir, "island_structure.pkl"), "wb") as f: pickle.dump(self.islands[2], f)
 
                 # Validation
                 if self.val_data:
                     print("\nRunning Validation...")
-                    val_score, = evaluate_individual(best_ind, self.pset, self.val_data, weights=weights_main_strict)
+                    val_score, = evaluate_individual(best_ind, self.pset, self.val_ctx, weights=weights_main_strict)
                     print(f"Validation Score: {val_score}")
                     
                 # Hall of Shame
@@ -0,0 +1,260 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import argparse
+import contextlib
+from collections import deque
+from itertools import islice
+from typing import List, Dict, Any, Tuple, Iterator, Iterable, Optional
+
+from champion_artifact import load_artifact, load_parser, artifact_parser
+from primitive_set import NameObj
+
+# --- Input ---
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".txt": "txt"}
+
+def detect_format(path: str) -> str:
+    """Input format from the file extension; stdin ('-') is read as text."""
+    if path == "-":
+        return "txt"
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path}, use --format")
+    return fmt
+
+def open_text(path: str, mode: str):
+    """UTF-8 text file, or stdin/stdout for '-' (left open)."""
+    newline = "" if mode == "r" else None # csv does its own newline handling
+    if path == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        return contextlib.nullcontext(io.TextIOWrapper(stream.buffer, encoding="utf-8", newline=newline))
+    return open(path, mode, encoding="utf-8", newline=newline)
+
+def read_records(stream, fmt: str, field: str = "raw", id_field: Optional[str] = None) -> Iterator[Tuple[Any, str]]:
+    """(id, raw) pairs, one per input record (id is None without id_field)."""
+    if fmt == "txt":
+        for line in stream:
+            yield None, line.rstrip("\r\n")
+    elif fmt == "csv":
+        reader = csv.DictReader(stream)
+        missing = [name for name in (field, id_field) if name and name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV has no column {missing[0]!r} (columns: {', '.join(reader.fieldnames or [])})")
+        for row in reader:
+            yield (row[id_field] if id_field else None), row[field] or ""
+    else:
+        for number, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"JSONL line {number} is not valid JSON: {e}") from None
+                if not isinstance(record, dict):
+                    raise ValueError(f"JSONL line {number} is a {type(record).__name__}, expected an object")
+                yield (record.get(id_field) if id_field else None), record.get(field) or ""
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# --- Latency ---
+
+class LatencyHistogram:
+    """Per-record parse latencies in power-of-two microsecond buckets (bounded memory for any input size)."""
+    BUCKETS = 32
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+
+    def add(self, seconds: float):
+        self.counts[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+
+    def merge(self, counts: List[int]):
+        for i, n in enumerate(counts):
+            self.counts[i] += n
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (seconds) of the bucket holding the q-quantile."""
+        total = sum(self.counts)
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return (1 << i) / 1e6
+        return 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, percentiles (seconds) and the non-empty buckets by upper bound in µs."""
+        return {
+            "count": sum(self.counts),
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets_us": {str(1 << i): n for i, n in enumerate(self.counts) if n},
+        }
+
+# --- Workers ---
+
+_PARSER = None
+
+def init_worker(model):
+    """Loads the parser of a champion.json path or an already loaded artifact dict."""
+    global _PARSER
+    _PARSER = load_parser(model) if isinstance(model, str) else artifact_parser(model)
+
+def parse_record(raw: str) -> Dict[str, Any]:
+    """Output record of one name: NameObj.to_json(), or raw plus error if the champion fails."""
+    try:
+        result = _PARSER(raw)
+        if not isinstance(result, NameObj):
+            raise TypeError(f"Champion returned {type(result).__name__}, expected NameObj")
+        return result.to_json()
+    except Exception as e:
+        return {"raw": raw, "error": f"{type(e).__name__}: {e}"}
+
+def parse_records(raws: List[str]) -> List[Dict[str, Any]]:
+    return [parse_record(raw) for raw in raws]
+
+def parse_chunk(chunk: List[Tuple[Any, str]]) -> Tuple[str, List[int], int]:
+    """JSONL text of one chunk, its latency histogram counts and the number of failed records."""
+    histogram = LatencyHistogram()
+    lines = []
+    errors = 0
+    clock = time.perf_counter
+    for record_id, raw in chunk:
+        start = clock()
+        out = parse_record(raw)
+        histogram.add(clock() - start)
+        if "error" in out:
+            errors += 1
+        if record_id is not None:
+            out = {"id": record_id, **out}
+        lines.append(json.dumps(out, ensure_ascii=False))
+    lines.append("")
+    return "\n".join(lines), histogram.counts, errors
+
+def parse_chunks(chunks: Iterable[List], model: "str | Dict[str, Any]", jobs: int, window: int, ordered: bool = True) -> Iterator[Tuple[str, List[int], int]]:
+    """
+    parse_chunk results for a stream of chunks. At most `window` chunks are in
+    flight: reading the input pauses until the oldest (ordered) or any
+    (unordered) chunk is done, so memory stays bounded however long the input is.
+    """
+    if jobs <= 1:
+        init_worker(model)
+        yield from map(parse_chunk, chunks)
+        return
+
+    import multiprocessing # ~20ms to import, in-process runs skip it
+    with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(model,)) as pool:
+        if ordered:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(parse_chunk, (chunk,)))
+                if len(pending) >= window:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        else:
+            done = queue.Queue()
+            pending = 0
+
+            def take():
+                result = done.get()
+                if isinstance(result, BaseException):
+                    raise result
+                return result
+
+            for chunk in chunks:
+                pool.apply_async(parse_chunk, (chunk,), callback=done.put, error_callback=done.put)
+                pending += 1
+                if pending >= window:
+                    pending -= 1
+                    yield take()
+            while pending:
+                pending -= 1
+                yield take()
+
+# --- Commands ---
+
+def run_parse(args) -> Dict[str, Any]:
+    window = args.max_pending or 2 * max(args.jobs, 1)
+    histogram = LatencyHistogram()
+    records = errors = 0
+    # Load and check the champion here: a worker failing in the Pool initializer is restarted forever
+    artifact = load_artifact(args.model)
+    artifact_parser(artifact)
+    start = time.perf_counter()
+    last_report = start
+
+    with open_text(args.input, "r") as source, open_text(args.output, "w") as sink:
+        chunks = chunked(read_records(source, args.format, args.field, args.id_field), args.chunk_size)
+        for text, counts, failed in parse_chunks(chunks, artifact, args.jobs, window, ordered=not args.unordered):
+            sink.write(text)
+            histogram.merge(counts)
+            records += text.count("\n")
+            errors += failed
+            now = time.perf_counter()
+            if args.progress and now - last_report >= args.progress:
+                last_report = now
+                print(f"⏳ {records:,} records, {records / (now - start):,.0f}/s", file=sys.stderr)
+        sink.flush()
+
+    seconds = time.perf_counter() - start
+    return {
+        "records": records,
+        "errors": errors,
+        "seconds": seconds,
+        "throughput": records / seconds if seconds else 0.0,
+        "p50": histogram.percentile(0.50),
+        "p95": histogram.percentile(0.95),
+        "p99": histogram.percentile(0.99),
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="🧬 EvoName - run an exported champion",
+        epilog="Example: python evoname.py parse --input crm.csv --field name --id-field id --output parsed.jsonl --jobs 8",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parse = commands.add_parser("parse", help="Parse names from CSV/JSONL/text into JSONL (streaming).")
+    parse.add_argument("--model", type=str, default="model/champion.json", help="Champion artifact (champion.json).")
+    parse.add_argument("--input", type=str, default="-", help="Input file ('-' = stdin).")
+    parse.add_argument("--output", type=str, default="-", help="Output JSONL file ('-' = stdout).")
+    parse.add_argument("--format", choices=["csv", "jsonl", "txt"], help="Input format (default: from the file extension, txt for stdin).")
+    parse.add_argument("--field", type=str, default="raw", help="CSV column / JSON field holding the name.")
+    parse.add_argument("--id-field", type=str, help="CSV column / JSON field copied to the output as 'id'.")
+    parse.add_argument("--chunk-size", type=int, default=1000, help="Records per worker task.")
+    parse.add_argument("--max-pending", type=int, default=0, help="Chunks in flight before reading pauses (default: 2 x jobs).")
+    parse.add_argument("--unordered", action="store_true", help="Write chunks as they finish instead of in input order.")
+    parse.add_argument("--progress", type=float, default=0.0, help="Report progress to stderr every N seconds (0 = off).")
+    parse.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="Number of parser processes (1 = in-process).")
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    if args.command == "parse":
+        try:
+            args.format = args.format or detect_format(args.input)
+            summary = run_parse(args) # Input errors surface while streaming
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(2)
+        print(f"✅ Parsed {summary['records']:,} records in {summary['seconds']:.1f}s "
+              f"({summary['throughput']:,.0f} records/s, {summary['errors']} errors) | "
+              f"latency p50 ≤{summary['p50'] * 1e6:.0f}µs p95 ≤{summary['p95'] * 1e6:.0f}µs p99 ≤{summary['p99'] * 1e6:.0f}µs",
+              file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
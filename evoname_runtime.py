@@ -0,0 +1,41 @@
+"""
+Lean inference entry point for short-lived processes (batch jobs, serverless workers):
+
+    from evoname_runtime import parse
+    parse("Dr. Hans Müller").to_json()
+
+Importing it loads primitive_set (types, primitives, regex loader), post_processor
+and champion_artifact only: no deap, numpy, yaml, rich, Flask or config.yaml.
+The champion is loaded on the first parse(); EVONAME_MODEL overrides its path.
+tests/test_evoname_runtime.py guards the module list, and IMPORT_BUDGET_MS with
+EVONAME_TIMING_TESTS=1.
+"""
+import os
+from typing import Callable, Dict, Any, Optional
+
+from primitive_set import NameObj
+from champion_artifact import load_parser
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL = os.path.join(ROOT, "model", "champion.json")
+MODEL_ENV = "EVONAME_MODEL"
+
+# `python -X importtime -c "import evoname_runtime"`, cumulative, without bytecode cache
+IMPORT_BUDGET_MS = 120
+
+_PARSER: Optional[Callable[[str], NameObj]] = None
+
+def model_path() -> str:
+    return os.environ.get(MODEL_ENV) or DEFAULT_MODEL
+
+def load(path: Optional[str] = None, **kwargs) -> Callable[[str], NameObj]:
+    """(Re)loads the champion artifact that parse() runs. kwargs: see champion_artifact.artifact_parser."""
+    global _PARSER
+    _PARSER = load_parser(path or model_path(), **kwargs)
+    return _PARSER
+
+def parse(raw: str) -> NameObj:
+    return (_PARSER or load())(raw)
+
+def parse_json(raw: str) -> Dict[str, Any]:
+    return parse(raw).to_json()
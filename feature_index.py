@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple, Callable
+
+import numpy as np
+
+from primitive_set import RegexToken, TokenList, FrozenTokenList, DEFAULT_LOCALE, scan_tokens
+
+FEATURE_INDEX_SIZE = 4 # Datasets kept per process (train, validation, a swapped-in cycle)
+
+TYPES = list(RegexToken)
+TYPE_CODES = {t: i for i, t in enumerate(TYPES)}
+
+class FeatureIndex:
+    """
+    Token features of a dataset, computed once per dataset and locale.
+
+    Flat arrays over all tokens of all entries; the tokens of entry i are
+    offsets[i]:offsets[i + 1]. Per token: types (TYPE_CODES) and shapes (ids into
+    shape_names). Per entry: commas, the in-entry index of the first comma token
+    (-1 if none). Only what the indexed kernels look up is stored; spans and
+    lexicon bits stay on the tokens.
+    tokens[i] is what tokenize(raws[i], locale) returns, with the shape and
+    lexicon slots of every token already filled. Derived token-list columns
+    (filter_by_type(tokenize(raw_input), T), ...) are built on first use and
+    kept as FrozenTokenLists, shared by every program run over this dataset.
+    """
+    def __init__(self, raws: List[str], locale: str = DEFAULT_LOCALE, fingerprint: str = None):
+        self.raws = raws
+        self.locale = locale
+        self.fingerprint = fingerprint
+
+        scanned = {}
+        self.tokens = []
+        for raw in raws:
+            tokens = scanned.get(raw)
+            if tokens is None:
+                tokens = scanned[raw] = FrozenTokenList(scan_tokens(raw, locale))
+            self.tokens.append(tokens)
+        self.flat = [t for tokens in self.tokens for t in tokens]
+
+        n_tokens = len(self.flat)
+        self.offsets = np.zeros(len(raws) + 1, dtype=np.int64)
+        np.cumsum([len(tokens) for tokens in self.tokens], out=self.offsets[1:])
+        self.types = np.fromiter((TYPE_CODES[t.type] for t in self.flat), dtype=np.uint8, count=n_tokens)
+
+        shape_ids = {}
+        self.shapes = np.fromiter((shape_ids.setdefault(t.shape, len(shape_ids)) for t in self.flat), dtype=np.int32, count=n_tokens)
+        self.shape_names = list(shape_ids)
+        self.shape_ids = shape_ids
+
+        # get_tokens_before/after_comma: first PUNCT token containing a comma
+        comma = (self.types == TYPE_CODES[RegexToken.PUNCT]) & np.fromiter(("," in t.value for t in self.flat), dtype=np.bool_, count=n_tokens)
+        self.commas = np.full(len(raws), -1, dtype=np.int32)
+        positions = np.flatnonzero(comma)
+        entries = np.searchsorted(self.offsets, positions, side="right") - 1
+        first = np.unique(entries, return_index=True)[1]
+        self.commas[entries[first]] = positions[first] - self.offsets[entries[first]]
+
+        self.columns = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.raws)
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def column(self, key: Tuple, build: Callable[[], List]) -> List:
+        """Derived column of this dataset, built once."""
+        column = self.columns.get(key)
+        if column is None:
+            self.misses += 1
+            column = self.columns[key] = build()
+        else:
+            self.hits += 1
+        return column
+
+    def select(self, mask: np.ndarray) -> List[TokenList]:
+        """Per entry, the tokens whose flat position is set in mask."""
+        positions = np.flatnonzero(mask)
+        bounds = np.searchsorted(positions, self.offsets).tolist()
+        flat = self.flat
+        positions = positions.tolist()
+        return [FrozenTokenList([flat[j] for j in positions[bounds[i]:bounds[i + 1]]]) for i in range(len(self.raws))]
+
+    def by_type(self, type_: RegexToken, keep: bool = True) -> List[TokenList]:
+        """filter_by_type (keep) / remove_type (not keep) of every entry's tokens."""
+        code = TYPE_CODES.get(type_)
+        if code is None:
+            raise TypeError(f"Not a token type: {type_!r}")
+        return self.column(("type", code, keep), lambda: self.select((self.types == code) == keep))
+
+    def by_shape(self, shape: str) -> List[TokenList]:
+        """filter_by_shape of every entry's tokens."""
+        if not isinstance(shape, str):
+            raise TypeError(f"Not a shape: {shape!r}")
+        shape_id = self.shape_ids.get(shape, -1)
+        return self.column(("shape", shape), lambda: self.select(self.shapes == shape_id))
+
+    def before_comma(self) -> List[TokenList]:
+        return self.column(("before_comma",), lambda: [
+            FrozenTokenList(tokens[:c]) if c >= 0 else tokens for tokens, c in zip(self.tokens, self.commas.tolist())])
+
+    def after_comma(self) -> List[TokenList]:
+        return self.column(("after_comma",), lambda: [
+            FrozenTokenList(tokens[c + 1:]) if c >= 0 else FrozenTokenList([]) for tokens, c in zip(self.tokens, self.commas.tolist())])
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.raws),
+            "tokens": len(self.flat),
+            "shapes": len(self.shape_names),
+            "columns": len(self.columns),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+FEATURE_INDEXES = OrderedDict()
+
+def index_for(ctx, locale: str = DEFAULT_LOCALE) -> FeatureIndex:
+    """Process-wide FeatureIndex of an EvalContext (LRU by fingerprint and locale)."""
+    key = (ctx.fingerprint, locale)
+    index = FEATURE_INDEXES.get(key)
+    if index is None:
+        index = FEATURE_INDEXES[key] = FeatureIndex([entry.raw for entry in ctx.entries], locale, ctx.fingerprint)
+        if len(FEATURE_INDEXES) > FEATURE_INDEX_SIZE:
+            FEATURE_INDEXES.popitem(last=False)
+    else:
+        FEATURE_INDEXES.move_to_end(key)
+    return index
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from compact_tree import tree_key
+
+def params_key(params: Optional[Dict[str, float]]) -> Optional[Tuple]:
+    """Hashable, order-independent form of a weights/gates dict."""
+    if not params:
+        return None
+    return tuple(sorted(params.items()))
+
+class FitnessCache:
+    """
+    Cross-generation cache of evaluation results.
+
+    Key: tree (opcodes or canonical string, see tree_key) + dataset fingerprint + weight/gate set.
+    Value: (fitness values, metric matrix or None, has_metrics).
+    Bounded both by entry count and by the bytes held in metric matrices;
+    least recently used entries are evicted first.
+    """
+    def __init__(self, maxsize: int = 20000, max_bytes: int = 256 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.gen_hits = 0
+        self.gen_misses = 0
+
+    @staticmethod
+    def make_key(individual, fingerprint: str, weights: Dict[str, float] = None, gates: Dict[str, float] = None) -> Tuple:
+        return (tree_key(individual), fingerprint, params_key(weights), params_key(gates))
+
+    def get(self, key: Tuple, need_metrics: bool = False):
+        """Returns (fitness values, metrics) or None. need_metrics skips entries stored without a matrix."""
+        entry = self.entries.get(key)
+        if entry is None or (need_metrics and not entry[2]):
+            self.misses += 1
+            self.gen_misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        self.gen_hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key: Tuple, values: Tuple[float], metrics=None, has_metrics: bool = False):
+        if self.maxsize <= 0:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= self._cost(old)
+
+        entry = (tuple(values), metrics, has_metrics)
+        self.entries[key] = entry
+        self.bytes += self._cost(entry)
+
+        while self.entries and (len(self.entries) > self.maxsize or self.bytes > self.max_bytes):
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= self._cost(evicted)
+            self.evictions += 1
+
+    @staticmethod
+    def _cost(entry) -> int:
+        metrics = entry[1]
+        return metrics.nbytes if metrics is not None else 0
+
+    def start_generation(self):
+        self.gen_hits = 0
+        self.gen_misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        gen_total = self.gen_hits + self.gen_misses
+        return {
+            "size": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "gen_hits": self.gen_hits,
+            "gen_lookups": gen_total,
+            "gen_hit_rate": self.gen_hits / gen_total if gen_total else 0.0
+        }
@@ -10,7 +10,7 @@ def load_data(path: str) -> List[Dict]:
 import json
 import random
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 # --- Configuration ---
 NUM_SAMPLES = 1000
@@ -115,49 +115,60 @@ def generate_random_name(difficulty: str = "normal") -> Dict[str, Any]:
         "solution": solution
     }
 
-def main():
-    random.seed(SEED)
-    
-    print(f"Generating {NUM_SAMPLES} synthetic names...")
-    
-    # 70% Normal, 30% Hard (including Hall of Shame)
-    n_hard = int(NUM_SAMPLES * 0.3)
-    n_normal = NUM_SAMPLES - n_hard
-    
-    data = []
-    
-    # 1. Inject Hall of Shame (if available)
+def load_shame_data(path: str = "difficulty.json") -> Dict[str, Dict]:
+    """Hall of Shame entries (raw -> dataset entry) exported by DifficultyTracker."""
     try:
-        with open("difficulty.json", "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             shame_export = json.load(f)
-            
-            # Handle both legacy (list/dict of counts) and new (dict with 'data') formats
-            shame_data = {}
-            if "data" in shame_export:
-                shame_data = shame_export["data"]
-            
-            if shame_data:
-                # Get the keys (raw strings) sorted by failure count if possible, 
-                # but here we just take all available data entries.
-                # If we have counts, we could prioritize.
-                
-                shame_entries = list(shame_data.values())
-                # Oversample them? Let's add them 3 times each to force learning
-                print(f"Injecting {len(shame_entries)} Hall of Shame examples (3x oversampling)...")
-                for _ in range(3):
-                    data.extend(shame_entries)
-            else:
-                print("Hall of Shame found but no data entries (legacy format). Skipping injection.")
-                
     except FileNotFoundError:
         print("No Hall of Shame found (difficulty.json).")
+        return {}
 
-    # 2. Generate Data
-    data.extend([generate_random_name(difficulty="normal") for _ in range(n_normal)])
-    data.extend([generate_random_name(difficulty="hard") for _ in range(n_hard)])
-    
-    # Shuffle
-    random.shuffle(data)
+    # Handle both legacy (list/dict of counts) and new (dict with 'data') formats
+    shame_data = {}
+    if "data" in shame_export:
+        shame_data = shame_export["data"]
+    if not shame_data:
+        print("Hall of Shame found but no data entries (legacy format). Skipping injection.")
+    return shame_data
+
+def generate_dataset(shame_data: Dict[str, Dict] = None, seed: int = SEED) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Builds (train, val, test) from synthetic names plus the Hall of Shame entries.
+    Uses its own seed and restores the global random state afterwards, so it can
+    run inside a training process without disturbing evolution.
+    """
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        print(f"Generating {NUM_SAMPLES} synthetic names...")
+        
+        # 70% Normal, 30% Hard (including Hall of Shame)
+        n_hard = int(NUM_SAMPLES * 0.3)
+        n_normal = NUM_SAMPLES - n_hard
+        
+        data = []
+        
+        # 1. Inject Hall of Shame (if available)
+        if shame_data:
+            # Get the keys (raw strings) sorted by failure count if possible, 
+            # but here we just take all available data entries.
+            # If we have counts, we could prioritize.
+            
+            shame_entries = list(shame_data.values())
+            # Oversample them? Let's add them 3 times each to force learning
+            print(f"Injecting {len(shame_entries)} Hall of Shame examples (3x oversampling)...")
+            for _ in range(3):
+                data.extend(shame_entries)
+
+        # 2. Generate Data
+        data.extend([generate_random_name(difficulty="normal") for _ in range(n_normal)])
+        data.extend([generate_random_name(difficulty="hard") for _ in range(n_hard)])
+        
+        # Shuffle
+        random.shuffle(data)
+    finally:
+        random.setstate(state)
     
     # Split
     n_train = int(NUM_SAMPLES * TRAIN_SPLIT)
@@ -166,20 +177,24 @@ def main():
     train_data = data[:n_train]
     val_data = data[n_train:n_train+n_val]
     test_data = data[n_train+n_val:]
+    return train_data, val_data, test_data
+
+def save_dataset(train_data: List[Dict], val_data: List[Dict], test_data: List[Dict], data_dir: str = "data"):
+    os.makedirs(data_dir, exist_ok=True)
     
-    # Save
-    os.makedirs("data", exist_ok=True)
-    
-    with open("data/train.json", "w", encoding="utf-8") as f:
+    with open(os.path.join(data_dir, "train.json"), "w", encoding="utf-8") as f:
         json.dump(train_data, f, indent=2, ensure_ascii=False)
         
-    with open("data/val.json", "w", encoding="utf-8") as f:
+    with open(os.path.join(data_dir, "val.json"), "w", encoding="utf-8") as f:
         json.dump(val_data, f, indent=2, ensure_ascii=False)
         
-    with open("data/test.json", "w", encoding="utf-8") as f:
+    with open(os.path.join(data_dir, "test.json"), "w", encoding="utf-8") as f:
         json.dump(test_data, f, indent=2, ensure_ascii=False)
         
     print(f"Saved {len(train_data)} train, {len(val_data)} val, {len(test_data)} test samples.")
 
+def main():
+    save_dataset(*generate_dataset(load_shame_data()))
+
 if __name__ == "__main__":
     main()
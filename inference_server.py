@@ -0,0 +1,352 @@
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional
+
+from evoname import LatencyHistogram, init_worker, parse_records
+from champion_artifact import load_artifact
+
+RESULT_CACHE_SIZE = 100000
+MAX_BODY = 4 * 1024 * 1024 # Bytes per request body
+MAX_BATCH = 10000 # Names per /parse/batch request
+
+class ResultCache:
+    """
+    Bounded LRU cache raw string -> output record, shared by all request threads.
+    The champion is deterministic, so repeated names (very common in CRM data)
+    skip parsing entirely.
+    """
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, raw: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            record = self.entries.get(raw)
+            if record is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(raw)
+            self.hits += 1
+            return record
+
+    def put(self, raw: str, record: Dict[str, Any]):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[raw] = record
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+def simplified_artifact(artifact: Dict[str, Any]) -> Dict[str, Any]:
+    """The artifact with its tree simplified (needs deap; returned unchanged without it)."""
+    try:
+        from primitive_set import create_pset
+        from champion_artifact import load_tree
+        from simplify import simplify_tree
+    except ImportError:
+        return artifact
+    pset = create_pset()
+    tree = load_tree(artifact, pset)
+    if simplify_tree(tree, pset) == 0:
+        return artifact
+    return dict(artifact, expr=str(tree), size=len(tree), height=tree.height)
+
+class InferenceService:
+    """
+    The champion, loaded once, plus result cache, batch fan-out and metrics.
+    Single names are parsed on the request thread. Batch cache misses are
+    split over `workers` processes once there are at least `fanout_min` of them.
+    """
+    def __init__(self, model: str, workers: int = 0, cache_size: int = RESULT_CACHE_SIZE,
+                 fanout_min: int = 256, simplify: bool = True):
+        self.artifact = load_artifact(model)
+        if simplify:
+            self.artifact = simplified_artifact(self.artifact)
+        init_worker(self.artifact)
+        self.cache = ResultCache(cache_size)
+        self.fanout_min = fanout_min
+        self.workers = workers
+        self.pool = self.start_pool() if workers > 1 else None
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.latency = {"parse": LatencyHistogram(), "batch": LatencyHistogram()}
+        self.counters = {"parse": 0, "batch": 0, "records": 0, "parsed": 0, "fanned_out": 0, "errors": 0}
+
+    def start_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.artifact,))
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    def parse(self, raw: str) -> Dict[str, Any]:
+        return self.parse_batch([raw])[0]
+
+    def parse_batch(self, raws: List[str]) -> List[Dict[str, Any]]:
+        results = [self.cache.get(raw) for raw in raws]
+        missing = list(dict.fromkeys(raw for raw, record in zip(raws, results) if record is None))
+        if missing:
+            if self.pool and len(missing) >= self.fanout_min:
+                size = -(-len(missing) // self.workers)
+                try:
+                    parsed = [record for chunk in self.pool.map(parse_records, [missing[i:i + size] for i in range(0, len(missing), size)])
+                              for record in chunk]
+                except BrokenProcessPool:
+                    # A worker died: later batches get a fresh pool, this one fails
+                    self.pool.shutdown(wait=False)
+                    self.pool = self.start_pool()
+                    raise
+                self.count(fanned_out=len(missing))
+            else:
+                parsed = parse_records(missing)
+            self.count(parsed=len(missing), errors=sum("error" in record for record in parsed))
+            for raw, record in zip(missing, parsed):
+                self.cache.put(raw, record)
+            fresh = dict(zip(missing, parsed))
+            results = [record if record is not None else fresh[raw] for raw, record in zip(raws, results)]
+        return results
+
+    def count(self, **amounts):
+        with self.lock:
+            for name, n in amounts.items():
+                self.counters[name] += n
+
+    def observe(self, endpoint: str, seconds: float, records: int):
+        with self.lock:
+            self.latency[endpoint].add(seconds)
+            self.counters[endpoint] += 1
+            self.counters["records"] += records
+
+    def metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "uptime": time.time() - self.started,
+                "model": {key: self.artifact.get(key) for key in ("expr", "size", "generation", "fitness", "pset_signature")},
+                "requests": dict(self.counters),
+                "cache": self.cache.stats(),
+                "latency": {name: histogram.summary() for name, histogram in self.latency.items()},
+            }
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /parse?raw=...          -> record
+    POST /parse {"raw": ...}     -> record
+    POST /parse/batch {"raws": [...]} -> {"results": [...]}
+    GET  /metrics, GET /health
+    Errors are {"error": ...}: 400 bad request or more than max_batch names,
+    413 body over max_body bytes, 500 parsing failed (e.g. a worker died).
+    """
+    protocol_version = "HTTP/1.1" # Keep-alive for load tests and batch clients
+    service: InferenceService = None
+    max_body = MAX_BODY
+    max_batch = MAX_BATCH
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes; without this, Nagle + delayed ACK add ~40 ms per keep-alive response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass # One line per request would dominate the latency
+
+    def send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Any:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError(400, "invalid Content-Length")
+        if length > self.max_body:
+            self.close_connection = True # The body is never read
+            raise RequestError(413, f"request body over {self.max_body} bytes")
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            raise RequestError(400, "request body is not JSON") from None
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/parse":
+            raw = urllib.parse.parse_qs(url.query, keep_blank_values=True).get("raw")
+            if raw is None:
+                return self.send_json(400, {"error": "missing query parameter 'raw'"})
+            return self.handle_parse(raw[0])
+        if url.path == "/metrics":
+            return self.send_json(200, self.service.metrics())
+        if url.path == "/health":
+            return self.send_json(200, {"status": "ok"})
+        self.send_json(404, {"error": f"unknown path {url.path}"})
+
+    def do_POST(self):
+        path = urllib.parse.urlsplit(self.path).path
+        try:
+            payload = self.read_json()
+        except RequestError as e:
+            return self.send_json(e.status, {"error": str(e)})
+        if path == "/parse":
+            if not isinstance(payload, dict) or not isinstance(payload.get("raw"), str):
+                return self.send_json(400, {"error": "expected {\"raw\": \"...\"}"})
+            return self.handle_parse(payload["raw"])
+        if path == "/parse/batch":
+            raws = payload.get("raws") if isinstance(payload, dict) else None
+            if not isinstance(raws, list) or not all(isinstance(raw, str) for raw in raws):
+                return self.send_json(400, {"error": "expected {\"raws\": [\"...\", ...]}"})
+            if len(raws) > self.max_batch:
+                return self.send_json(400, {"error": f"{len(raws)} names, at most {self.max_batch} per batch"})
+            start = time.perf_counter()
+            try:
+                results = self.service.parse_batch(raws)
+            except Exception as e:
+                return self.send_parse_error(e)
+            self.service.observe("batch", time.perf_counter() - start, len(raws))
+            return self.send_json(200, {"results": results})
+        self.send_json(404, {"error": f"unknown path {path}"})
+
+    def handle_parse(self, raw: str):
+        start = time.perf_counter()
+        try:
+            record = self.service.parse(raw)
+        except Exception as e:
+            return self.send_parse_error(e)
+        self.service.observe("parse", time.perf_counter() - start, 1)
+        self.send_json(200, record)
+
+    def send_parse_error(self, e: Exception):
+        self.service.count(errors=1)
+        self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+def make_server(service: InferenceService, host: str = "127.0.0.1", port: int = 8080,
+                max_body: int = MAX_BODY, max_batch: int = MAX_BATCH) -> ThreadingHTTPServer:
+    handler = type("Handler", (RequestHandler,), {"service": service, "max_body": max_body, "max_batch": max_batch})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+# --- Load Test ---
+
+def load_test(url: str, names: List[str], requests: int, concurrency: int, batch: int = 0) -> Dict[str, Any]:
+    """Fires `requests` requests from `concurrency` threads (keep-alive connections) and measures client latency."""
+    import http.client
+    target = urllib.parse.urlsplit(url)
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    failures = [0]
+
+    def client(n: int):
+        rng = random.Random(n)
+        conn = http.client.HTTPConnection(target.hostname, target.port)
+        local = LatencyHistogram()
+        for _ in range(n):
+            if batch:
+                body = json.dumps({"raws": rng.choices(names, k=batch)})
+                path = "/parse/batch"
+            else:
+                body = json.dumps({"raw": rng.choice(names)})
+                path = "/parse"
+            start = time.perf_counter()
+            conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            local.add(time.perf_counter() - start)
+            if response.status != 200:
+                with lock:
+                    failures[0] += 1
+        conn.close()
+        with lock:
+            histogram.merge(local.counts)
+
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(client, per_client))
+    seconds = time.perf_counter() - start
+    return {"requests": requests, "failures": failures[0], "seconds": seconds,
+            "throughput": requests / seconds, "records_per_s": requests * max(batch, 1) / seconds,
+            **{k: v for k, v in histogram.summary().items() if k != "buckets_us"}}
+
+def main():
+    parser = argparse.ArgumentParser(description="🚀 EvoName Inference Service")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve the champion over HTTP.")
+    serve.add_argument("--model", type=str, default="model/champion.json", help="Champion artifact (champion.json).")
+    serve.add_argument("--host", type=str, default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=int, default=0, help="Processes for large batches (0/1 = parse on the request threads).")
+    serve.add_argument("--fanout-min", type=int, default=256, help="Uncached names in a batch before it is split over the workers.")
+    serve.add_argument("--cache-size", type=int, default=RESULT_CACHE_SIZE, help="Result cache entries (0 disables it).")
+    serve.add_argument("--max-body", type=int, default=MAX_BODY, help="Largest request body in bytes (larger: 413).")
+    serve.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Most names per /parse/batch request (more: 400).")
+    serve.add_argument("--no-simplify", action="store_true", help="Run the champion as exported (skip simplification at start-up).")
+
+    bench = commands.add_parser("loadtest", help="Load-test a running service.")
+    bench.add_argument("--url", type=str, default="http://127.0.0.1:8080")
+    bench.add_argument("--data", type=str, default="data/test.json", help="Dataset whose raw names are sent.")
+    bench.add_argument("--requests", type=int, default=5000)
+    bench.add_argument("--concurrency", type=int, default=8)
+    bench.add_argument("--batch", type=int, default=0, help="Names per request via /parse/batch (0 = single /parse).")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        service = InferenceService(args.model, workers=args.workers, cache_size=args.cache_size,
+                                   fanout_min=args.fanout_min, simplify=not args.no_simplify)
+        server = make_server(service, args.host, args.port, max_body=args.max_body, max_batch=args.max_batch)
+        print(f"🚀 Serving {args.model} on http://{args.host}:{server.server_address[1]} (POST /parse, /parse/batch; GET /metrics)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.close()
+    else:
+        with open(args.data, "r", encoding="utf-8") as f:
+            names = [entry["raw"] for entry in json.load(f)]
+        result = load_test(args.url, names, args.requests, args.concurrency, args.batch)
+        print(f"✅ {result['requests']} requests in {result['seconds']:.1f}s: {result['throughput']:,.0f} req/s, "
+              f"{result['records_per_s']:,.0f} names/s, {result['failures']} failures | "
+              f"latency p50 ≤{result['p50'] * 1e3:.2f}ms p95 ≤{result['p95'] * 1e3:.2f}ms p99 ≤{result['p99'] * 1e3:.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,11 @@ import json
 import re
 import enum
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+from collections import OrderedDict
+import os
 import operator
+import threading
 import unicodedata
 
 # --- 1. Types & Enums ---
@@ -25,24 +28,87 @@ class RegexToken(enum.Enum):
     WORD = "TOKEN_WORD"
     PUNCT = "TOKEN_PUNCT"
 
-@dataclass
+# Lexicon flags of a token (Token.lexicon bits)
+LEX_GIVEN_NAME = 1
+LEX_FAMILY_NAME = 2
+LEX_ROMAN_NUMERAL = 4
+
+@dataclass(frozen=True, slots=True)
 class Token:
+    """
+    Frozen and slotted (no per-instance __dict__): tokenize allocates millions of
+    tokens per generation and the tokenize cache shares them between programs.
+    Derived features (lower, shape, lexicon) are computed on first use and kept
+    in the cache slots, which take no part in __init__, equality, hashing or pickles.
+    """
     value: str
     type: RegexToken
     span: Tuple[int, int]
     index: int = -1  # Position in the token list
+    _lower: str = field(init=False, repr=False, compare=False)
+    _shape: str = field(init=False, repr=False, compare=False)
+    _lexicon: int = field(init=False, repr=False, compare=False)
 
     def __repr__(self):
         return f"Token({self.value}, {self.type.name}, {self.span}, {self.index})"
 
+    def __reduce__(self):
+        return (Token, (self.value, self.type, self.span, self.index))
+
+    @property
+    def lower(self) -> str:
+        try:
+            return self._lower
+        except AttributeError:
+            object.__setattr__(self, "_lower", self.value.lower())
+            return self._lower
+
+    @property
+    def shape(self) -> str:
+        try:
+            return self._shape
+        except AttributeError:
+            object.__setattr__(self, "_shape", token_shape(self.value))
+            return self._shape
+
+    @property
+    def lexicon(self) -> int:
+        """LEX_* bits: common given name, common family name, roman numeral."""
+        try:
+            return self._lexicon
+        except AttributeError:
+            lower = self.lower
+            flags = (
+                (LEX_GIVEN_NAME if lower in GENDER_DB else 0)
+                | (LEX_FAMILY_NAME if lower in COMMON_FAMILY_NAMES else 0)
+                | (LEX_ROMAN_NUMERAL if self.value.upper().strip(".,") in ROMAN_NUMERALS else 0)
+            )
+            object.__setattr__(self, "_lexicon", flags)
+            return flags
+
 # Define Strong Types for DEAP
 class TokenList(list):
     pass
 
+class FrozenTokenList(TokenList):
+    """
+    Read-only TokenList handed out by the tokenization cache.
+    Primitives always build new lists, so sharing one instance is safe;
+    any in-place mutation is a bug and raises instead of corrupting the cache.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenTokenList is read-only (shared by the tokenize cache)")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenTokenList, (list(self),))
+
 class StringList(list):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class NameObj:
     raw: str
     given: str = ""
@@ -73,9 +139,12 @@ class NameObj:
 
 # --- 2. Regex Loader ---
 
+# Next to this file, so tokenize works from any working directory
+REGEX_DEFINITIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regex_definitions.json")
+DEFAULT_LOCALE = "de"
 REGEX_CACHE = {}
 
-def load_regex_definitions(path: str = "regex_definitions.json", locale: str = "de") -> Dict[RegexToken, re.Pattern]:
+def load_regex_definitions(path: str = REGEX_DEFINITIONS_PATH, locale: str = DEFAULT_LOCALE) -> Dict[RegexToken, re.Pattern]:
     """
     Loads regex patterns for the specified locale.
     Falls back to 'en' if locale not found, or fails if critical.
@@ -138,6 +207,53 @@ def load_regex_definitions(path: str = "regex_definitions.json", locale: str = "
     REGEX_CACHE[cache_key] = patterns
     return patterns
 
+# Priority Order for Matching (first alternative wins)
+TOKEN_PRIORITY = [
+    RegexToken.SALUTATION,
+    RegexToken.TITLE,
+    RegexToken.DEGREE,
+    RegexToken.SUFFIX,
+    RegexToken.PARTICLE,
+    RegexToken.CONJUNCTION,
+    RegexToken.INITIAL,
+    RegexToken.WORD,
+    RegexToken.PUNCT
+]
+
+TOKENIZER_CACHE = {}
+
+def load_tokenizer(path: str = REGEX_DEFINITIONS_PATH, locale: str = DEFAULT_LOCALE) -> Tuple[re.Pattern, List[Optional[RegexToken]]]:
+    """
+    Compiles the locale's patterns once into a single prioritized alternation.
+    Returns the master pattern and a table mapping group index -> RegexToken
+    (None for the whitespace group), so tokenize() needs one match per token.
+    """
+    cache_key = f"{path}_{locale}"
+    if cache_key in TOKENIZER_CACHE:
+        return TOKENIZER_CACHE[cache_key]
+
+    patterns = load_regex_definitions(path, locale)
+
+    # Whitespace is skipped before any token pattern is tried, so it comes first.
+    # Each pattern keeps its own flags via a scoped inline flag group.
+    alternatives = [r"(?P<_WS>\s+)"]
+    for token_type in TOKEN_PRIORITY:
+        if token_type not in patterns:
+            continue
+        regex = patterns[token_type]
+        scoped = "i" if regex.flags & re.IGNORECASE else "-i"
+        alternatives.append(f"(?P<{token_type.name}>(?{scoped}:{regex.pattern}))")
+
+    master = re.compile("|".join(alternatives))
+
+    group_types = [None] * (master.groups + 1)
+    for name, idx in master.groupindex.items():
+        if name != "_WS":
+            group_types[idx] = RegexToken[name]
+
+    TOKENIZER_CACHE[cache_key] = (master, group_types)
+    return master, group_types
+
 # --- 3. Primitives ---
 
 # 3.1 Control Flow
@@ -330,52 +446,93 @@ def is_last_token_in_list(tokens: TokenList, t: Optional[Token]) -> bool:
     return bool(tokens and t and t.index == len(tokens) - 1)
 
 # 3.3 Token Muscles
-def tokenize(s: str, locale: str = "de") -> TokenList:
+TOKEN_CACHE_SIZE = 4096
+
+class TokenCache:
+    """
+    LRU cache for tokenize(), keyed by (string, locale).
+    Values are FrozenTokenLists of frozen Tokens, so hits can be shared freely.
+    The cache is process-local: every multiprocessing.Pool worker owns its own
+    copy (inherited empty or pre-warmed on fork). Within a process it is shared
+    by all threads (the inference server's request threads), hence the lock.
+    """
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[FrozenTokenList]:
+        with self.lock:
+            tokens = self.entries.get(key)
+            if tokens is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return tokens
+
+    def put(self, key: Tuple[str, str], tokens: FrozenTokenList):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = tokens
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+TOKEN_CACHE = TokenCache()
+
+def tokenize(s: str, locale: str = DEFAULT_LOCALE) -> TokenList:
     if s is None:
         return TokenList([])
-    patterns = load_regex_definitions(locale=locale)
-    if patterns is None:
-        print("DEBUG: load_regex_definitions returned None!")
-        return TokenList([])
-    
-    # Priority Order for Matching
-    priority = [
-        RegexToken.SALUTATION,
-        RegexToken.TITLE,
-        RegexToken.DEGREE,
-        RegexToken.SUFFIX,
-        RegexToken.PARTICLE,
-        RegexToken.CONJUNCTION,
-        RegexToken.INITIAL,
-        RegexToken.WORD,
-        RegexToken.PUNCT
-    ]
-    
+    key = (s, locale)
+    tokens = TOKEN_CACHE.get(key)
+    if tokens is None:
+        tokens = FrozenTokenList(scan_tokens(s, locale))
+        TOKEN_CACHE.put(key, tokens)
+    return tokens
+
+def scan_tokens(s: str, locale: str = DEFAULT_LOCALE) -> List[Token]:
+    """Uncached tokenizer scan: one master-regex match per token."""
+    master, group_types = load_tokenizer(locale=locale)
+    match_at = master.match
+
     tokens = []
     pos = 0
-    while pos < len(s):
-        match_found = False
-        # Skip whitespace
-        if s[pos].isspace():
-            pos += 1
-            continue
-            
-        for token_type in priority:
-            if token_type not in patterns:
-                continue
-            regex = patterns[token_type]
-            match = regex.match(s, pos)
-            if match:
-                tokens.append(Token(match.group(0), token_type, match.span(), len(tokens)))
-                pos = match.end()
-                match_found = True
-                break
-        
-        if not match_found:
+    end = len(s)
+    while pos < end:
+        match = match_at(s, pos)
+        if match is None:
             # Safety: skip one char if nothing matches (should rarely happen with WORD/PUNCT)
             pos += 1
-            
-    return TokenList(tokens)
+            continue
+
+        token_type = group_types[match.lastindex]
+        if token_type is not None: # None = whitespace run
+            tokens.append(Token(match.group(), token_type, match.span(), len(tokens)))
+        pos = match.end()
+
+    return tokens
 
 def filter_by_type(tokens: TokenList, type_: RegexToken) -> TokenList:
     return TokenList([t for t in tokens if t.type == type_])
@@ -400,7 +557,7 @@ def get_gender_from_salutation(token: Optional[Token]) -> Gender:
     if not token or token.type != RegexToken.SALUTATION:
         return Gender.UNKNOWN
     
-    val = token.value.lower().strip(".")
+    val = token.lower.strip(".")
     # Phase 1: Hardcoded Mapping
     male_terms = {"herr", "herrn", "hr", "mr", "mister", "monsieur", "m", "sir", "lord"}
     female_terms = {"frau", "fr", "mrs", "ms", "miss", "madame", "mme", "mlle", "dame", "lady"}
@@ -550,12 +707,12 @@ COMMON_FAMILY_NAMES = {
 
 def is_common_family_name(t: Optional[Token]) -> bool:
     if not t: return False
-    return t.value.lower() in COMMON_FAMILY_NAMES
+    return bool(t.lexicon & LEX_FAMILY_NAME)
 
 def is_common_given_name(t: Optional[Token]) -> bool:
     if not t: return False
     # Reuse GENDER_DB keys as they are common given names
-    return t.value.lower() in GENDER_DB
+    return bool(t.lexicon & LEX_GIVEN_NAME)
 
 # 3.4.2 Statistical & Feature Primitives
 def token_length(t: Optional[Token]) -> int:
@@ -575,11 +732,12 @@ def has_period(t: Optional[Token]) -> bool:
     if not t: return False
     return "." in t.value
 
+# Common roman numerals used in names
+ROMAN_NUMERALS = {"I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X"}
+
 def is_roman_numeral(t: Optional[Token]) -> bool:
     if not t: return False
-    # Simple check for common roman numerals used in names
-    val = t.value.upper().strip(".,")
-    return val in {"I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X"}
+    return bool(t.lexicon & LEX_ROMAN_NUMERAL)
 
 def is_particle(t: Optional[Token]) -> bool:
     if not t: return False
@@ -594,10 +752,10 @@ def is_conjunction(t: Optional[Token]) -> bool:
     return t.type == RegexToken.CONJUNCTION
 
 # 3.4.3 Shape & N-Gram Primitives
-def get_token_shape(t: Optional[Token]) -> str:
-    if not t: return ""
+def token_shape(value: str) -> str:
+    # Xxxx-style shape of a string (cached per token as Token.shape)
     shape = []
-    for char in t.value:
+    for char in value:
         if char.isupper():
             shape.append("X")
         elif char.islower():
@@ -608,23 +766,25 @@ def get_token_shape(t: Optional[Token]) -> str:
             shape.append(char)
     return "".join(shape)
 
+def get_token_shape(t: Optional[Token]) -> str:
+    if not t: return ""
+    return t.shape
+
 def is_shape(t: Optional[Token], shape: str) -> bool:
     if not t: return False
-    return get_token_shape(t) == shape
+    return t.shape == shape
 
 def ends_with_ngram(t: Optional[Token], ngram: str) -> bool:
     if not t or not ngram: return False
-    return t.value.lower().endswith(ngram.lower())
+    return t.lower.endswith(ngram.lower())
 
 def starts_with_ngram(t: Optional[Token], ngram: str) -> bool:
     if not t or not ngram: return False
-    return t.value.lower().startswith(ngram.lower())
+    return t.lower.startswith(ngram.lower())
 
 def filter_by_shape(tokens: TokenList, shape: str) -> TokenList:
     if not tokens: return TokenList([])
-    return TokenList([t for t in tokens if get_token_shape(t) == shape])
-
-    return TokenList([t for t in tokens if get_token_shape(t) == shape])
+    return TokenList([t for t in tokens if t.shape == shape])
 
 def merge_particles(tokens: TokenList) -> TokenList:
     """
@@ -673,8 +833,10 @@ def merge_particles(tokens: TokenList) -> TokenList:
             # Advance main loop
             i = j
         else:
-            # Just copy
-            t.index = len(merged)
+            # Just copy (tokens are frozen and may be shared with the tokenize cache,
+            # so re-index via a copy instead of mutating in place)
+            if t.index != len(merged):
+                t = replace(t, index=len(merged))
             merged.append(t)
             i += 1
             
@@ -813,173 +975,201 @@ rand_int = gen_rand_int
 rand_float = gen_rand_float
 
 # --- 4. Primitive Set Creation ---
-from deap import gp
+# The primitive set as plain data: create_pset builds the DEAP set from it, and
+# champion_artifact.py runs exported champions from it without importing deap.
+
+ARGUMENT_NAME = "raw_input"
+
+def primitive_specs() -> List[Tuple[Any, List[type], type]]:
+    """(function, argument types, return type) of every primitive, in registration order."""
+    return [
+        # -- Control Flow --
+        (if_bool_string, [bool, str, str], str),
+        (if_bool_tokenlist, [bool, TokenList, TokenList], TokenList),
+        (bool_to_int, [bool], int),
+        (bool_to_float, [bool], float),
+
+        # -- Logic & Comparison --
+        # (bool_and, [bool, bool], bool),
+        # (bool_or, [bool, bool], bool),
+        # (bool_not, [bool], bool),
+        # (int_lt, [int, int], bool),
+        # (int_gt, [int, int], bool),
+        # (int_eq, [int, int], bool),
+        # (float_lt, [float, float], bool),
+        # (float_gt, [float, float], bool),
+
+        # -- Scoring Math --
+        (float_min, [float, float], float),
+        (float_max, [float, float], float),
+        (clamp_float, [float, float, float], float),
+
+        # -- String/List Ops --
+        (default_str_if_empty, [str, str], str),
+        # (str_equals_normalized, [str, str], bool),
+        # (str_contains, [str, str], bool),
+        # (str_equals_ci, [str, str], bool),
+        # (join_stringlist, [StringList], str),
+        (tokens_to_stringlist, [TokenList], StringList),
+        (token_to_tokenlist, [Token], TokenList),
+        (token_to_stringlist, [Token], StringList),
+        (is_not_empty_tokenlist, [TokenList], bool),
+        (is_not_empty_stringlist, [StringList], bool),
+        (trim, [str], str),
+        (to_lower, [str], str),
+        (split_on_comma, [str], StringList),
+        (get_first_string, [StringList], str),
+        (get_last_string, [StringList], str),
+        (get_first_token, [TokenList], Token),
+        (get_last_token, [TokenList], Token),
+        (slice_tokens, [TokenList, int, int], TokenList),
+        (len_tokens, [TokenList], int),
+        (drop_first, [TokenList], TokenList),
+        (drop_last, [TokenList], TokenList),
+        (remove_type, [TokenList, RegexToken], TokenList),
+        (is_conjunction, [Token], bool),
+        (merge_particles, [TokenList], TokenList),
+        # (index_of_type, [TokenList, RegexToken], int),
+        (get_remainder_tokens, [TokenList, TokenList], TokenList),
+
+        # -- Token Muscles --
+        (tokenize, [str], TokenList),
+        (filter_by_type, [TokenList, RegexToken], TokenList),
+        # (count_type, [TokenList, RegexToken], int),
+        (get_gender_from_salutation, [Token], Gender),
+        (get_gender_from_name, [str], Gender),
+        (is_male, [Gender], bool),
+        (is_female, [Gender], bool),
+
+        # -- Feature Detectors --
+        (has_comma, [str], bool),
+        (is_title, [Token], bool),
+        (is_salutation, [Token], bool),
+        (identity_token_type, [RegexToken], RegexToken),
+
+        # -- Token Accessors --
+        (token_value, [Token], str),
+        (token_type_of, [Token], RegexToken),
+        (token_index, [Token], int),
+        (token_span_start, [Token], int),
+        (token_span_end, [Token], int),
+        (default_token_if_none, [Token, Token], Token),
+
+        # -- Context Primitives --
+        (get_prev_token, [TokenList, Token], Token),
+        (get_next_token, [TokenList, Token], Token),
+        (is_first_token, [Token], bool),
+        (is_last_token_in_list, [TokenList, Token], bool),
+
+        # -- List Aggregators --
+        # (tokens_contain_type, [TokenList, RegexToken], bool),
+        # (tokens_start_with_type, [TokenList, RegexToken], bool),
+        # (tokens_end_with_type, [TokenList, RegexToken], bool),
+
+        # -- New Context Primitives (Old) --
+        (get_tokens_before_comma, [TokenList], TokenList),
+        (get_tokens_after_comma, [TokenList], TokenList),
+        (is_all_caps, [Token], bool),
+        (is_capitalized, [Token], bool),
+        (is_short, [Token], bool),
+        (is_common_given_name, [Token], bool),
+        (is_common_given_name, [Token], bool),
+        (is_common_family_name, [Token], bool),
+
+        # -- Statistical & Feature Primitives --
+        (token_length, [Token], int),
+        (is_initial, [Token], bool),
+        (has_hyphen, [Token], bool),
+        (has_period, [Token], bool),
+        (is_roman_numeral, [Token], bool),
+        (is_particle, [Token], bool),
+        (is_suffix, [Token], bool),
+
+        # -- Shape & N-Grams --
+        (get_token_shape, [Token], str),
+        (is_shape, [Token, str], bool),
+        (ends_with_ngram, [Token, str], bool),
+        (starts_with_ngram, [Token, str], bool),
+        (filter_by_shape, [TokenList, str], TokenList),
+
+        # -- Macro-Primitives (Boosters) --
+        # (extract_salutation_str, [TokenList], str),
+        # (extract_title_list, [TokenList], StringList),
+        # (extract_given_str, [TokenList], str),
+        # (extract_family_str, [TokenList], str),
+        (extract_middle_str, [TokenList], StringList),
+        (extract_suffix_list, [TokenList], StringList),
+        (extract_degree_list, [TokenList], StringList),
+        (extract_particles_list, [TokenList], StringList),
+
+        # -- Object Builder --
+        (make_name_obj, [str, str, StringList, str, str, StringList, Gender, StringList, StringList], NameObj),
+        (set_confidence, [NameObj, float], NameObj),
+        (operator.mul, [float, float], float),
+    ]
 
-def create_pset() -> gp.PrimitiveSetTyped:
-    pset = gp.PrimitiveSetTyped("MAIN", [str], NameObj)
-    
-    # Register Primitives
-    # -- Control Flow --
-    pset.addPrimitive(if_bool_string, [bool, str, str], str)
-    pset.addPrimitive(if_bool_tokenlist, [bool, TokenList, TokenList], TokenList)
-    pset.addPrimitive(bool_to_int, [bool], int)
-    pset.addPrimitive(bool_to_float, [bool], float)
-    
-    # -- Logic & Comparison --
-    # pset.addPrimitive(bool_and, [bool, bool], bool)
-    # pset.addPrimitive(bool_or, [bool, bool], bool)
-    # pset.addPrimitive(bool_not, [bool], bool)
-    # pset.addPrimitive(int_lt, [int, int], bool)
-    # pset.addPrimitive(int_gt, [int, int], bool)
-    # pset.addPrimitive(int_eq, [int, int], bool)
-    # pset.addPrimitive(float_lt, [float, float], bool)
-    # pset.addPrimitive(float_gt, [float, float], bool)
-    
-    # -- Scoring Math --
-    pset.addPrimitive(float_min, [float, float], float)
-    pset.addPrimitive(float_max, [float, float], float)
-    pset.addPrimitive(clamp_float, [float, float, float], float)
-
-    # -- String/List Ops --
-    pset.addPrimitive(default_str_if_empty, [str, str], str)
-    # pset.addPrimitive(str_equals_normalized, [str, str], bool)
-    # pset.addPrimitive(str_contains, [str, str], bool)
-    # pset.addPrimitive(str_equals_ci, [str, str], bool)
-    # pset.addPrimitive(join_stringlist, [StringList], str)
-    pset.addPrimitive(tokens_to_stringlist, [TokenList], StringList)
-    pset.addPrimitive(token_to_tokenlist, [Token], TokenList)
-    pset.addPrimitive(token_to_stringlist, [Token], StringList)
-    pset.addPrimitive(is_not_empty_tokenlist, [TokenList], bool)
-    pset.addPrimitive(is_not_empty_stringlist, [StringList], bool)
-    pset.addPrimitive(trim, [str], str)
-    pset.addPrimitive(to_lower, [str], str)
-    pset.addPrimitive(split_on_comma, [str], StringList)
-    pset.addPrimitive(get_first_string, [StringList], str)
-    pset.addPrimitive(get_last_string, [StringList], str)
-    
-    pset.addPrimitive(get_first_token, [TokenList], Token) 
-    pset.addPrimitive(get_last_token, [TokenList], Token)
-    pset.addPrimitive(slice_tokens, [TokenList, int, int], TokenList)
-    pset.addPrimitive(len_tokens, [TokenList], int)
-    pset.addPrimitive(drop_first, [TokenList], TokenList)
-    pset.addPrimitive(drop_last, [TokenList], TokenList)
-    pset.addPrimitive(remove_type, [TokenList, RegexToken], TokenList)
-    pset.addPrimitive(is_conjunction, [Token], bool)
-    pset.addPrimitive(merge_particles, [TokenList], TokenList)
-    # pset.addPrimitive(index_of_type, [TokenList, RegexToken], int)
-    pset.addPrimitive(get_remainder_tokens, [TokenList, TokenList], TokenList)
-    
-    # -- Token Muscles --
-    pset.addPrimitive(tokenize, [str], TokenList)
-    pset.addPrimitive(filter_by_type, [TokenList, RegexToken], TokenList)
-    # pset.addPrimitive(count_type, [TokenList, RegexToken], int)
-    pset.addPrimitive(get_gender_from_salutation, [Token], Gender)
-    pset.addPrimitive(get_gender_from_name, [str], Gender)
-    pset.addPrimitive(is_male, [Gender], bool)
-    pset.addPrimitive(is_female, [Gender], bool)
-    
-    # -- Feature Detectors --
-    pset.addPrimitive(has_comma, [str], bool)
-    pset.addPrimitive(is_title, [Token], bool)
-    pset.addPrimitive(is_salutation, [Token], bool)
-    pset.addPrimitive(identity_token_type, [RegexToken], RegexToken)
-    
-    # -- Token Accessors --
-    pset.addPrimitive(token_value, [Token], str)
-    pset.addPrimitive(token_type_of, [Token], RegexToken)
-    pset.addPrimitive(token_index, [Token], int)
-    pset.addPrimitive(token_span_start, [Token], int)
-    pset.addPrimitive(token_span_end, [Token], int)
-    pset.addPrimitive(default_token_if_none, [Token, Token], Token)
-
-    # -- Context Primitives --
-    pset.addPrimitive(get_prev_token, [TokenList, Token], Token)
-    pset.addPrimitive(get_next_token, [TokenList, Token], Token)
-    pset.addPrimitive(is_first_token, [Token], bool)
-    pset.addPrimitive(is_last_token_in_list, [TokenList, Token], bool)
-
-    # -- List Aggregators --
-    # pset.addPrimitive(tokens_contain_type, [TokenList, RegexToken], bool)
-    # pset.addPrimitive(tokens_start_with_type, [TokenList, RegexToken], bool)
-    # pset.addPrimitive(tokens_end_with_type, [TokenList, RegexToken], bool)
-    
-    # -- New Context Primitives (Old) --
-    pset.addPrimitive(get_tokens_before_comma, [TokenList], TokenList)
-    pset.addPrimitive(get_tokens_after_comma, [TokenList], TokenList)
-    pset.addPrimitive(is_all_caps, [Token], bool)
-    pset.addPrimitive(is_capitalized, [Token], bool)
-    pset.addPrimitive(is_short, [Token], bool)
-    pset.addPrimitive(is_common_given_name, [Token], bool)
-    pset.addPrimitive(is_common_given_name, [Token], bool)
-    pset.addPrimitive(is_common_family_name, [Token], bool)
-
-    # -- Statistical & Feature Primitives --
-    pset.addPrimitive(token_length, [Token], int)
-    pset.addPrimitive(is_initial, [Token], bool)
-    pset.addPrimitive(has_hyphen, [Token], bool)
-    pset.addPrimitive(has_period, [Token], bool)
-    pset.addPrimitive(is_roman_numeral, [Token], bool)
-    pset.addPrimitive(is_particle, [Token], bool)
-    pset.addPrimitive(is_suffix, [Token], bool)
-    
-    # -- Shape & N-Grams --
-    pset.addPrimitive(get_token_shape, [Token], str)
-    pset.addPrimitive(is_shape, [Token, str], bool)
-    pset.addPrimitive(ends_with_ngram, [Token, str], bool)
-    pset.addPrimitive(starts_with_ngram, [Token, str], bool)
-    pset.addPrimitive(filter_by_shape, [TokenList, str], TokenList)
-
-    # -- Macro-Primitives (Boosters) --
-    # pset.addPrimitive(extract_salutation_str, [TokenList], str)
-    # pset.addPrimitive(extract_title_list, [TokenList], StringList)
-    # pset.addPrimitive(extract_given_str, [TokenList], str)
-    # pset.addPrimitive(extract_family_str, [TokenList], str)
-    pset.addPrimitive(extract_middle_str, [TokenList], StringList)
-    pset.addPrimitive(extract_suffix_list, [TokenList], StringList)
-    pset.addPrimitive(extract_degree_list, [TokenList], StringList)
-    pset.addPrimitive(extract_particles_list, [TokenList], StringList)
-    
-    # -- Object Builder --
-    pset.addPrimitive(make_name_obj, 
-                      [str, str, StringList, str, str, StringList, Gender, StringList, StringList], 
-                      NameObj)
-    pset.addPrimitive(set_confidence, [NameObj, float], NameObj)
+def ephemeral_specs() -> List[Tuple[str, Any, type]]:
+    return [
+        ("rand_int", gen_rand_int, int),
+        ("rand_float", gen_rand_float, float),
+    ]
 
-    pset.addPrimitive(operator.mul, [float, float], float)
-    
-    # -- Ephemeral Constants --
-    pset.addEphemeralConstant("rand_int", gen_rand_int, int)
-    pset.addEphemeralConstant("rand_float", gen_rand_float, float)
-    
+def terminal_specs() -> List[Tuple[str, Any, type]]:
+    """(name, value, type) of every named terminal, in registration order (fresh values per call)."""
+    terminals = []
     # -- Enums as Terminals --
     for token_type in RegexToken:
-        pset.addTerminal(token_type, RegexToken, name=token_type.name)
+        terminals.append((token_type.name, token_type, RegexToken))
         
     for g in Gender:
-        pset.addTerminal(g, Gender, name=g.name)
+        terminals.append((g.name, g, Gender))
 
     # Empty Lists/Strings for fallbacks
-    pset.addTerminal("", str, name="EMPTY_STR")
+    terminals.append(("EMPTY_STR", "", str))
     
     # -- Common Shapes --
     for s in ["Xx.", "X.", "Xxxxx", "x", "d"]:
-        pset.addTerminal(s, str, name=f"SHAPE_{s.replace('.', 'dot')}")
+        terminals.append((f"SHAPE_{s.replace('.', 'dot')}", s, str))
         
     # -- Common N-Grams --
     for ng in ["ski", "son", "mc", "von", "zu", "van", "de", "ov", "vic"]:
-        pset.addTerminal(ng, str, name=f"NGRAM_{ng}")
-    pset.addTerminal(StringList([]), StringList, name="EMPTY_STR_LIST")
-    pset.addTerminal(TokenList([]), TokenList, name="EMPTY_TOK_LIST")
+        terminals.append((f"NGRAM_{ng}", ng, str))
+    terminals.append(("EMPTY_STR_LIST", StringList([]), StringList))
+    terminals.append(("EMPTY_TOK_LIST", TokenList([]), TokenList))
     
     # Fallback Objects
-    pset.addTerminal(NameObj(""), NameObj, name="EMPTY_NAME_OBJ")
-    pset.addTerminal(Token("", RegexToken.PUNCT, (0,0), -1), Token, name="EMPTY_TOKEN")
+    terminals.append(("EMPTY_NAME_OBJ", NameObj(""), NameObj))
+    terminals.append(("EMPTY_TOKEN", Token("", RegexToken.PUNCT, (0,0), -1), Token))
     
     # Booleans
-    pset.addTerminal(True, bool, name="TRUE")
-    pset.addTerminal(False, bool, name="FALSE")
+    terminals.append(("TRUE", True, bool))
+    terminals.append(("FALSE", False, bool))
+    return terminals
+
+def pset_signature() -> str:
+    """
+    Hash of the primitive set's names, arities and types (without deap).
+    Stored in champion artifacts: a champion only runs on the set it was evolved with.
+    """
+    lines = [f"{func.__name__}:{[t.__name__ for t in args]}:{ret.__name__}" for func, args, ret in primitive_specs()]
+    lines += [f"{name}:ephemeral:{ret.__name__}" for name, _, ret in ephemeral_specs()]
+    lines += [f"{name}:{ret.__name__}" for name, _, ret in terminal_specs()]
+    lines.append(f"{ARGUMENT_NAME}:str:NameObj")
+    import hashlib
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+def create_pset() -> "gp.PrimitiveSetTyped":
+    from deap import gp # Only training and analysis need deap (see champion_artifact.py)
+
+    pset = gp.PrimitiveSetTyped("MAIN", [str], NameObj)
+    for func, args, ret in primitive_specs():
+        pset.addPrimitive(func, args, ret)
+    for name, generator, ret in ephemeral_specs():
+        pset.addEphemeralConstant(name, generator, ret)
+    for name, value, ret in terminal_specs():
+        pset.addTerminal(value, ret, name=name)
 
     # Rename arguments for clarity
-    pset.renameArguments(ARG0="raw_input")
+    pset.renameArguments(ARG0=ARGUMENT_NAME)
     
     return pset
@@ -0,0 +1,309 @@
+import os
+import sys
+import time
+import json
+import pickle
+import argparse
+import importlib.util
+from enum import Enum
+from typing import List, Dict, Any, Tuple, Optional, Set
+
+from deap import gp, creator, base
+from primitive_set import (
+    create_pset, terminal_specs, pset_signature,
+    ARGUMENT_NAME, DEFAULT_LOCALE, NameObj, Token, StringList, TokenList
+)
+from simplify import simplify_tree
+from champion_artifact import load_artifact, load_tree
+
+# Recreate the types used in the pickle
+if not hasattr(creator, "FitnessMax"):
+    creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+if not hasattr(creator, "Individual"):
+    creator.create("Individual", gp.PrimitiveTree, fitness=creator.FitnessMax)
+
+# Primitives emitted as plain Python expressions instead of calls: {i} is the
+# i-th argument. Each template computes exactly what the primitive_set function
+# returns; names after the template are primitive_set names it refers to.
+# An argument that appears twice is bound to a local first, so it is computed
+# once; branches of conditional expressions are only computed when taken.
+INLINE: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "if_bool_string": ("{1} if {0} else {2}", ()),
+    "if_bool_tokenlist": ("TokenList({1} if {0} else {2})", ("TokenList",)),
+    "bool_to_int": ("1 if {0} else 0", ()),
+    "bool_to_float": ("1.0 if {0} else 0.0", ()),
+    "float_min": ("{0} if {0} < {1} else {1}", ()),
+    "float_max": ("{0} if {0} > {1} else {1}", ()),
+    "clamp_float": ("{1} if {0} < {1} else {2} if {0} > {2} else {0}", ()),
+    "mul": ("{0} * {1}", ()),
+    "default_str_if_empty": ("{0} or {1}", ()),
+    "default_token_if_none": ("{0} or {1}", ()),
+    "is_not_empty_tokenlist": ("bool({0})", ()),
+    "is_not_empty_stringlist": ("bool({0})", ()),
+    "trim": ("{0}.strip()", ()),
+    "to_lower": ("{0}.lower()", ()),
+    "has_comma": ("',' in {0}", ()),
+    "get_first_string": ("{0}[0] if {0} else ''", ()),
+    "get_last_string": ("{0}[-1] if {0} else ''", ()),
+    "get_first_token": ("{0}[0] if {0} else None", ()),
+    "get_last_token": ("{0}[-1] if {0} else None", ()),
+    "len_tokens": ("len({0})", ()),
+    "token_value": ("{0}.value if {0} else ''", ()),
+    "token_type_of": ("{0}.type if {0} else RegexToken.WORD", ("RegexToken",)),
+    "token_index": ("{0}.index if {0} else -1", ()),
+    "token_span_start": ("{0}.span[0] if {0} else -1", ()),
+    "token_span_end": ("{0}.span[1] if {0} else -1", ()),
+    "token_length": ("len({0}.value) if {0} else 0", ()),
+    "identity_token_type": ("{0}", ()),
+    "is_male": ("{0} == Gender.MALE", ("Gender",)),
+    "is_female": ("{0} == Gender.FEMALE", ("Gender",)),
+    "is_title": ("{0}.type == RegexToken.TITLE if {0} else False", ("RegexToken",)),
+    "is_salutation": ("{0}.type == RegexToken.SALUTATION if {0} else False", ("RegexToken",)),
+    "is_conjunction": ("{0}.type == RegexToken.CONJUNCTION if {0} else False", ("RegexToken",)),
+    "is_particle": ("{0}.type == RegexToken.PARTICLE if {0} else False", ("RegexToken",)),
+    "is_suffix": ("{0}.type == RegexToken.SUFFIX if {0} else False", ("RegexToken",)),
+    "has_hyphen": ("'-' in {0}.value if {0} else False", ()),
+    "has_period": ("'.' in {0}.value if {0} else False", ()),
+}
+
+# A node of the expression DAG: (primitive name, argument node ids) or (None, terminal source)
+Node = Tuple[Optional[str], Any]
+
+def constant_source(value) -> Tuple[str, Set[str]]:
+    """Python source of a named terminal's value and the primitive_set names it needs."""
+    if isinstance(value, Enum):
+        return f"{type(value).__name__}.{value.name}", {type(value).__name__}
+    if isinstance(value, (bool, int, float, str)):
+        return repr(value), set()
+    if isinstance(value, (StringList, TokenList)) and not value:
+        return f"{type(value).__name__}([])", {type(value).__name__}
+    if isinstance(value, NameObj) and value == NameObj(value.raw):
+        return f"NameObj({value.raw!r})", {"NameObj"}
+    if isinstance(value, Token):
+        return (f"Token({value.value!r}, RegexToken.{value.type.name}, {value.span!r}, {value.index!r})",
+                {"Token", "RegexToken"})
+    raise ValueError(f"Cannot export terminal value {value!r}")
+
+class ModuleExporter:
+    """
+    Straight-line Python source of a (simplified) champion tree.
+
+    The prefix node list is hash-consed into a DAG, so every distinct subexpression
+    exists once. Subexpressions used more than once are bound to a local in
+    dependency order; the rest is nested into its single consumer, with trivial
+    primitives (INLINE) written out as expressions instead of calls.
+    """
+    def __init__(self, nodes: List, locale: str = DEFAULT_LOCALE):
+        self.locale = locale
+        self.constants = {name: value for name, value, _ in terminal_specs()}
+        self.graph: List[Node] = []
+        self.root = self._build(nodes)
+
+        uses = [0] * len(self.graph)
+        self.bound: Set[int] = set()
+        for name, args in self.graph:
+            if name is None:
+                continue
+            for arg in args:
+                uses[arg] += 1
+            template = INLINE.get(name)
+            if template is not None:
+                for i, arg in enumerate(args):
+                    if template[0].count(f"{{{i}}}") > 1:
+                        self.bound.add(arg)
+        self.bound.update(i for i, n in enumerate(uses) if n > 1)
+        self.bound = {i for i in self.bound if self.graph[i][0] is not None and i != self.root}
+        self.locals = {i: f"v{k}" for k, i in enumerate(sorted(self.bound), 1)}
+
+        self.functions: Set[str] = set()
+        self.types: Set[str] = set()
+        self.module_constants: Dict[str, str] = {}
+
+    def _build(self, nodes: List) -> int:
+        ids: Dict[Node, int] = {}
+
+        def intern(key: Node) -> int:
+            if key not in ids:
+                ids[key] = len(self.graph)
+                self.graph.append(key)
+            return ids[key]
+
+        stack = []
+        for node in nodes:
+            stack.append((node, []))
+            while len(stack[-1][1]) == stack[-1][0].arity:
+                node, args = stack.pop()
+                if isinstance(node, gp.Terminal):
+                    key = (None, self._terminal(node))
+                else:
+                    key = (node.name, tuple(args))
+                if not stack:
+                    return intern(key)
+                stack[-1][1].append(intern(key))
+        raise ValueError("Incomplete champion tree")
+
+    def _terminal(self, node) -> str:
+        if node.conv_fct is not str:
+            return repr(node.value) # Ephemeral constant
+        if node.value == ARGUMENT_NAME:
+            return ARGUMENT_NAME
+        return node.value
+
+    def _atom(self, text: str) -> str:
+        """Source of a terminal: literals inline, objects and enums as module constants."""
+        if text not in self.constants:
+            return text
+        source, types = constant_source(self.constants[text])
+        if isinstance(self.constants[text], (bool, int, float, str)):
+            return source
+        self.types.update(types)
+        self.module_constants[text] = source
+        return text
+
+    def _render(self, i: int, nested: bool = False, top: bool = False) -> str:
+        name, args = self.graph[i]
+        if name is None:
+            return self._atom(args)
+        if i in self.locals and not top:
+            return self.locals[i]
+
+        template = INLINE.get(name)
+        if template is None:
+            self.functions.add(name)
+            call_args = [self._render(arg) for arg in args]
+            if name == "tokenize" and self.locale != DEFAULT_LOCALE:
+                call_args.append(f"locale={self.locale!r}")
+            return f"{name}({', '.join(call_args)})"
+
+        source, types = template
+        self.types.update(types)
+        expr = source.format(*[self._render(arg, nested=True) for arg in args])
+        # Operators bind looser than calls and attribute access: parenthesize inside other templates
+        return f"({expr})" if nested and " " in source else expr
+
+    def body(self) -> List[str]:
+        lines = [f"    {self.locals[i]} = {self._render(i, top=True)}" for i in sorted(self.bound)]
+        lines.append(f"    return {self._render(self.root, top=True)}")
+        return lines
+
+def export_module(individual, pset=None, source: str = "", locale: str = DEFAULT_LOCALE,
+                  generation: Optional[int] = None) -> str:
+    """
+    Standalone Python module of a champion: champion(raw_input) is the bare program,
+    parse(raw_input) adds repair_name_object like artifact_parser. The tree is
+    simplified (on a copy) first, so constant subtrees and dead branches never
+    reach the module. The module imports only the primitive_set names it uses.
+    """
+    pset = pset or create_pset()
+    original = len(individual)
+    individual = gp.PrimitiveTree(individual)
+    simplify_tree(individual, pset)
+
+    exporter = ModuleExporter(list(individual), locale)
+    body = exporter.body()
+    names = sorted(exporter.types) + sorted(exporter.functions)
+    constants = [f"{name} = {value}" for name, value in sorted(exporter.module_constants.items())]
+    header = [
+        f'"""',
+        f"evoname - Generated Parser (Python)",
+        f"Exported by py_exporter.py{f' from {source}' if source else ''}; do not edit.",
+        f"Champion: {original} nodes, {len(individual)} after simplification, "
+        f"{len(exporter.graph)} distinct subexpressions, {len(exporter.locals)} shared."
+        + (f" Generation {generation}." if generation is not None else ""),
+        f'"""',
+        f"from primitive_set import {', '.join(names)}",
+        "from post_processor import repair_name_object",
+        "",
+        f"PSET_SIGNATURE = {pset_signature()!r}",
+        f"LOCALE = {locale!r}",
+    ]
+    return "\n".join(
+        header + constants + [
+            "",
+            f"def champion({ARGUMENT_NAME}):",
+            *body,
+            "",
+            f"def parse({ARGUMENT_NAME}):",
+            f"    return repair_name_object(champion({ARGUMENT_NAME}))",
+            "",
+        ]
+    )
+
+def load_module(path: str):
+    """Imports a generated module from its file path."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _outcome(func, raw: str) -> str:
+    try:
+        return repr(func(raw))
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+def _best_time(func, raws: List[str], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for raw in raws:
+            try:
+                func(raw)
+            except Exception:
+                pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark(individual, pset, module, data_path: str, rounds: int = 5) -> Dict[str, Any]:
+    """Per-name time of gp.compile vs. the generated champion() on a dataset (best of `rounds`)."""
+    with open(data_path, "r", encoding="utf-8") as f:
+        raws = [example["raw"] for example in json.load(f)]
+    compiled = gp.compile(individual, pset)
+    mismatches = sum(_outcome(compiled, raw) != _outcome(module.champion, raw) for raw in raws)
+    compiled_s = _best_time(compiled, raws, rounds)
+    exported_s = _best_time(module.champion, raws, rounds)
+    return {
+        "names": len(raws),
+        "mismatches": mismatches,
+        "compiled_us": compiled_s / len(raws) * 1e6,
+        "exported_us": exported_s / len(raws) * 1e6,
+        "speedup": compiled_s / exported_s if exported_s else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a champion as a standalone straight-line Python module")
+    parser.add_argument("--input", default="model/champion.json", help="Path to champion.json (or a champion.pkl)")
+    parser.add_argument("--output", default="dist/evoname_parser.py", help="Path to output .py file")
+    parser.add_argument("--benchmark", metavar="DATA", help="Compare against gp.compile on a dataset (e.g. data/test.json)")
+    parser.add_argument("--rounds", type=int, default=5, help="Benchmark rounds (best is reported)")
+
+    args = parser.parse_args()
+    pset = create_pset()
+
+    print(f"Loading champion from {args.input}...")
+    locale, generation = DEFAULT_LOCALE, None
+    if args.input.endswith(".json"):
+        artifact = load_artifact(args.input)
+        champion = load_tree(artifact, pset)
+        locale, generation = artifact.get("locale", DEFAULT_LOCALE), artifact.get("generation")
+    else:
+        with open(args.input, "rb") as f:
+            champion = pickle.load(f)
+
+    source = export_module(champion, pset, source=args.input, locale=locale, generation=generation)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(source)
+    print(f"💾 Saved Python parser to {args.output}")
+
+    if args.benchmark:
+        stats = benchmark(champion, pset, load_module(args.output), args.benchmark, args.rounds)
+        print(f"⏱️ {stats['names']} names: gp.compile {stats['compiled_us']:.1f}µs/name, "
+              f"exported {stats['exported_us']:.1f}µs/name ({stats['speedup']:.2f}x), "
+              f"{stats['mismatches']} mismatches")
+        if stats["mismatches"]:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
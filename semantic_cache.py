@@ -0,0 +1,178 @@
+import sys
+from collections import OrderedDict
+from itertools import repeat
+from typing import List, Dict, Any, Optional, Tuple
+
+from deap import gp
+
+from primitive_set import NameObj
+from compact_tree import as_nodes
+
+SEMANTIC_CACHE_BYTES = 64 * 1024 * 1024
+
+class _Failed:
+    """Output slot of an entry on which the subtree raised."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "FAILED"
+
+FAILED = _Failed()
+
+class Const:
+    """Output of a subtree that does not read raw_input (same value for every entry)."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+def column_bytes(column) -> int:
+    """Rough size of an output column (shared tokens are not counted)."""
+    if isinstance(column, Const):
+        return sys.getsizeof(column.value)
+    if column is None:
+        return 0
+    return sys.getsizeof(column) + sum(sys.getsizeof(v) for v in column if isinstance(v, (str, list)))
+
+class SubtreeCache:
+    """
+    Semantic cache: output vector of each distinct subtree over a dataset.
+
+    Key: dataset fingerprint + canonical subtree string.
+    Value: (column, failed). A column holds one output per entry (FAILED where the
+    subtree raised); None means a strict evaluation stopped at the first failure.
+    Subtrees returning NameObj are never cached (set_confidence and the post-processor
+    mutate those objects). Bounded by an approximate byte budget, LRU eviction.
+    """
+    def __init__(self, max_bytes: int = SEMANTIC_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple, strict: bool = True):
+        entry = self.entries.get(key)
+        if entry is None or (entry[0] is None and not strict):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Tuple, column, failed: bool):
+        if self.max_bytes <= 0:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+
+        cost = column_bytes(column)
+        self.entries[key] = (column, failed, cost)
+        self.bytes += cost
+
+        while self.entries and self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted[2]
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def predict(self, individual, pset, ctx, strict: bool = True) -> Optional[List]:
+        """
+        Runs the program over every entry of ctx, one node at a time, reusing cached
+        subtree outputs. Returns the per-entry outputs (FAILED where the program raised),
+        or None in strict mode as soon as any entry fails.
+        """
+        raws = [entry.raw for entry in ctx.entries]
+        stack = []
+        for node in as_nodes(individual, pset):
+            stack.append((node, []))
+            while len(stack[-1][1]) == stack[-1][0].arity:
+                node, args = stack.pop()
+                key, column, failed = self._node(node, args, pset, ctx.fingerprint, raws, strict)
+                if failed and strict:
+                    return None
+                if not stack:
+                    if isinstance(column, Const):
+                        return [column.value] * len(raws)
+                    return column
+                stack[-1][1].append((key, column, failed))
+        return None
+
+    def _node(self, node, args, pset, fingerprint, raws, strict):
+        if isinstance(node, gp.Terminal):
+            if node.value in pset.arguments:
+                return node.value, raws, False
+            value = pset.context[node.value] if node.conv_fct is str else node.value
+            return node.format(), Const(value), False
+
+        key = node.format(*[a[0] for a in args])
+        cacheable = node.ret is not NameObj
+        if cacheable:
+            hit = self.get((fingerprint, key), strict)
+            if hit is not None:
+                return key, hit[0], hit[1]
+
+        column, failed = self._apply(pset.context[node.name], args, len(raws), strict, cacheable)
+        if cacheable:
+            self.put((fingerprint, key), column, failed)
+        return key, column, failed
+
+    @staticmethod
+    def _apply(func, args, n, strict, foldable):
+        columns = [a[1] for a in args]
+        if foldable and all(isinstance(c, Const) for c in columns):
+            if any(a[2] for a in args):
+                return Const(FAILED), True
+            try:
+                return Const(func(*[c.value for c in columns])), False
+            except Exception:
+                return Const(FAILED), True
+
+        inputs = [repeat(c.value, n) if isinstance(c, Const) else c for c in columns]
+        out = []
+        failed = False
+        if not any(a[2] for a in args):
+            for values in zip(*inputs):
+                try:
+                    out.append(func(*values))
+                except Exception:
+                    if strict:
+                        return None, True
+                    out.append(FAILED)
+                    failed = True
+        else:
+            for values in zip(*inputs):
+                if any(v is FAILED for v in values):
+                    out.append(FAILED)
+                    failed = True
+                    continue
+                try:
+                    out.append(func(*values))
+                except Exception:
+                    out.append(FAILED)
+                    failed = True
+        return out, failed
+
+SUBTREE_CACHE = SubtreeCache()
+
+def configure(max_bytes: int):
+    """Sets the byte budget of this process' subtree cache (0 disables caching)."""
+    SUBTREE_CACHE.max_bytes = max_bytes
+    SUBTREE_CACHE.clear()
@@ -0,0 +1,153 @@
+import math
+from typing import List, Dict, Any, Optional, Tuple
+
+from deap import gp
+
+from primitive_set import NameObj
+from compact_tree import CompactTree, opcode_table
+
+# A simplified subtree: (prefix node list, is_constant, constant value)
+Sub = Tuple[List, bool, Any]
+
+_NOT_CONST = (False, None)
+
+def _const(sub: Sub) -> bool:
+    return sub[1]
+
+def _pick_branch(children: List[Sub]) -> Optional[Sub]:
+    # if_bool_*(cond, a, b) with a constant condition
+    cond = children[0]
+    if _const(cond):
+        return children[1] if cond[2] else children[2]
+    return None
+
+def _first_unless_empty(children: List[Sub]) -> Optional[Sub]:
+    # default_*(x, fallback): decided once x is constant, a no-op with an empty fallback
+    first, fallback = children
+    if _const(first):
+        return first if first[2] else fallback
+    if _const(fallback) and not fallback[2]:
+        return first
+    return None
+
+def _remainder(children: List[Sub]) -> Optional[Sub]:
+    # get_remainder_tokens(x, EMPTY) == x
+    original, used = children
+    if _const(used) and not used[2]:
+        return original
+    return None
+
+def _identity(children: List[Sub]) -> Optional[Sub]:
+    return children[0]
+
+def _idempotent(name: str):
+    # f(f(x)) == f(x)
+    def rule(children: List[Sub]) -> Optional[Sub]:
+        inner = children[0][0]
+        if isinstance(inner[0], gp.Primitive) and inner[0].name == name:
+            return children[0]
+        return None
+    return rule
+
+# Rewrites that hold for every input on which the original subtree does not raise
+RULES = {
+    "if_bool_string": _pick_branch,
+    "if_bool_tokenlist": _pick_branch,
+    "default_str_if_empty": _first_unless_empty,
+    "default_token_if_none": _first_unless_empty,
+    "get_remainder_tokens": _remainder,
+    "identity_token_type": _identity,
+    "trim": _idempotent("trim"),
+    "to_lower": _idempotent("to_lower"),
+}
+
+class Simplifier:
+    """
+    Constant folder and algebraic simplifier for typed PrimitiveTrees.
+
+    Input-independent subtrees are evaluated once and replaced by a terminal of the
+    same type when the value is representable: a named pset terminal with an equal
+    value (EMPTY_*, TRUE/FALSE, enums, shapes, n-grams) or a finite int/float literal.
+    Subtrees returning NameObj are never evaluated (set_confidence mutates its
+    argument) and subtrees that raise are left untouched.
+
+    The result computes the same value as the original on every input where the
+    original does not raise; a dropped dead branch can only remove failures.
+    """
+    def __init__(self, pset):
+        self.pset = pset
+        self.named = {} # ret type -> [(value, terminal)]
+        for ret_type, terminals in pset.terminals.items():
+            for term in terminals:
+                if isinstance(term, gp.Terminal) and term.conv_fct is str and term.value in pset.context:
+                    self.named.setdefault(ret_type, []).append((pset.context[term.value], term))
+
+    def simplify(self, individual) -> List:
+        """Returns the simplified prefix node list of `individual`."""
+        stack = []
+        for node in individual:
+            stack.append((node, []))
+            while len(stack[-1][1]) == stack[-1][0].arity:
+                node, children = stack.pop()
+                sub = self._node(node, children)
+                if not stack:
+                    return sub[0]
+                stack[-1][1].append(sub)
+        return list(individual)
+
+    def _node(self, node, children: List[Sub]) -> Sub:
+        if isinstance(node, gp.Terminal):
+            return [node], *self._terminal_value(node)
+
+        rule = RULES.get(node.name)
+        if rule is not None:
+            rewritten = rule(children)
+            if rewritten is not None:
+                return rewritten
+
+        nodes = [node] + [n for child in children for n in child[0]]
+        if node.ret is NameObj or not all(_const(c) for c in children):
+            return nodes, False, None
+        try:
+            value = self.pset.context[node.name](*[c[2] for c in children])
+        except Exception:
+            return nodes, False, None # Keep runtime errors where they are
+
+        folded = self._terminal_for(value, node.ret)
+        return ([folded] if folded is not None else nodes), True, value
+
+    def _terminal_value(self, node) -> Tuple[bool, Any]:
+        if node.ret is NameObj:
+            return _NOT_CONST
+        if node.conv_fct is str:
+            if node.value in self.pset.arguments:
+                return _NOT_CONST
+            return True, self.pset.context[node.value]
+        return True, node.value
+
+    def _terminal_for(self, value, ret_type) -> Optional[gp.Terminal]:
+        """A terminal of ret_type that evaluates to `value`, or None."""
+        for term_value, term in self.named.get(ret_type, ()):
+            if type(term_value) is type(value) and term_value == value:
+                return term
+            if isinstance(value, list) and isinstance(term_value, list) and not value and not term_value:
+                return term
+        if ret_type in (int, float) and type(value) is ret_type and math.isfinite(value):
+            return gp.Terminal(value, False, ret_type)
+        return None
+
+_SIMPLIFIERS: Dict[int, Simplifier] = {}
+
+def simplify_tree(individual, pset) -> int:
+    """Simplifies `individual` (PrimitiveTree or CompactTree) in place. Returns the number of nodes removed."""
+    simplifier = _SIMPLIFIERS.get(id(pset))
+    if simplifier is None or simplifier.pset is not pset:
+        simplifier = _SIMPLIFIERS[id(pset)] = Simplifier(pset)
+    compact = isinstance(individual, CompactTree)
+    nodes = simplifier.simplify(opcode_table(pset).to_nodes(individual) if compact else individual)
+    removed = len(individual) - len(nodes)
+    if removed and compact:
+        opcode_table(pset).assign(individual, nodes)
+    elif removed:
+        individual[0:len(individual)] = nodes
+    return removed
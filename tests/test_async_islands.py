@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import tempfile
+import multiprocessing
+from deap import base, creator, gp
+from primitive_set import create_pset
+from compact_tree import opcode_table
+from async_islands import split_jobs, migration_policies, encode_population, decode_population, drain
+from evolution import Trainer
+from trainer import build_parser
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'train.json')
+
+ROUTES = [(1, 0), (2, 0), (0, 1), (0, 2)]
+
+class TestAsyncIslands(unittest.TestCase):
+    def setUp(self):
+        if not hasattr(creator, "FitnessMax"):
+            creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+        if not hasattr(creator, "Individual"):
+            creator.create("Individual", gp.PrimitiveTree, fitness=creator.FitnessMax)
+        self.pset = create_pset()
+
+    def test_split_jobs(self):
+        self.assertEqual(split_jobs(8, 3), [3, 3, 2])
+        self.assertEqual(split_jobs(3, 3), [1, 1, 1])
+        self.assertEqual(split_jobs(1, 3), [1, 1, 1]) # Every island needs at least one evaluator
+
+    def test_migration_policies_follow_routes(self):
+        policies = migration_policies([2, 5, 7], ROUTES)
+        self.assertEqual(policies[0], (2, [1, 2]))
+        self.assertEqual(policies[1], (5, [0]))
+        self.assertEqual(policies[2], (7, [0]))
+
+    def test_population_roundtrip(self):
+        table = opcode_table(self.pset)
+        a = table.individual(gp.PrimitiveTree.from_string("make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, EMPTY_STR, EMPTY_STR, "
+                                                          "EMPTY_STR_LIST, MALE, EMPTY_STR_LIST, EMPTY_STR_LIST)", self.pset))
+        b = table.individual(table.to_nodes(a))
+        a.fitness.values = (0.25,) * len(a.fitness.weights) # Other test modules may define FitnessMax first
+        decoded = decode_population(encode_population([a, b]))
+        self.assertEqual([table.to_string(ind) for ind in decoded], [table.to_string(a), table.to_string(b)])
+        self.assertEqual(decoded[0].fitness.values, a.fitness.values)
+        self.assertFalse(decoded[1].fitness.valid)
+
+    def test_drain_does_not_block(self):
+        inbox = multiprocessing.Queue()
+        self.assertEqual(drain(inbox), [])
+        inbox.put([("x", None)])
+        inbox.put([("y", (1.0,))])
+        items = []
+        while len(items) < 2: # Queue feeding is asynchronous
+            items += drain(inbox)
+        self.assertEqual(items, [("x", None), ("y", (1.0,))])
+
+class TestRunAsyncIslands(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name) # Trainer writes runs/, model/ and stats files to the working directory
+        # Other test modules may define FitnessMax with other weights; the Trainer creates its own
+        self.classes = {name: getattr(creator, name) for name in ("FitnessMax", "Individual") if hasattr(creator, name)}
+        for name in self.classes:
+            delattr(creator, name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+        for name in ("FitnessMax", "Individual"):
+            if hasattr(creator, name):
+                delattr(creator, name)
+        for name, cls in self.classes.items():
+            setattr(creator, name, cls)
+
+    def test_short_run_end_to_end(self):
+        with open(DATA_PATH, encoding="utf-8") as f:
+            data = json.load(f)[:24]
+        args = build_parser().parse_args(["--generations", "2", "--pop-size", "10", "--jobs", "3", "--async-islands",
+                                          "--checkpoint-every", "0", "--run-id", "async-test"])
+        trainer = Trainer(args, data, data[:6])
+        try:
+            trainer.train()
+        finally:
+            trainer.close()
+
+        self.assertEqual(trainer.generation, 2)
+        self.assertEqual([len(island) for island in trainer.islands], [10, 10, 10])
+        self.assertTrue(all(ind.fitness.valid for ind in trainer.islands[0]))
+        self.assertEqual(sorted(row["gen"] for row in trainer.logbook if row["island"] == 0), [0, 1])
+        for directory in ("model", os.path.join("runs", "async-test", "artifacts")):
+            self.assertTrue(os.path.exists(os.path.join(directory, "champion.json")), directory)
+        self.assertEqual(multiprocessing.active_children(), [])
+
+if __name__ == '__main__':
+    unittest.main()
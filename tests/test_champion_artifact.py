@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import json
+import pickle
+import tempfile
+import subprocess
+
+# Add parent directory to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from deap import base, creator, gp
+from primitive_set import create_pset
+from post_processor import repair_name_object
+from tree_compiler import compile_tree
+from champion_artifact import (
+    build_artifact, save_artifact, load_artifact, load_parser, artifact_parser, load_tree, artifact_from_pickle, ARTIFACT_VERSION
+)
+
+RAWS = ["Herr Dr. Hans Müller", "Müller, Karin", "Anna von der Heide", ""]
+CODE = "make_name_obj(raw_input, token_value(get_first_token(tokenize(raw_input))), split_on_comma(raw_input), token_value(get_last_token(tokenize(raw_input))), EMPTY_STR, EMPTY_STR_LIST, get_gender_from_name(raw_input), EMPTY_STR_LIST, EMPTY_STR_LIST)"
+
+class TestChampionArtifact(unittest.TestCase):
+    def setUp(self):
+        if not hasattr(creator, "FitnessMax"):
+            creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+        if not hasattr(creator, "Individual"):
+            creator.create("Individual", gp.PrimitiveTree, fitness=creator.FitnessMax)
+        self.pset = create_pset()
+        self.champion = creator.Individual(gp.PrimitiveTree.from_string(CODE, self.pset))
+        self.champion.fitness.values = (0.75,) * len(self.champion.fitness.weights)
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "champion.json")
+        save_artifact(self.path, build_artifact(self.champion, metrics={"given": 0.5}, generation=12))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_parser_matches_the_compiled_tree(self):
+        artifact = load_artifact(self.path)
+        self.assertEqual((artifact["generation"], artifact["metrics"], artifact["size"]), (12, {"given": 0.5}, len(self.champion)))
+        parse = artifact_parser(artifact)
+        program = compile_tree(self.champion, self.pset)
+        for raw in RAWS:
+            self.assertEqual(repr(parse(raw)), repr(repair_name_object(program(raw))))
+        self.assertEqual(str(load_tree(artifact, self.pset)), str(self.champion))
+
+    def test_converts_pickled_champions(self):
+        pkl = os.path.join(self.dir.name, "champion.pkl")
+        with open(pkl, "wb") as f:
+            pickle.dump(self.champion, f)
+        artifact = artifact_from_pickle(pkl)
+        self.assertEqual(artifact["expr"], str(self.champion))
+        self.assertEqual(artifact["fitness"], list(self.champion.fitness.values))
+
+        # The shipped model/champion.json is the converted model/champion.pkl
+        shipped = load_artifact(os.path.join(ROOT, "model", "champion.json"))
+        self.assertEqual(shipped["expr"], artifact_from_pickle(os.path.join(ROOT, "model", "champion.pkl"))["expr"])
+        artifact_parser(shipped)("Herr Dr. Hans Müller")
+
+    def test_loads_without_deap(self):
+        script = (
+            "import sys; sys.modules['deap'] = None\n"
+            "from champion_artifact import load_parser\n"
+            f"print(repr(load_parser({self.path!r})('Frau Anna Schmidt')))"
+        )
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), repr(load_parser(self.path)("Frau Anna Schmidt")))
+
+    def test_rejects_foreign_artifacts(self):
+        artifact = load_artifact(self.path)
+        with self.assertRaises(ValueError):
+            artifact_parser(dict(artifact, expr="__import__('os').getcwd()"))
+        with self.assertRaises(ValueError):
+            artifact_parser(dict(artifact, pset_signature="0" * 40))
+        with open(self.path, "w") as f:
+            json.dump(dict(artifact, version=ARTIFACT_VERSION + 1), f)
+        with self.assertRaises(ValueError):
+            load_artifact(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
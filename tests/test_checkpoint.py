@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import zlib
+import struct
+import pickle
+import random
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import gp
+from primitive_set import create_pset
+from compact_tree import opcode_table
+from checkpoint import CheckpointWriter, load_stream, read_records, encode_record, MAGIC
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.table = opcode_table(create_pset())
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "checkpoint.stream")
+        random.seed(5)
+        self.islands = [[(self.table.encode(gp.genHalfAndHalf(self.table.pset, 1, 5)), (random.random(),)) for _ in range(30)] for _ in range(3)]
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def state(self, gen):
+        # One generation: a third of every island is replaced by new trees
+        for island in self.islands:
+            for k in random.sample(range(len(island)), 10):
+                island[k] = (self.table.encode(gp.genFull(self.table.pset, 1, 4)), None if k % 2 else (random.random(),))
+        return {"gen": gen, "signature": self.table.signature, "islands": [list(island) for island in self.islands],
+                "hof": [self.islands[0][0]], "rng": random.getstate(), "trainer": {"mutpb": 0.5},
+                "logbook": [{"gen": gen, "island": i, "max": 0.5} for i in range(len(self.islands))]} # New rows only
+
+    def expected(self, state):
+        return [[(*key, values) for key, values in island] for island in state["islands"]]
+
+    def test_roundtrip_with_deltas(self):
+        writer = CheckpointWriter(self.path, compact_every=100)
+        for gen in range(1, 4):
+            state = self.state(gen)
+            writer.submit(state)
+        writer.close()
+
+        kinds = [record["kind"] for record in read_records(self.path)]
+        self.assertEqual(kinds, ["full", "delta", "delta"])
+        restored = load_stream(self.path)
+        self.assertEqual(restored["gen"], 3)
+        self.assertEqual(restored["islands"], self.expected(state))
+        self.assertEqual(restored["hof"], [(*self.islands[0][0][0], self.islands[0][0][1])])
+        self.assertEqual(restored["rng"], state["rng"])
+        self.assertEqual([row["gen"] for row in restored["logbook"]], [1, 1, 1, 2, 2, 2, 3, 3, 3])
+
+    def test_torn_tail_is_ignored(self):
+        writer = CheckpointWriter(self.path, compact_every=100)
+        state = self.state(1)
+        writer.submit(state)
+        writer.close()
+        with open(self.path, "ab") as f:
+            f.write(encode_record({"kind": "delta"})[:-3]) # Crash mid-write
+        restored = load_stream(self.path)
+        self.assertEqual(restored["gen"], 1)
+        self.assertEqual(restored["islands"], self.expected(state))
+
+    def test_compaction_bounds_the_stream(self):
+        writer = CheckpointWriter(self.path, compact_every=4)
+        sizes = []
+        for gen in range(1, 17):
+            state = self.state(gen)
+            writer.submit(state)
+            writer.flush()
+            sizes.append(os.path.getsize(self.path))
+        writer.close()
+        for k in (4, 8, 12): # Compacted to a single full record
+            self.assertLess(sizes[k], sizes[k - 1])
+        self.assertLess(max(sizes[8:]), 2 * max(sizes[:4]))
+        self.assertEqual(len(list(read_records(self.path))), 4)
+        restored = load_stream(self.path)
+        self.assertEqual(restored["islands"], self.expected(state))
+        self.assertEqual(len(restored["logbook"]), 16 * len(self.islands)) # Full records carry every row so far
+
+    def test_records_cannot_load_classes(self):
+        payload = pickle.dumps({"kind": "full", "x": pickle.Unpickler}) # References a class
+        with open(self.path, "wb") as f:
+            data = zlib.compress(payload)
+            f.write(MAGIC + struct.pack("<II", len(data), zlib.crc32(data)) + data)
+        with self.assertRaises(pickle.UnpicklingError):
+            load_stream(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import threading
+import multiprocessing
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from deap import gp
+from primitive_set import create_pset
+from evaluator import compile_dataset
+from eval_pool import EvalPool
+from async_islands import drain
+from cluster import Dispatcher, Coordinator, RemotePool, connect, run_eval_worker, parse_address, STOP
+
+DATA = [
+    {"raw": "Herr Dr. Hans Müller", "solution": {
+        "given": "Hans", "family": "Müller", "middle": [], "title": ["Dr."],
+        "salutation": "Herr", "gender": "m", "suffix": [], "particles": []}},
+    {"raw": "Karin de Jones", "solution": {
+        "given": "Karin", "family": "Jones", "middle": [], "title": [],
+        "salutation": "", "gender": "null", "suffix": [], "particles": ["de"]}},
+]
+
+PROGRAMS = [
+    "make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, EMPTY_STR, "
+    "get_last_string(tokens_to_stringlist(tokenize(raw_input))), EMPTY_STR_LIST, MALE, EMPTY_STR_LIST, EMPTY_STR_LIST)",
+    "set_confidence(make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, token_value(get_first_token(tokenize(raw_input))), "
+    "EMPTY_STR, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST), mul(0.25, 0.5))",
+]
+
+class TestDispatcher(unittest.TestCase):
+    def test_leaving_worker_hands_back_its_task(self):
+        dispatcher = Dispatcher(ctx=None)
+        outputs = []
+        mapper = threading.Thread(target=lambda: outputs.extend(dispatcher.map([("a",), ("b",)])))
+        mapper.start()
+
+        dispatcher.join("w1")
+        first = dispatcher.fetch("w1", timeout=5)
+        dispatcher.leave("w1") # Leaves without answering
+        dispatcher.join("w2")
+        tasks = [dispatcher.fetch("w2", timeout=5), dispatcher.fetch("w2", timeout=5)]
+        self.assertIn(first, tasks)
+        for task_id, _, args in tasks:
+            dispatcher.submit("w2", task_id, args[0].upper())
+        dispatcher.submit("w1", first[0], "late") # Duplicate answers are ignored
+        mapper.join(5)
+        self.assertEqual(outputs, ["A", "B"])
+
+    def test_stale_island_worker_is_reaped(self):
+        dispatcher = Dispatcher(ctx=None, stale_seconds=0.0)
+        dispatcher.join("w1", "island")
+        dispatcher.offer_island(2, "job")
+        self.assertTrue(dispatcher.island_alive(2)) # Offered, not claimed yet
+        self.assertEqual(dispatcher.claim_island("w1"), (2, "job"))
+        self.assertFalse(dispatcher.island_alive(2))
+        self.assertEqual(dispatcher.count("island"), 0)
+        dispatcher.close()
+        self.assertEqual(dispatcher.fetch("w1"), STOP)
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("10.0.0.5:6000"), ("10.0.0.5", 6000))
+        self.assertEqual(parse_address(":6000"), ("127.0.0.1", 6000)) # Loopback unless a host is given
+        self.assertEqual(parse_address("0.0.0.0:6000"), ("0.0.0.0", 6000))
+        self.assertEqual(parse_address("node1")[0], "node1")
+
+class TestClusterLocalhost(unittest.TestCase):
+    def setUp(self):
+        self.pset = create_pset()
+        self.ctx = compile_dataset(DATA * 20)
+        self.trees = [gp.PrimitiveTree.from_string(code, self.pset) for code in PROGRAMS] * 3
+        self.coordinator = Coordinator(self.ctx, ("127.0.0.1", 0), authkey="test")
+
+    def tearDown(self):
+        self.coordinator.close()
+
+    def test_remote_workers_match_local_pool(self):
+        workers = [multiprocessing.Process(target=run_eval_worker, args=(self.coordinator.address, "test")) for _ in range(2)]
+        for proc in workers:
+            proc.start()
+        gates = {"min_family": 0.5, "min_given": 0.5, "max_penalty": 1.0}
+        groups = [(self.trees, None, gates, True, None), (self.trees[:2], None, None, False, -1.0)]
+        try:
+            remote, stats = RemotePool(self.coordinator).evaluate_groups(groups)
+            local, _ = EvalPool(self.ctx, jobs=1).evaluate_groups(groups)
+            for (r_fit, r_metrics, r_aborted), (l_fit, l_metrics, l_aborted) in zip(remote, local):
+                np.testing.assert_array_equal(r_fit, l_fit)
+                self.assertEqual(r_aborted, l_aborted)
+            for r, l in zip(remote[0][1], local[0][1]):
+                np.testing.assert_array_equal(r, l)
+            self.assertEqual(sum(s["items"] for s in stats), 8)
+        finally:
+            self.coordinator.close()
+            for proc in workers:
+                proc.join(10)
+        self.assertEqual([proc.exitcode for proc in workers], [0, 0])
+
+    def test_authkey(self):
+        from multiprocessing import AuthenticationError
+        with self.assertRaises(AuthenticationError):
+            connect(self.coordinator.address, "wrong")
+        generated = [Coordinator(self.ctx, ("127.0.0.1", 0)) for _ in range(2)]
+        try:
+            self.assertGreaterEqual(len(generated[0].authkey), 32)
+            self.assertNotEqual(generated[0].authkey, generated[1].authkey)
+            connect(generated[0].address, generated[0].authkey).dispatcher()
+        finally:
+            for coordinator in generated:
+                coordinator.close()
+
+    def test_island_channels_over_tcp(self):
+        client = connect(self.coordinator.address, "test")
+        inbox = client.inbox(1)
+        self.assertEqual(drain(inbox), [])
+        inbox.put([("tree", None)])
+        inboxes, results, stop = self.coordinator.island_channels(3)
+        self.assertEqual(drain(inboxes[1]), [("tree", None)])
+
+        client.island_results().put(("done", 1))
+        self.assertEqual(results.get(timeout=5), ("done", 1))
+        stop.set()
+        self.assertTrue(client.island_stop().is_set())
+
+if __name__ == '__main__':
+    unittest.main()
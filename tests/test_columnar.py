@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from deap import gp
+from primitive_set import create_pset, NameObj
+from evaluator import compile_dataset, evaluate_metrics
+from semantic_cache import FAILED
+from tree_compiler import compile_tree
+from columnar import ColumnarInterpreter, COLUMNAR
+
+RAWS = ["Herr Dr. Hans Müller", "Müller, Karin", "Anna von der Heide", "", "Prof. Maria Schmidt-Meyer",
+        "J. R. R. Tolkien III", "MUELLER, HANS-PETER, Jr.", "Mrs. Jane Smith-Jones PhD", "de la Cruz, Juan Carlos"]
+DATA = [{"raw": raw, "solution": {"given": "Hans", "family": "Müller", "gender": "m"}} for raw in RAWS]
+
+# is_capitalized fails on EMPTY_TOKEN, i.e. on every entry without a salutation
+PARTIAL = ("set_confidence(make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, EMPTY_STR, EMPTY_STR, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST), "
+           "bool_to_float(is_capitalized(default_token_if_none(get_first_token(filter_by_type(tokenize(raw_input), SALUTATION)), EMPTY_TOKEN))))")
+PROGRAM = ("set_confidence(make_name_obj(raw_input, token_value(get_first_token(filter_by_type(tokenize(raw_input), SALUTATION))), "
+           "tokens_to_stringlist(filter_by_type(tokenize(raw_input), TITLE)), token_value(get_first_token(get_tokens_after_comma(tokenize(raw_input)))), "
+           "token_value(get_last_token(merge_particles(tokenize(raw_input)))), EMPTY_STR_LIST, get_gender_from_name(raw_input), "
+           "extract_suffix_list(tokenize(raw_input)), extract_particles_list(tokenize(raw_input))), "
+           "clamp_float(mul(bool_to_float(has_comma(raw_input)), 0.75), 0.1, float_max(0.5, bool_to_float(is_male(get_gender_from_name(raw_input))))))")
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.pset = create_pset()
+        self.ctx = compile_dataset(DATA)
+
+    def outcome(self, value):
+        return "FAILED" if value is FAILED else repr(value)
+
+    def compiled_outcomes(self, tree):
+        func = compile_tree(tree, self.pset)
+        out = []
+        for raw in RAWS:
+            try:
+                out.append(repr(func(raw)))
+            except Exception:
+                out.append("FAILED")
+        return out
+
+    def test_random_trees_agree_with_compiled(self):
+        random.seed(11)
+        interpreter = ColumnarInterpreter()
+        checked = 0
+        for _ in range(300):
+            tree = gp.PrimitiveTree(gp.genHalfAndHalf(self.pset, 2, 7))
+            if not interpreter.supports(tree, self.pset):
+                continue # Shared EMPTY_NAME_OBJ: evaluate_metrics runs these compiled
+            expected = self.compiled_outcomes(tree)
+            preds = interpreter.predict(tree, self.pset, self.ctx, strict=False)
+            self.assertEqual([self.outcome(p) for p in preds], expected, str(tree))
+            strict = interpreter.predict(tree, self.pset, self.ctx, strict=True)
+            if "FAILED" in expected:
+                self.assertIsNone(strict)
+            else:
+                self.assertEqual([repr(p) for p in strict], expected)
+            checked += 1
+        self.assertGreater(checked, 100)
+        self.assertGreater(interpreter.stats()["kernel_rate"], 0.5)
+        self.assertGreater(interpreter.stats()["indexed_calls"], 0)
+
+    def test_partial_failures_and_metrics(self):
+        tree = gp.PrimitiveTree.from_string(PARTIAL, self.pset)
+        preds = COLUMNAR.predict(tree, self.pset, self.ctx, strict=False)
+        self.assertEqual([p is FAILED for p in preds], [not raw.startswith(("Herr", "Mrs")) for raw in RAWS])
+        self.assertIsNone(COLUMNAR.predict(tree, self.pset, self.ctx))
+
+        for code in (PARTIAL, PROGRAM):
+            tree = gp.PrimitiveTree.from_string(code, self.pset)
+            for strict in (True, False):
+                plain = evaluate_metrics(tree, self.pset, self.ctx, strict=strict)
+                columnar = evaluate_metrics(tree, self.pset, self.ctx, strict=strict, columnar=True)
+                if plain is None:
+                    self.assertIsNone(columnar)
+                else:
+                    np.testing.assert_array_equal(plain, columnar)
+
+    def test_name_objects_are_per_entry(self):
+        tree = gp.PrimitiveTree.from_string(PROGRAM, self.pset)
+        preds = COLUMNAR.predict(tree, self.pset, self.ctx)
+        self.assertTrue(all(isinstance(p, NameObj) for p in preds))
+        self.assertEqual(len({id(p) for p in preds}), len(RAWS))
+        self.assertEqual([p.confidence for p in preds], [compile_tree(tree, self.pset)(raw).confidence for raw in RAWS])
+
+        shared = gp.PrimitiveTree.from_string("set_confidence(EMPTY_NAME_OBJ, bool_to_float(has_comma(raw_input)))", self.pset)
+        self.assertFalse(COLUMNAR.supports(shared, self.pset))
+
+if __name__ == '__main__':
+    unittest.main()
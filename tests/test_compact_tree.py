@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+import copy
+import pickle
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import base, creator, gp
+from primitive_set import create_pset
+from compact_tree import CompactTree, opcode_table, cx_one_point, mut_uniform, tree_key
+from tree_compiler import build_function, compile_tree
+from simplify import simplify_tree
+
+RAWS = ["Herr Dr. Hans Müller", "Müller, Karin", ""]
+
+def expr_mut(pset, type_):
+    return gp.genFull(pset, 0, 2, type_)
+
+class TestCompactTree(unittest.TestCase):
+    def setUp(self):
+        if not hasattr(creator, "FitnessMax"):
+            creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+        if not hasattr(creator, "Individual"):
+            creator.create("Individual", gp.PrimitiveTree, fitness=creator.FitnessMax)
+        self.pset = create_pset()
+        self.table = opcode_table(self.pset)
+
+    def test_roundtrip(self):
+        random.seed(3)
+        for _ in range(100):
+            tree = gp.PrimitiveTree(gp.genHalfAndHalf(self.pset, 1, 6))
+            compact = CompactTree(*self.table.encode(tree))
+            self.assertEqual(len(compact), len(tree))
+            self.assertEqual(self.table.height(compact), tree.height)
+            self.assertEqual(str(self.table.to_tree(compact)), str(tree))
+            # Ephemerals stay ephemerals (same class, name and value)
+            self.assertEqual([type(n) for n in self.table.to_nodes(compact)], [type(n) for n in tree])
+
+    def test_opcodes_do_not_depend_on_the_process(self):
+        other = opcode_table(create_pset())
+        self.assertEqual(other.signature, self.table.signature)
+        tree = gp.PrimitiveTree.from_string("slice_tokens(tokenize(raw_input), 1, 3)", self.pset)
+        self.assertEqual(other.encode(tree), self.table.encode(tree))
+        self.assertEqual(self.table.encode(tree)[1], (1, 3)) # Literal values live in the constant pool
+
+    def test_variation_matches_deap(self):
+        for seed in range(100):
+            random.seed(seed)
+            a = creator.Individual(gp.genHalfAndHalf(self.pset, 1, 6))
+            b = creator.Individual(gp.genHalfAndHalf(self.pset, 1, 6))
+            ca, cb = self.table.individual(a), self.table.individual(b)
+            state = random.getstate()
+            gp.cxOnePoint(a, b)
+            gp.mutUniform(a, expr=expr_mut, pset=self.pset)
+            random.setstate(state)
+            cx_one_point(ca, cb, self.table)
+            mut_uniform(ca, expr=expr_mut, pset=self.pset, table=self.table)
+            self.assertEqual((self.table.to_string(ca), self.table.to_string(cb)), (str(a), str(b)))
+
+    def test_clone_shares_tree_and_copies_fitness(self):
+        ind = self.table.individual(gp.genFull(self.pset, 2, 4))
+        ind.fitness.values = (0.5,) * len(ind.fitness.weights)
+        clone = copy.deepcopy(ind)
+        self.assertIs(clone.codes, ind.codes)
+        self.assertEqual(clone, ind)
+        del clone.fitness.values
+        self.assertTrue(ind.fitness.valid)
+
+        restored = pickle.loads(pickle.dumps(ind))
+        self.assertEqual((restored.key, restored.fitness.values), (ind.key, ind.fitness.values))
+        self.assertLess(len(pickle.dumps(ind.key)), len(pickle.dumps(self.table.to_individual(ind))))
+
+    def test_compile_and_simplify_compact_trees(self):
+        code = "make_name_obj(raw_input, trim(trim(raw_input)), EMPTY_STR_LIST, EMPTY_STR, EMPTY_STR, EMPTY_STR_LIST, MALE, EMPTY_STR_LIST, EMPTY_STR_LIST)"
+        tree = gp.PrimitiveTree.from_string(code, self.pset)
+        ind = self.table.individual(tree)
+        func = compile_tree(ind, self.pset)
+        self.assertIs(compile_tree(CompactTree(*ind.key), self.pset), func) # Cached under the opcodes
+        self.assertEqual(tree_key(ind), ind.key)
+
+        self.assertEqual(simplify_tree(ind, self.pset), 1)
+        expected = build_function(tree, self.pset)
+        for raw in RAWS:
+            self.assertEqual(repr(compile_tree(ind, self.pset)(raw)), repr(expected(raw)))
+
+if __name__ == '__main__':
+    unittest.main()
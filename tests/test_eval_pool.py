@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import pickle
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from deap import gp
+from primitive_set import create_pset
+from evaluator import compile_dataset, evaluate_individual, evaluate_metrics
+from eval_pool import EvalPool, encode_tree, balance_chunks
+from compact_tree import CompactTree, opcode_table
+
+DATA = [
+    {"raw": "Herr Dr. Hans Müller", "solution": {
+        "given": "Hans", "family": "Müller", "middle": [], "title": ["Dr."],
+        "salutation": "Herr", "gender": "m", "suffix": [], "particles": []}},
+    {"raw": "Karin de Jones", "solution": {
+        "given": "Karin", "family": "Jones", "middle": [], "title": [],
+        "salutation": "", "gender": "null", "suffix": [], "particles": ["de"]}},
+]
+
+PROGRAMS = [
+    "make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, EMPTY_STR, "
+    "get_last_string(tokens_to_stringlist(tokenize(raw_input))), EMPTY_STR_LIST, MALE, EMPTY_STR_LIST, EMPTY_STR_LIST)",
+    "set_confidence(make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, token_value(get_first_token(tokenize(raw_input))), "
+    "EMPTY_STR, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST), mul(0.25, 0.5))",
+]
+
+class TestEvalPool(unittest.TestCase):
+    def setUp(self):
+        self.pset = create_pset()
+        self.ctx = compile_dataset(DATA)
+        self.trees = [gp.PrimitiveTree.from_string(code, self.pset) for code in PROGRAMS]
+        self.gates = {"min_family": 0.5, "min_given": 0.5, "max_penalty": 1.0}
+
+    def check_pool(self, pool):
+        fitness, metrics, aborted, stats = pool.evaluate(self.trees, gates=self.gates, with_metrics=True)
+        for tree, fit, m in zip(self.trees, fitness, metrics):
+            self.assertAlmostEqual(fit, evaluate_individual(tree, self.pset, self.ctx, gates=self.gates)[0], places=6)
+            np.testing.assert_array_equal(m, evaluate_metrics(tree, self.pset, self.ctx))
+        self.assertIsNone(aborted)
+        # Opcode arrays travel instead of expression strings, with the same results
+        compact = [CompactTree(*opcode_table(self.pset).encode(tree)) for tree in self.trees]
+        np.testing.assert_array_equal(pool.evaluate(compact, gates=self.gates)[0], fitness)
+
+        fitness, metrics, aborted, stats = pool.evaluate(self.trees, gates=self.gates, threshold=-1.0, semantic=True)
+        self.assertEqual(aborted, [None, None])
+        self.assertIsNone(metrics)
+        self.assertTrue(all("hits" in s for s in stats))
+
+    def test_in_process(self):
+        pool = EvalPool(self.ctx, jobs=1)
+        self.check_pool(pool)
+        pool.close()
+
+    def test_worker_processes(self):
+        pool = EvalPool(self.ctx, jobs=2)
+        try:
+            self.check_pool(pool)
+        finally:
+            pool.terminate()
+
+    def test_groups_keep_their_parameters(self):
+        pool = EvalPool(self.ctx, jobs=1)
+        strict = {"min_family": 1.0, "min_given": 1.0, "max_penalty": 0.0}
+        results, stats = pool.evaluate_groups([
+            (self.trees, None, self.gates, True, None),
+            (self.trees[::-1], None, strict, False, -1.0),
+            ([], None, None, False, None),
+        ])
+        for k, tree in enumerate(self.trees):
+            self.assertAlmostEqual(results[0][0][k], evaluate_individual(tree, self.pset, self.ctx, gates=self.gates)[0], places=6)
+            self.assertAlmostEqual(results[1][0][k], evaluate_individual(self.trees[::-1][k], self.pset, self.ctx, gates=strict)[0], places=6)
+        self.assertEqual(len(results[0][1]), 2)
+        self.assertEqual(results[1][2], [None, None])
+        self.assertEqual(len(results[2][0]), 0)
+        self.assertEqual(sum(s["items"] for s in stats), 4)
+
+    def test_balance_chunks(self):
+        sizes = [50, 3, 3, 3, 40, 5, 30, 2, 2, 10]
+        chunks = balance_chunks(sizes, 3)
+        self.assertEqual(sorted(k for c in chunks for k in c), list(range(len(sizes))))
+        loads = [sum(sizes[k] for k in c) for c in chunks]
+        self.assertEqual(loads, sorted(loads, reverse=True))
+        self.assertLessEqual(max(loads) - min(loads), max(sizes))
+        self.assertEqual(len(balance_chunks([1, 1], 8)), 2)
+        self.assertEqual(balance_chunks([], 4), [])
+
+    def test_task_payload_excludes_dataset(self):
+        code = encode_tree(self.trees[0])
+        self.assertEqual(str(gp.PrimitiveTree.from_string(code, self.pset)), code)
+        big = compile_dataset(DATA * 200)
+        # Tasks only carry the encoded trees, never the context
+        self.assertLess(len(pickle.dumps(code)), len(pickle.dumps(self.ctx)))
+        self.assertGreater(len(pickle.dumps(big)), 100 * len(pickle.dumps(code)))
+
+if __name__ == '__main__':
+    unittest.main()
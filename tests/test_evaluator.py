@@ -0,0 +1,153 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from deap import gp
+from primitive_set import create_pset
+from evaluator import (
+    calculate_f1, compile_dataset, evaluate_individual, evaluate_metrics,
+    score_metrics, rescore_population, fitness_upper_bound, race_individual,
+    weight_vector, METRIC_COLUMNS, FIELD_BITS, OPT_MASK, COL_MAX, DEFAULT_WEIGHTS
+)
+
+DATA = [
+    {"raw": "Herr Dr. Hans Müller", "solution": {
+        "given": "Hans", "family": "Müller", "middle": [], "title": ["Dr."],
+        "salutation": "Herr", "gender": "m", "suffix": [], "particles": []}},
+    {"raw": "Karin de Jones", "solution": {
+        "given": "Karin", "family": "Jones", "middle": [], "title": [],
+        "salutation": "", "gender": "null", "suffix": [], "particles": ["de"]}},
+]
+
+class TestEvaluator(unittest.TestCase):
+    def test_calculate_f1(self):
+        self.assertEqual(calculate_f1("Hans", " hans "), 1.0)
+        self.assertEqual(calculate_f1([], ""), 1.0)
+        self.assertEqual(calculate_f1(["Dr.", "Prof."], ["Dr."]), 2 / 3)
+        self.assertEqual(calculate_f1("Hans", "Peter"), 0.0)
+
+    def test_compile_dataset(self):
+        ctx = compile_dataset(DATA)
+        self.assertEqual(len(ctx), 2)
+        self.assertEqual(ctx.valid_gender_count, 1)
+
+        first, second = ctx.entries
+        self.assertEqual(first.truth["title"], {"dr."})
+        self.assertTrue(first.gender_valid)
+        self.assertFalse(second.gender_valid)
+        self.assertEqual(second.present_mask & OPT_MASK, FIELD_BITS["particles"])
+        self.assertTrue(second.blank_mask & FIELD_BITS["salutation"])
+        self.assertFalse(second.blank_mask & FIELD_BITS["family"])
+
+        # Same data -> same fingerprint
+        self.assertEqual(ctx.fingerprint, compile_dataset(list(DATA)).fingerprint)
+
+    def test_context_and_raw_data_agree(self):
+        pset = create_pset()
+        expr = ("make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, EMPTY_STR, "
+                "get_last_string(tokens_to_stringlist(tokenize(raw_input))), EMPTY_STR_LIST, "
+                "MALE, EMPTY_STR_LIST, EMPTY_STR_LIST)")
+        tree = gp.PrimitiveTree.from_string(expr, pset)
+        ctx = compile_dataset(DATA)
+        self.assertAlmostEqual(
+            evaluate_individual(tree, pset, DATA)[0],
+            evaluate_individual(tree, pset, ctx)[0]
+        )
+
+    def test_metric_matrix_reweighting(self):
+        pset = create_pset()
+        ctx = compile_dataset(DATA)
+        expr = ("make_name_obj(raw_input, get_first_string(tokens_to_stringlist(filter_by_type(tokenize(raw_input), SALUTATION))), EMPTY_STR_LIST, "
+                "EMPTY_STR, EMPTY_STR, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, "
+                "extract_particles_list(tokenize(raw_input)))")
+        tree = gp.PrimitiveTree.from_string(expr, pset)
+
+        metrics = evaluate_metrics(tree, pset, ctx)
+        self.assertEqual(metrics.shape, (len(DATA), len(METRIC_COLUMNS)))
+
+        weights = {
+            "core_family": 0.1, "core_given": 0.1, "core_title": 0.3, "core_gender": 0.2,
+            "bonus_exact": 0.0, "bonus_coverage": 0.5, "bonus_uncertainty": 0.2,
+            "penalty_hallucination": 0.3, "penalty_vital": 0.05, "penalty_lazy": 0.2
+        }
+        gates = {"min_family": 0.5, "min_given": 0.5, "max_penalty": 1.0}
+        expected = evaluate_individual(tree, pset, ctx, weights, gates)[0]
+        self.assertAlmostEqual(score_metrics(metrics, weights, gates), expected, places=6)
+
+        # Population re-weighting without running the tree again
+        class Fitness:
+            valid = True
+            values = (0.0,)
+        class Ind:
+            pass
+        alive, dead = Ind(), Ind()
+        alive.fitness, alive.metrics = Fitness(), metrics
+        dead.fitness, dead.metrics = Fitness(), None
+        dead.fitness.values = (0.5,)
+        self.assertEqual(rescore_population([alive, dead], weights, gates), 2)
+        self.assertAlmostEqual(alive.fitness.values[0], expected, places=6)
+        self.assertEqual(dead.fitness.values, (0.0,))
+
+    def test_float32_metrics_tolerance(self):
+        pset = create_pset()
+        tree = gp.PrimitiveTree.from_string("make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, EMPTY_STR, EMPTY_STR, "
+                                            "EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST)", pset)
+        self.assertEqual(evaluate_metrics(tree, pset, DATA).dtype, np.float32)
+
+        # Rounding to float32 storage vs float64, on few rows (no averaging out)
+        bound = float(np.abs(weight_vector(DEFAULT_WEIGHTS)) @ COL_MAX) * 2 ** -24
+        rng = np.random.default_rng(4)
+        worst = 0.0
+        for _ in range(200):
+            exact = rng.random((3, len(METRIC_COLUMNS))) * COL_MAX
+            worst = max(worst, abs(score_metrics(exact.astype(np.float32)) - score_metrics(exact)))
+        self.assertLessEqual(worst, bound)
+        self.assertGreater(worst, 1e-9)
+
+    def test_dead_program_scores_zero(self):
+        pset = create_pset()
+        # is_capitalized("") raises IndexError -> runtime error kills the individual
+        expr = ("make_name_obj(raw_input, if_bool_string(is_capitalized(EMPTY_TOKEN), EMPTY_STR, EMPTY_STR), "
+                "EMPTY_STR_LIST, EMPTY_STR, EMPTY_STR, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST)")
+        tree = gp.PrimitiveTree.from_string(expr, pset)
+        self.assertIsNone(evaluate_metrics(tree, pset, DATA))
+        self.assertEqual(evaluate_individual(tree, pset, DATA), (0.0,))
+
+        # Non-strict mode keeps zero rows and drops them from the gender average
+        lenient = evaluate_metrics(tree, pset, DATA, strict=False)
+        self.assertEqual(float(lenient[:, 0].sum()), 0.0)
+        self.assertEqual(score_metrics(None), 0.0)
+
+    def test_racing_bound_and_abort(self):
+        pset = create_pset()
+        ctx = compile_dataset(DATA)
+        # Only the first entry has a salutation, so the second one is a total miss
+        expr = ("make_name_obj(raw_input, get_first_string(tokens_to_stringlist(filter_by_type(tokenize(raw_input), SALUTATION))), "
+                "EMPTY_STR_LIST, EMPTY_STR, raw_input, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST)")
+        tree = gp.PrimitiveTree.from_string(expr, pset)
+        metrics = evaluate_metrics(tree, pset, ctx)
+        gates = {"min_family": 0.5, "min_given": 0.5, "max_penalty": 1.0}
+        final = score_metrics(metrics, gates=gates)
+
+        # The bound never undercuts the real score and is exact once everything is seen
+        for seen in range(len(ctx) + 1):
+            self.assertGreaterEqual(fitness_upper_bound(metrics, seen, ctx, gates=gates), final - 1e-9)
+        self.assertAlmostEqual(fitness_upper_bound(metrics, len(ctx), ctx, gates=gates), final, places=6)
+
+        values, kept, aborted_at = race_individual(tree, pset, ctx, gates=gates, threshold=final - 1.0, with_metrics=True, batch_size=1)
+        self.assertIsNone(aborted_at)
+        self.assertAlmostEqual(values[0], final, places=6)
+        self.assertEqual(kept.shape, metrics.shape)
+
+        bound = fitness_upper_bound(metrics, 1, ctx, gates=gates)
+        values, kept, aborted_at = race_individual(tree, pset, ctx, gates=gates, threshold=bound + 0.01, batch_size=1)
+        self.assertEqual(aborted_at, 1)
+        self.assertIsNone(kept)
+        self.assertAlmostEqual(values[0], bound)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import csv
+import io
+import json
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import base, creator, gp
+from primitive_set import create_pset
+from champion_artifact import build_artifact, save_artifact, load_parser
+from evoname import main, LatencyHistogram, detect_format, read_records
+
+CODE = "make_name_obj(raw_input, token_value(get_first_token(tokenize(raw_input))), split_on_comma(raw_input), token_value(get_last_token(tokenize(raw_input))), EMPTY_STR, EMPTY_STR_LIST, get_gender_from_name(raw_input), EMPTY_STR_LIST, EMPTY_STR_LIST)"
+NAMES = ["Herr Dr. Hans Müller", "Müller, Karin", "Anna von der Heide", "", "Prof. Maria Schmidt-Meyer"] * 13
+
+class TestEvonameCli(unittest.TestCase):
+    def setUp(self):
+        if not hasattr(creator, "FitnessMax"):
+            creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+        self.dir = tempfile.TemporaryDirectory()
+        self.model = self.path("champion.json")
+        save_artifact(self.model, build_artifact(gp.PrimitiveTree.from_string(CODE, create_pset())))
+        self.parse = load_parser(self.model)
+
+        with open(self.path("names.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "name"])
+            writer.writerows(enumerate(NAMES))
+        with open(self.path("names.jsonl"), "w", encoding="utf-8") as f:
+            for i, name in enumerate(NAMES):
+                f.write(json.dumps({"raw": name, "key": i}) + "\n")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def run_cli(self, *args):
+        main(["parse", "--model", self.model, "--output", self.path("out.jsonl"), "--chunk-size", "4", *args])
+        with open(self.path("out.jsonl"), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def expected(self, name):
+        return json.loads(json.dumps(self.parse(name).to_json()))
+
+    def test_csv_in_process_and_ordered_pool(self):
+        for jobs in ("1", "2"):
+            rows = self.run_cli("--input", self.path("names.csv"), "--field", "name", "--id-field", "id", "--jobs", jobs)
+            self.assertEqual([row["id"] for row in rows], [str(i) for i in range(len(NAMES))])
+            self.assertEqual([{k: v for k, v in row.items() if k != "id"} for row in rows], [self.expected(n) for n in NAMES])
+
+    def test_jsonl_unordered_keeps_every_record(self):
+        rows = self.run_cli("--input", self.path("names.jsonl"), "--id-field", "key", "--jobs", "2", "--unordered", "--max-pending", "2")
+        self.assertEqual(sorted(row["id"] for row in rows), list(range(len(NAMES))))
+        for row in rows:
+            self.assertEqual(row["solution"], self.expected(NAMES[row["id"]])["solution"])
+
+    def test_input_errors(self):
+        self.assertEqual(detect_format("-"), "txt")
+        with self.assertRaises(ValueError):
+            detect_format(self.path("names.xlsx"))
+
+        stream = io.StringIO('{"raw": "Anna"}\n\n["Hans"]\n')
+        with self.assertRaisesRegex(ValueError, "line 3 is a list"):
+            list(read_records(stream, "jsonl"))
+        with self.assertRaisesRegex(ValueError, "line 2 is not valid JSON"):
+            list(read_records(io.StringIO('{"raw": "Anna"}\n{"raw": \n'), "jsonl"))
+
+        with open(self.path("bad.jsonl"), "w", encoding="utf-8") as f:
+            f.write('{"raw": "Anna"}\n"Hans"\n')
+        with self.assertRaises(SystemExit) as exit:
+            self.run_cli("--input", self.path("bad.jsonl"), "--jobs", "1")
+        self.assertEqual(exit.exception.code, 2)
+
+    def test_bad_model_fails_before_the_pool(self):
+        with open(self.path("names.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(NAMES))
+        with open(self.path("other.json"), "w", encoding="utf-8") as f:
+            json.dump({"expr": "raw_input"}, f)
+        for model in (self.path("missing.json"), self.path("other.json")):
+            with self.assertRaises(SystemExit) as exit:
+                main(["parse", "--model", model, "--input", self.path("names.txt"), "--output", self.path("out.jsonl"), "--jobs", "2"])
+            self.assertEqual(exit.exception.code, 2)
+        self.assertFalse(os.path.exists(self.path("out.jsonl")))
+
+    def test_latency_percentiles(self):
+        histogram = LatencyHistogram()
+        for us in [1] * 90 + [100] * 9 + [5000]:
+            histogram.add(us / 1e6)
+        self.assertEqual(histogram.percentile(0.5), 2e-6)
+        self.assertEqual(histogram.percentile(0.95), 128e-6)
+        self.assertEqual(histogram.percentile(1.0), 8192e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import subprocess
+
+# Add parent directory to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from deap import gp
+from primitive_set import create_pset
+from champion_artifact import build_artifact, save_artifact, load_parser
+from evoname_runtime import IMPORT_BUDGET_MS, MODEL_ENV
+
+# Wall-clock import budget: only on a quiet machine (EVONAME_TIMING_TESTS=1)
+TIMING_ENV = "EVONAME_TIMING_TESTS"
+
+CODE = "make_name_obj(raw_input, token_value(get_first_token(tokenize(raw_input))), split_on_comma(raw_input), token_value(get_last_token(tokenize(raw_input))), EMPTY_STR, EMPTY_STR_LIST, get_gender_from_name(raw_input), EMPTY_STR_LIST, EMPTY_STR_LIST)"
+# Training-only dependencies and modules the runtime loads on first use at the earliest
+HEAVY = ["deap", "numpy", "yaml", "rich", "flask", "config", "evolution", "multiprocessing", "hashlib", "datetime"]
+
+SCRIPT = f"""
+import sys, json
+import evoname_runtime
+loaded = [name for name in {HEAVY!r} if name in sys.modules]
+print(json.dumps({{"loaded": loaded, "parsed": repr(evoname_runtime.parse("Frau Dr. Anna Schmidt"))}}))
+"""
+
+class TestEvonameRuntime(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.model = os.path.join(self.dir.name, "champion.json")
+        save_artifact(self.model, build_artifact(gp.PrimitiveTree.from_string(CODE, create_pset())))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def run_script(self):
+        # Runs outside the repo: no config.yaml or regex_definitions.json in the working directory
+        env = dict(os.environ, PYTHONPATH=ROOT, **{MODEL_ENV: self.model})
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", SCRIPT],
+                                cwd=self.dir.name, env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result
+
+    def test_lean_import_from_any_directory(self):
+        out = json.loads(self.run_script().stdout)
+        self.assertEqual(out["loaded"], [])
+        self.assertEqual(out["parsed"], repr(load_parser(self.model)("Frau Dr. Anna Schmidt")))
+
+    @unittest.skipUnless(os.environ.get(TIMING_ENV), f"set {TIMING_ENV}=1 to check the import time")
+    def test_import_budget(self):
+        result = self.run_script()
+        line = next(line for line in result.stderr.splitlines() if line.rstrip().endswith("| evoname_runtime"))
+        import_ms = int(line.split("|")[1]) / 1000
+        self.assertLess(import_ms, IMPORT_BUDGET_MS, f"import evoname_runtime took {import_ms:.1f}ms")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from primitive_set import (
+    RegexToken, tokenize, filter_by_type, remove_type, filter_by_shape,
+    get_tokens_before_comma, get_tokens_after_comma
+)
+from evaluator import compile_dataset
+from feature_index import FeatureIndex, TYPES, index_for
+
+RAWS = ["Herr Dr. Hans Müller", "Müller, Karin", "", "Anna von der Heide", "Schmidt, Dr. Maria, PhD",
+        "J. R. R. Tolkien III", "Müller, Karin", "MUELLER , HANS-PETER"]
+
+class TestFeatureIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FeatureIndex(RAWS)
+
+    def test_flat_arrays_match_tokenize(self):
+        index = self.index
+        self.assertEqual(len(index.flat), int(index.offsets[-1]))
+        for i, raw in enumerate(RAWS):
+            tokens = tokenize(raw)
+            self.assertEqual(index.tokens[i], tokens)
+            a, b = int(index.offsets[i]), int(index.offsets[i + 1])
+            self.assertEqual([TYPES[c] for c in index.types[a:b]], [t.type for t in tokens])
+            self.assertEqual([index.shape_names[s] for s in index.shapes[a:b]], [t.shape for t in tokens])
+            self.assertEqual([t.lexicon for t in index.tokens[i]], [t.lexicon for t in tokens])
+            self.assertEqual(len(get_tokens_before_comma(tokens)) if index.commas[i] >= 0 else -1, index.commas[i])
+        self.assertIs(index.tokens[1], index.tokens[6]) # Duplicate raws are scanned once
+
+    def test_derived_columns_match_primitives(self):
+        index = self.index
+        for type_ in RegexToken:
+            self.assertEqual(index.by_type(type_), [filter_by_type(tokenize(raw), type_) for raw in RAWS])
+            self.assertEqual(index.by_type(type_, keep=False), [remove_type(tokenize(raw), type_) for raw in RAWS])
+        for shape in ("Xxxxx", "Xx.", "X.", "XXXXXXX", "unknown"):
+            self.assertEqual(index.by_shape(shape), [filter_by_shape(tokenize(raw), shape) for raw in RAWS])
+        self.assertEqual(index.before_comma(), [get_tokens_before_comma(tokenize(raw)) for raw in RAWS])
+        self.assertEqual(index.after_comma(), [get_tokens_after_comma(tokenize(raw)) for raw in RAWS])
+
+        # Built once per dataset
+        misses = index.misses
+        self.assertIs(index.by_type(RegexToken.TITLE), index.by_type(RegexToken.TITLE))
+        self.assertEqual(index.misses, misses)
+        self.assertGreater(index.stats()["hit_rate"], 0.0)
+
+    def test_one_index_per_dataset(self):
+        ctx = compile_dataset([{"raw": raw, "solution": {}} for raw in RAWS])
+        self.assertIs(index_for(ctx), index_for(compile_dataset([{"raw": raw, "solution": {}} for raw in RAWS])))
+        self.assertIsNot(index_for(ctx), index_for(ctx, locale="en"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from fitness_cache import FitnessCache
+
+class TestFitnessCache(unittest.TestCase):
+    def test_key_is_canonical(self):
+        a = FitnessCache.make_key("f(x)", "abc", {"a": 1.0, "b": 2.0}, None)
+        b = FitnessCache.make_key("f(x)", "abc", {"b": 2.0, "a": 1.0}, {})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, FitnessCache.make_key("f(x)", "other", {"a": 1.0, "b": 2.0}))
+
+    def test_lru_eviction_and_counters(self):
+        cache = FitnessCache(maxsize=2)
+        cache.put("a", (0.1,))
+        cache.put("b", (0.2,))
+        self.assertEqual(cache.get("a"), ((0.1,), None))  # "a" becomes most recent
+        cache.put("c", (0.3,))
+        self.assertIsNone(cache.get("b"))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 1, 1))
+        cache.start_generation()
+        self.assertEqual(cache.stats()["gen_lookups"], 0)
+
+    def test_metrics_entries(self):
+        metrics = np.zeros((10, 4), dtype=np.float32)
+        cache = FitnessCache(maxsize=10, max_bytes=metrics.nbytes)
+        cache.put("plain", (0.5,))
+        self.assertIsNone(cache.get("plain", need_metrics=True))
+
+        cache.put("m1", (0.1,), metrics, has_metrics=True)
+        self.assertIs(cache.get("m1", need_metrics=True)[1], metrics)
+        cache.put("m2", (0.2,), metrics.copy(), has_metrics=True)  # byte budget evicts the oldest
+        self.assertIsNone(cache.get("m1"))
+        self.assertEqual(cache.bytes, metrics.nbytes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+import urllib.request
+from unittest import mock
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import gp
+from primitive_set import create_pset
+from champion_artifact import build_artifact, save_artifact, load_parser
+from inference_server import InferenceService, make_server
+
+CODE = "make_name_obj(raw_input, token_value(get_first_token(tokenize(trim(trim(raw_input))))), split_on_comma(raw_input), token_value(get_last_token(tokenize(raw_input))), EMPTY_STR, EMPTY_STR_LIST, get_gender_from_name(raw_input), EMPTY_STR_LIST, EMPTY_STR_LIST)"
+NAMES = ["Herr Dr. Hans Müller", "Müller, Karin", "Anna von der Heide", "", "Prof. Maria Schmidt-Meyer"]
+
+class TestInferenceServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        model = os.path.join(cls.dir.name, "champion.json")
+        save_artifact(model, build_artifact(gp.PrimitiveTree.from_string(CODE, create_pset())))
+        cls.model = model
+        cls.parse = staticmethod(load_parser(model))
+        cls.service = InferenceService(model, workers=2, fanout_min=2)
+        cls.server = make_server(cls.service, port=0)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+        cls.dir.cleanup()
+
+    def request(self, path, payload=None, url=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        with urllib.request.urlopen(urllib.request.Request((url or self.url) + path, data=data)) as response:
+            return json.loads(response.read())
+
+    def expected(self, name):
+        return json.loads(json.dumps(self.parse(name).to_json()))
+
+    def test_single_batch_and_metrics(self):
+        self.assertNotIn("trim(trim(", self.service.artifact["expr"]) # Simplified at start-up
+        for name in NAMES:
+            self.assertEqual(self.request("/parse", {"raw": name}), self.expected(name))
+        self.assertEqual(self.request("/parse?raw=" + urllib.request.quote(NAMES[0])), self.expected(NAMES[0]))
+
+        batch = NAMES + [f"Dr. Jan Nummer{i}" for i in range(10)] + NAMES
+        results = self.request("/parse/batch", {"raws": batch})["results"]
+        self.assertEqual(results, [self.expected(name) for name in batch])
+
+        metrics = self.request("/metrics")
+        self.assertEqual(metrics["requests"]["parse"], len(NAMES) + 1)
+        self.assertEqual(metrics["requests"]["fanned_out"], 10) # Only the new names, once
+        self.assertGreaterEqual(metrics["cache"]["hits"], len(NAMES) * 2 + 1)
+        self.assertEqual(metrics["latency"]["batch"]["count"], 1)
+
+    def test_bad_requests(self):
+        for path, payload in [("/parse", {"name": "x"}), ("/parse/batch", {"raws": "x"}), ("/nothing", {})]:
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                self.request(path, payload)
+            self.assertIn(ctx.exception.code, (400, 404))
+
+    def test_limits_and_pool_failures(self):
+        # Own service and server: the metrics of the shared one are checked above
+        service = InferenceService(self.model, workers=2, fanout_min=2)
+        server = make_server(service, port=0, max_body=2048, max_batch=50)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(service.close)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def status(path, payload):
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                self.request(path, payload, url)
+            return ctx.exception.code, json.loads(ctx.exception.read())
+
+        self.assertEqual(status("/parse/batch", {"raws": ["Anna"] * 51})[0], 400)
+        self.assertEqual(status("/parse", {"raw": "x" * 4096})[0], 413)
+        self.assertEqual(len(self.request("/parse/batch", {"raws": ["Anna"] * 50}, url)["results"]), 50)
+
+        batch = {"raws": ["Dr. Eva Fehler", "Jan Fehler"]}
+        with mock.patch.object(service.pool, "map", side_effect=RuntimeError("worker lost")):
+            self.assertEqual(status("/parse/batch", batch), (500, {"error": "RuntimeError: worker lost"}))
+        self.assertEqual(self.request("/parse/batch", batch, url)["results"], [self.expected(name) for name in batch["raws"]])
+
+if __name__ == '__main__':
+    unittest.main()
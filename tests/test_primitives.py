@@ -1,6 +1,11 @@
+import sys
+import json
+import threading
+from collections import OrderedDict
 import pytest
 from primitive_set import (
-    tokenize, load_regex_definitions, RegexToken, Token, 
+    tokenize, load_regex_definitions, RegexToken, Token, TOKEN_PRIORITY,
+    TokenCache, FrozenTokenList, scan_tokens, merge_particles,
     get_gender_from_salutation, Gender, make_name_obj
 )
 
@@ -91,3 +96,109 @@ def test_make_name_obj():
     assert json_out["solution"]["title"] == ["Dr"]
     assert json_out["solution"]["salutation"] == "Herr"
     assert json_out["solution"]["gender"] == "m"
+
+def _tokenize_reference(s, locale):
+    # Legacy per-pattern scan, kept here to pin the master-regex engine to it
+    patterns = load_regex_definitions(locale=locale)
+    tokens = []
+    pos = 0
+    while pos < len(s):
+        if s[pos].isspace():
+            pos += 1
+            continue
+        for token_type in TOKEN_PRIORITY:
+            if token_type not in patterns:
+                continue
+            match = patterns[token_type].match(s, pos)
+            if match:
+                tokens.append(Token(match.group(0), token_type, match.span(), len(tokens)))
+                pos = match.end()
+                break
+        else:
+            pos += 1
+    return tokens
+
+def test_tokenize_matches_reference_scan():
+    with open("data/train.json", "r", encoding="utf-8") as f:
+        raws = [entry["raw"] for entry in json.load(f)]
+    raws += ["", "   ", "Doe,John", "Mr.&Mrs. O'Neil", "d'Artagnan, Jr.", "#?! Hans\tvon  der Heide III."]
+
+    for locale in ["de", "en", "fr"]:
+        for raw in raws:
+            assert list(tokenize(raw, locale=locale)) == _tokenize_reference(raw, locale)
+
+def test_token_cache_lru_and_counters():
+    cache = TokenCache(maxsize=2)
+    tokens = FrozenTokenList(scan_tokens("Hans Müller"))
+    assert cache.get(("Hans Müller", "de")) is None
+    cache.put(("Hans Müller", "de"), tokens)
+    cache.put(("Anna Schmidt", "de"), FrozenTokenList(scan_tokens("Anna Schmidt")))
+    assert cache.get(("Hans Müller", "de")) is tokens  # refreshes LRU position
+    cache.put(("Max Weber", "de"), FrozenTokenList(scan_tokens("Max Weber")))
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert cache.get(("Anna Schmidt", "de")) is None
+
+def test_token_cache_is_thread_safe():
+    # The inference server tokenizes on its request threads: a put() from another
+    # thread must not evict a key between get()'s lookup and its LRU refresh
+    cache = TokenCache(maxsize=1)
+    tokens = FrozenTokenList(scan_tokens("Hans Müller"))
+    cache.put(("Hans Müller", "de"), tokens)
+    evictor = threading.Thread(target=cache.put, args=(("Anna Schmidt", "de"), tokens))
+
+    class Entries(OrderedDict):
+        def get(self, key, default=None):
+            value = super().get(key, default)
+            if evictor.ident is None: # Only on the first lookup
+                evictor.start()
+                evictor.join(0.2) # Blocks on the cache lock until get() is done
+            return value
+
+    cache.entries = Entries(cache.entries)
+    assert cache.get(("Hans Müller", "de")) is tokens
+    evictor.join()
+    assert list(cache.entries) == [("Anna Schmidt", "de")]
+
+    # Many threads hitting and evicting at once
+    cache = TokenCache(maxsize=16)
+    keys = [(f"Name {i}", "de") for i in range(64)]
+    tokens = FrozenTokenList(scan_tokens("Hans Müller"))
+    errors = []
+
+    def worker(offset):
+        try:
+            for n in range(3000):
+                key = keys[(offset + n * 7) % len(keys)]
+                if cache.get(key) is None:
+                    cache.put(key, tokens)
+        except Exception as e:
+            errors.append(e)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 3000
+    assert stats["size"] == 16
+
+def test_tokenize_returns_shared_frozen_tokens():
+    first = tokenize("Johann von Goethe jun.", locale="de")
+    assert tokenize("Johann von Goethe jun.", locale="de") is first
+    with pytest.raises(TypeError):
+        first.append(first[0])
+
+    merged = merge_particles(first)
+    assert [t.index for t in merged] == [0, 1, 2]
+    # The cached tokens keep their original indices
+    assert [t.index for t in tokenize("Johann von Goethe jun.", locale="de")] == [0, 1, 2, 3]
@@ -1,14 +1,16 @@
 import unittest
 import sys
 import os
+import pickle
 
 # Add parent directory to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from primitive_set import (
-    Token, RegexToken, 
+    Token, RegexToken, NameObj,
     token_length, is_initial, has_hyphen, has_period, 
-    is_roman_numeral, is_particle, is_suffix
+    is_roman_numeral, is_particle, is_suffix,
+    get_token_shape, is_common_given_name, is_common_family_name
 )
 
 class TestPrimitivesStats(unittest.TestCase):
@@ -63,5 +65,30 @@ class TestPrimitivesStats(unittest.TestCase):
         self.assertTrue(is_suffix(t1))
         self.assertFalse(is_suffix(t2))
 
+    def test_cached_token_features(self):
+        t = Token("McDonald", RegexToken.WORD, (0, 8), 2)
+        self.assertEqual(get_token_shape(t), "XxXxxxxx")
+        self.assertEqual((t.shape, t.lower), ("XxXxxxxx", "mcdonald"))
+        self.assertFalse(is_common_family_name(t))
+        self.assertTrue(is_common_given_name(Token("John", RegexToken.WORD, (0, 4))))
+        self.assertTrue(is_common_family_name(Token("MÜLLER", RegexToken.WORD, (0, 6))))
+
+        # Caches are not part of equality, hashing or pickles
+        fresh = Token("McDonald", RegexToken.WORD, (0, 8), 2)
+        self.assertEqual(t, fresh)
+        self.assertEqual(hash(t), hash(fresh))
+        self.assertEqual(pickle.dumps(t), pickle.dumps(fresh))
+        self.assertEqual(pickle.loads(pickle.dumps(t)).shape, "XxXxxxxx")
+
+    def test_slotted_types(self):
+        t = Token("Hans", RegexToken.WORD, (0, 4))
+        self.assertFalse(hasattr(t, "__dict__"))
+        with self.assertRaises(AttributeError):
+            t.value = "Peter"
+        obj = NameObj("Hans Müller", given="Hans")
+        self.assertFalse(hasattr(obj, "__dict__"))
+        obj.family = "Müller"
+        self.assertEqual(pickle.loads(pickle.dumps(obj)), obj)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import gp
+from primitive_set import create_pset
+from post_processor import repair_name_object
+from py_exporter import export_module, load_module
+
+RAWS = ["Herr Dr. Hans Müller", "Müller, Karin", "Anna von der Heide", "", "Prof. Maria Schmidt-Meyer", "J. R. R. Tolkien III"]
+CODE = ("make_name_obj(raw_input, token_value(get_first_token(filter_by_type(tokenize(raw_input), SALUTATION))), split_on_comma(raw_input), "
+        "token_value(get_first_token(remove_type(tokenize(raw_input), SALUTATION))), "
+        "if_bool_string(has_comma(EMPTY_STR), token_value(get_last_token(tokenize(raw_input))), trim(token_value(get_last_token(tokenize(raw_input))))), "
+        "EMPTY_STR_LIST, get_gender_from_salutation(get_first_token(filter_by_type(tokenize(raw_input), SALUTATION))), EMPTY_STR_LIST, EMPTY_STR_LIST)")
+
+class TestPyExporter(unittest.TestCase):
+    def setUp(self):
+        self.pset = create_pset()
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def export(self, tree, name="parser"):
+        path = os.path.join(self.dir.name, f"{name}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(export_module(tree, self.pset))
+        with open(path, encoding="utf-8") as f:
+            return load_module(path), f.read()
+
+    def outcome(self, func, raw):
+        try:
+            return repr(func(raw))
+        except Exception as e:
+            return type(e).__name__
+
+    def test_module_matches_gp_compile(self):
+        tree = gp.PrimitiveTree.from_string(CODE, self.pset)
+        module, source = self.export(tree)
+        compiled = gp.compile(tree, self.pset)
+        for raw in RAWS:
+            self.assertEqual(repr(module.champion(raw)), repr(compiled(raw)))
+            self.assertEqual(repr(module.parse(raw)), repr(repair_name_object(compiled(raw))))
+
+        # One tokenize call and one salutation filter, the constant if_bool_string is gone
+        self.assertEqual(source.count("tokenize(raw_input)"), 1)
+        self.assertEqual(source.count("filter_by_type("), 1)
+        self.assertNotIn("has_comma", source)
+        self.assertNotIn("if_bool_string", source)
+        # Inlined primitives are not imported
+        imports = next(line for line in source.splitlines() if line.startswith("from primitive_set import"))
+        self.assertNotIn("token_value", imports)
+        self.assertIn("get_gender_from_salutation", imports)
+
+    def test_random_trees_agree(self):
+        random.seed(7)
+        for k in range(40):
+            tree = gp.PrimitiveTree(gp.genHalfAndHalf(self.pset, 2, 6))
+            module, _ = self.export(tree, f"random_{k}")
+            compiled = gp.compile(tree, self.pset)
+            for raw in RAWS:
+                self.assertEqual(self.outcome(module.champion, raw), self.outcome(compiled, raw), str(tree))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from deap import gp
+from primitive_set import create_pset, NameObj
+from evaluator import compile_dataset, evaluate_metrics
+from semantic_cache import SubtreeCache, SUBTREE_CACHE, FAILED, SEMANTIC_CACHE_BYTES, configure
+
+DATA = [
+    {"raw": "Herr Dr. Hans Müller", "solution": {
+        "given": "Hans", "family": "Müller", "middle": [], "title": ["Dr."],
+        "salutation": "Herr", "gender": "m", "suffix": [], "particles": []}},
+    {"raw": "Müller, Karin", "solution": {
+        "given": "Karin", "family": "Müller", "middle": [], "title": [],
+        "salutation": "", "gender": "f", "suffix": [], "particles": []}},
+]
+
+PROGRAMS = [
+    "make_name_obj(raw_input, get_first_string(tokens_to_stringlist(filter_by_type(tokenize(raw_input), SALUTATION))), "
+    "tokens_to_stringlist(filter_by_type(tokenize(raw_input), TITLE)), token_value(get_first_token(get_tokens_after_comma(tokenize(raw_input)))), "
+    "token_value(get_last_token(merge_particles(tokenize(raw_input)))), EMPTY_STR_LIST, get_gender_from_name(raw_input), EMPTY_STR_LIST, EMPTY_STR_LIST)",
+    "set_confidence(make_name_obj(raw_input, EMPTY_STR, EMPTY_STR_LIST, EMPTY_STR, EMPTY_STR, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST), "
+    "bool_to_float(is_capitalized(EMPTY_TOKEN)))",
+]
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.pset = create_pset()
+        self.ctx = compile_dataset(DATA)
+        configure(SEMANTIC_CACHE_BYTES)
+
+    def test_matches_compiled_evaluation(self):
+        for code in PROGRAMS:
+            tree = gp.PrimitiveTree.from_string(code, self.pset)
+            for strict in (True, False):
+                plain = evaluate_metrics(tree, self.pset, self.ctx, strict=strict)
+                cached = evaluate_metrics(tree, self.pset, self.ctx, strict=strict, semantic=True)
+                if plain is None:
+                    self.assertIsNone(cached)
+                else:
+                    np.testing.assert_array_equal(plain, cached)
+
+    def test_shared_subtrees_and_name_objects(self):
+        tree = gp.PrimitiveTree.from_string(PROGRAMS[0], self.pset)
+        first = SUBTREE_CACHE.predict(tree, self.pset, self.ctx)
+        hits = SUBTREE_CACHE.hits
+        second = SUBTREE_CACHE.predict(tree, self.pset, self.ctx)
+
+        self.assertGreater(SUBTREE_CACHE.hits, hits)
+        self.assertIsInstance(second[0], NameObj)
+        self.assertIsNot(first[0], second[0]) # NameObj outputs are rebuilt, never shared
+        self.assertFalse(any(key[1].startswith("make_name_obj") for key in SUBTREE_CACHE.entries))
+
+    def test_failures_and_eviction(self):
+        tree = gp.PrimitiveTree.from_string(PROGRAMS[1], self.pset)
+        self.assertIsNone(SUBTREE_CACHE.predict(tree, self.pset, self.ctx))
+        self.assertEqual(SUBTREE_CACHE.predict(tree, self.pset, self.ctx, strict=False), [FAILED, FAILED])
+
+        cache = SubtreeCache(max_bytes=1000)
+        for code in PROGRAMS:
+            cache.predict(gp.PrimitiveTree.from_string(code, self.pset), self.pset, self.ctx, strict=False)
+        self.assertLessEqual(cache.bytes, 1000)
+        self.assertGreater(cache.evictions, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import gp
+from primitive_set import create_pset
+from simplify import simplify_tree
+from tree_compiler import build_function
+
+RAWS = ["Herr Dr. Hans Müller", "Müller, Karin", "Johann von Goethe jun.", ""]
+
+class TestSimplify(unittest.TestCase):
+    def setUp(self):
+        self.pset = create_pset()
+
+    def simplified(self, code):
+        tree = gp.PrimitiveTree.from_string(code, self.pset)
+        original = build_function(tree, self.pset)
+        simplify_tree(tree, self.pset)
+        # Still a valid typed tree that computes the same thing
+        self.assertEqual(str(gp.PrimitiveTree.from_string(str(tree), self.pset)), str(tree))
+        func = build_function(tree, self.pset)
+        for raw in RAWS:
+            self.assertEqual(repr(func(raw)), repr(original(raw)))
+        return str(tree)
+
+    def test_constant_folding(self):
+        self.assertEqual(self.simplified("if_bool_tokenlist(has_comma(EMPTY_STR), slice_tokens(EMPTY_TOK_LIST, 1, 2), tokenize(raw_input))"), "tokenize(raw_input)")
+        self.assertEqual(self.simplified("token_value(get_next_token(EMPTY_TOK_LIST, EMPTY_TOKEN))"), "EMPTY_STR")
+        self.assertEqual(self.simplified("clamp_float(0.96, 0.89, float_max(0.48, 0.83))"), "0.83")
+        self.assertEqual(self.simplified("drop_first(EMPTY_TOK_LIST)"), "EMPTY_TOK_LIST")
+        # None is not representable as a terminal -> kept
+        self.assertEqual(self.simplified("get_next_token(EMPTY_TOK_LIST, EMPTY_TOKEN)"), "get_next_token(EMPTY_TOK_LIST, EMPTY_TOKEN)")
+
+    def test_identities(self):
+        self.assertEqual(self.simplified("get_remainder_tokens(tokenize(raw_input), drop_last(EMPTY_TOK_LIST))"), "tokenize(raw_input)")
+        self.assertEqual(self.simplified("trim(trim(default_str_if_empty(raw_input, EMPTY_STR)))"), "trim(raw_input)")
+        self.assertEqual(
+            self.simplified("default_token_if_none(get_first_token(EMPTY_TOK_LIST), get_last_token(tokenize(raw_input)))"),
+            "get_last_token(tokenize(raw_input))")
+
+    def test_errors_and_name_objects_untouched(self):
+        code = "make_name_obj(raw_input, if_bool_string(is_capitalized(EMPTY_TOKEN), EMPTY_STR, EMPTY_STR), EMPTY_STR_LIST, EMPTY_STR, EMPTY_STR, EMPTY_STR_LIST, UNKNOWN, EMPTY_STR_LIST, EMPTY_STR_LIST)"
+        tree = gp.PrimitiveTree.from_string(code, self.pset)
+        self.assertEqual(simplify_tree(tree, self.pset), 0)
+        code = "set_confidence(EMPTY_NAME_OBJ, float_min(0.2, 0.5))"
+        tree = gp.PrimitiveTree.from_string(code, self.pset)
+        self.assertEqual(simplify_tree(tree, self.pset), 2)
+        self.assertEqual(str(tree), "set_confidence(EMPTY_NAME_OBJ, 0.2)")
+
+if __name__ == '__main__':
+    unittest.main()
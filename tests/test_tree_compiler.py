@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import gp
+from primitive_set import create_pset
+from tree_compiler import build_function, CompileCache
+
+RAWS = ["Herr Dr. Hans Müller", "Müller, Karin", "Johann von Goethe jun.", ""]
+
+def outcome(func, raw):
+    try:
+        return repr(func(raw))
+    except Exception as e:
+        return type(e).__name__
+
+class TestTreeCompiler(unittest.TestCase):
+    def setUp(self):
+        self.pset = create_pset()
+
+    def test_matches_gp_compile(self):
+        random.seed(7)
+        for _ in range(50):
+            tree = gp.PrimitiveTree(gp.genHalfAndHalf(self.pset, 1, 5))
+            expected = gp.compile(tree, self.pset)
+            func = build_function(tree, self.pset)
+            for raw in RAWS:
+                self.assertEqual(outcome(func, raw), outcome(expected, raw))
+
+    def test_deep_tree_without_parser_limits(self):
+        code = "trim(" * 300 + "raw_input" + ")" * 300
+        tree = gp.PrimitiveTree.from_string(code, self.pset)
+        self.assertEqual(build_function(tree, self.pset)("  Hans "), "Hans")
+
+    def test_cache_reuse_and_eviction(self):
+        cache = CompileCache(maxsize=2)
+        trees = [gp.PrimitiveTree.from_string(code, self.pset) for code in ("trim(raw_input)", "to_lower(raw_input)", "trim(to_lower(raw_input))")]
+        first = cache.compile(trees[0], self.pset)
+        self.assertIs(cache.compile(gp.PrimitiveTree.from_string("trim(raw_input)", self.pset), self.pset), first)
+        cache.compile(trees[1], self.pset)
+        cache.compile(trees[2], self.pset)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["size"]), (1, 3, 1, 2))
+        self.assertGreater(stats["seconds"], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
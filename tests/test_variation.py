@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deap import base, creator, gp, tools
+from primitive_set import create_pset
+from compact_tree import opcode_table, cx_one_point, mut_uniform
+from variation import vary_copy_on_write
+
+class TestVariation(unittest.TestCase):
+    def setUp(self):
+        if not hasattr(creator, "FitnessMax"):
+            creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+        self.pset = create_pset()
+        self.table = opcode_table(self.pset)
+        self.toolbox = base.Toolbox()
+        self.toolbox.register("mate", cx_one_point, table=self.table)
+        self.toolbox.register("expr_mut", gp.genFull, min_=0, max_=2)
+        self.toolbox.register("mutate", mut_uniform, expr=self.toolbox.expr_mut, pset=self.pset, table=self.table)
+
+        random.seed(11)
+        self.parents = [self.table.individual(gp.genHalfAndHalf(self.pset, 1, 5)) for _ in range(40)]
+        for ind in self.parents:
+            ind.fitness.values = (random.random(),) * len(ind.fitness.weights)
+        self.snapshot = [(ind.key, ind.fitness.values) for ind in self.parents]
+
+    def vary(self, cxpb, mutpb, max_height=17):
+        selected = tools.selTournament(self.parents, len(self.parents), tournsize=3)
+        return selected, vary_copy_on_write(selected, self.toolbox, cxpb, mutpb, self.table.height, max_height)
+
+    def test_untouched_offspring_are_shared(self):
+        selected, (offspring, counters) = self.vary(0.0, 0.0)
+        self.assertTrue(all(o is s for o, s in zip(offspring, selected)))
+        self.assertEqual(counters, {"offspring": 40, "cloned": 0, "shared": 40, "reverted": 0})
+
+    def test_only_changed_offspring_are_cloned(self):
+        _, (offspring, counters) = self.vary(0.5, 0.3)
+        # Parents are never modified, changed offspring are private copies without fitness
+        self.assertEqual([(ind.key, ind.fitness.values) for ind in self.parents], self.snapshot)
+        shared = [o for o in offspring if any(o is p for p in self.parents)]
+        self.assertEqual(len(shared), counters["shared"])
+        self.assertTrue(all(o.fitness.valid for o in shared))
+        self.assertTrue(all(not o.fitness.valid for o in offspring if not any(o is p for p in self.parents)))
+        self.assertGreater(counters["cloned"], 0)
+        self.assertLess(counters["cloned"], 40 + counters["reverted"])
+
+    def test_height_limit_falls_back_to_parents(self):
+        _, (offspring, counters) = self.vary(1.0, 0.0, max_height=0)
+        self.assertEqual(counters["reverted"], 40) # Crossover keeps the root, so every child is too high
+        self.assertEqual(counters["shared"], 40)
+        self.assertTrue(all(any(o is p for p in self.parents) for o in offspring))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,8 +12,7 @@ def load_dataset(path: str) -> List[Dict]:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def main():
-    console = Console()
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="🧬 EvoName Trainer - Genetic Programming for Name Parsing",
         epilog="Example: python trainer.py --generations 50 --pop-size 300 --swap 5 --resume --info",
@@ -23,16 +22,28 @@ def main():
     parser.add_argument("--pop-size", type=int, default=300, help="Population size per island.")
     parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility.")
     parser.add_argument("--data-dir", type=str, default="data", help="Directory containing train.json/val.json.")
-    parser.add_argument("--checkpoint", type=str, help="Path to checkpoint file to resume from.")
+    parser.add_argument("--checkpoint", type=str, help="Checkpoint stream to write and resume from (default: model/checkpoint.stream, read with --resume).")
+    parser.add_argument("--checkpoint-every", type=int, default=5, help="Write a checkpoint record every N generations in the background (0 = only at the end).")
     parser.add_argument("--run-id", type=str, help="Custom Run ID for logging.")
     parser.add_argument("--monitor", action="store_true", help="Enable live monitoring (writes monitor.json).")
     parser.add_argument("--seed-model", type=str, help="Path to a champion.pkl to seed the population with.")
     parser.add_argument("--swap", type=str, default="5", help="Migration interval(s). Single int (e.g. '5') or comma-separated (e.g. '3,5,7').")
-    parser.add_argument("--resume", action="store_true", help="Resume training from saved island populations (model/island_*.pkl).")
+    parser.add_argument("--resume", action="store_true", help="Resume training from the checkpoint stream (or island pickles of older versions).")
     parser.add_argument("--info", action="store_true", help="Show detailed fitness breakdown and stats per generation.")
+    parser.add_argument("--fitness-cache", type=int, default=20000, help="Max entries in the cross-generation fitness cache (0 disables it).")
+    parser.add_argument("--simplify", action=argparse.BooleanOptionalAction, default=True, help="Constant-fold and simplify trees before evaluation and export (default: on).")
+    parser.add_argument("--race", type=float, default=0.0, help="Racing: abort offspring that cannot reach this fitness quantile of their island (e.g. 0.25, 0 = off).")
+    parser.add_argument("--semantic-cache", type=int, default=0, help="Evaluate through a subtree output cache of this many MB per process (0 = off).")
+    parser.add_argument("--columnar", action="store_true", help="Evaluate every program over the whole dataset at once, one batch kernel per node (takes precedence over --semantic-cache).")
+    parser.add_argument("--async-islands", action="store_true", help="Run every island in its own process with a share of the jobs; migrants are exchanged through queues, nobody waits.")
+    parser.add_argument("--listen", type=str, help="Serve evaluation (or, with --async-islands, the islands) to cluster.py workers on HOST:PORT (host defaults to 127.0.0.1; use 0.0.0.0 for other machines).")
+    parser.add_argument("--authkey", type=str, help="Shared secret for --listen (default: a random key, printed at start-up). Workers pass it with --authkey.")
     parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="Number of parallel jobs for evaluation (default: all cores).")
-    
-    args = parser.parse_args()
+    return parser
+
+def main():
+    console = Console()
+    args = build_parser().parse_args()
     
     # Reproducibility
     random.seed(args.seed)
@@ -53,7 +64,10 @@ def main():
     
     # Initialize and Run Trainer
     trainer = Trainer(args, train_data, val_data)
-    trainer.train()
+    try:
+        trainer.train()
+    finally:
+        trainer.close()
 
 if __name__ == "__main__":
     main()
@@ -6,6 +6,8 @@ import json
 from deap import gp, creator, base
 from primitive_set import *  # Import all to match trainer's namespace for unpickling
 import primitive_set # Keep module reference for checks
+from simplify import simplify_tree
+from champion_artifact import load_artifact, load_tree
 
 # Recreate the types used in the pickle
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
@@ -86,12 +88,16 @@ def bundle_library():
     
     return regex_defs, lib_src
 
-def generate_js(individual):
+def generate_js(individual, pset=None):
     """
     Wraps the transpiled expression in a self-contained JS module.
+    The tree is simplified (on a copy) first, so dead branches never reach the bundle.
     """
     regex_defs, lib_src = bundle_library()
     
+    individual = gp.PrimitiveTree(individual)
+    simplify_tree(individual, pset or create_pset())
+    
     # DEAP trees are flat lists in pre-order
     iterator = iter(individual)
     
@@ -143,14 +149,17 @@ if (typeof window !== 'undefined') {{
 
 def main():
     parser = argparse.ArgumentParser(description="Transpile Python GP Tree to Self-Contained JavaScript")
-    parser.add_argument("--input", required=True, help="Path to champion.pkl")
+    parser.add_argument("--input", required=True, help="Path to champion.json (or a champion.pkl)")
     parser.add_argument("--output", required=True, help="Path to output .js file")
     
     args = parser.parse_args()
     
     print(f"Loading champion from {args.input}...")
-    with open(args.input, "rb") as f:
-        champion = pickle.load(f)
+    if args.input.endswith(".json"):
+        champion = load_tree(load_artifact(args.input), create_pset())
+    else:
+        with open(args.input, "rb") as f:
+            champion = pickle.load(f)
         
     print("Transpiling and Bundling...")
     js_code = generate_js(champion)
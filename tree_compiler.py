@@ -0,0 +1,107 @@
+import ast
+import time
+import types
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Tuple
+
+from deap import gp
+
+from compact_tree import CompactTree, opcode_table, tree_key
+
+COMPILE_CACHE_SIZE = 2048
+LITERAL_TYPES = (int, float, str, bool)
+# Every node gets the same position (much cheaper than ast.fix_missing_locations)
+LOC = {"lineno": 1, "col_offset": 0, "end_lineno": 1, "end_col_offset": 0}
+
+def build_function(individual, pset) -> Callable:
+    """
+    Turns a PrimitiveTree into a function of pset.arguments without building
+    or parsing source text: the prefix node list is converted into an ast.Lambda
+    (iteratively, so deep trees do not recurse here) and its code object is bound
+    to pset.context with types.FunctionType.
+    """
+    extra = {} # Non-literal, unnamed terminal values (bound as hidden globals)
+    stack = []
+    for node in individual:
+        stack.append((node, []))
+        while len(stack[-1][1]) == stack[-1][0].arity:
+            node, args = stack.pop()
+            if isinstance(node, gp.Terminal):
+                if node.conv_fct is str: # Named terminal or argument
+                    expr = ast.Name(id=node.value, ctx=ast.Load(), **LOC)
+                elif isinstance(node.value, LITERAL_TYPES):
+                    expr = ast.Constant(value=node.value, **LOC)
+                else:
+                    name = f"_const{len(extra)}"
+                    extra[name] = node.value
+                    expr = ast.Name(id=name, ctx=ast.Load(), **LOC)
+            else:
+                expr = ast.Call(func=ast.Name(id=node.name, ctx=ast.Load(), **LOC), args=args, keywords=[], **LOC)
+            if not stack:
+                break
+            stack[-1][1].append(expr)
+
+    params = ast.arguments(posonlyargs=[], args=[ast.arg(arg=a, **LOC) for a in pset.arguments],
+                           kwonlyargs=[], kw_defaults=[], defaults=[])
+    module = ast.Expression(body=ast.Lambda(args=params, body=expr, **LOC))
+    code = compile(module, "<gp-tree>", "eval")
+    lambda_code = next(c for c in code.co_consts if isinstance(c, types.CodeType))
+
+    namespace = pset.context
+    if extra:
+        namespace = dict(pset.context, **extra)
+    return types.FunctionType(lambda_code, namespace)
+
+class CompileCache:
+    """
+    LRU of compiled tree functions, keyed by primitive set and tree (opcodes for
+    CompactTrees, canonical tree string otherwise).
+    Tracks hits/misses and the seconds spent compiling (for generation timing).
+    """
+    def __init__(self, maxsize: int = COMPILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.seconds = 0.0
+
+    def compile(self, individual, pset) -> Callable:
+        key = (id(pset), tree_key(individual))
+        func = self.entries.get(key)
+        if func is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return func
+
+        self.misses += 1
+        start = time.perf_counter()
+        if isinstance(individual, CompactTree):
+            individual = opcode_table(pset).to_nodes(individual)
+        func = build_function(individual, pset)
+        self.seconds += time.perf_counter() - start
+
+        if self.maxsize > 0:
+            self.entries[key] = func
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return func
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "seconds": self.seconds
+        }
+
+COMPILE_CACHE = CompileCache()
+
+def compile_tree(individual, pset) -> Callable:
+    """Drop-in replacement for gp.compile backed by the process-wide COMPILE_CACHE."""
+    return COMPILE_CACHE.compile(individual, pset)
@@ -2,6 +2,8 @@ from collections import Counter
 from typing import List, Dict, Any
 from deap import gp
 
+from compact_tree import as_nodes
+
 class PrimitiveUsageTracker:
     def __init__(self, pset: gp.PrimitiveSetTyped):
         self.pset = pset
@@ -21,7 +23,7 @@ class PrimitiveUsageTracker:
         self.total_individuals = len(population)
 
         for ind in population:
-            for node in ind:
+            for node in as_nodes(ind, self.pset):
                 if isinstance(node, gp.Primitive):
                     self.primitive_counts[node.name] += 1
                 elif isinstance(node, gp.Terminal):
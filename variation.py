@@ -0,0 +1,61 @@
+import random
+from typing import List, Dict, Tuple, Callable
+
+def vary_copy_on_write(offspring: List, toolbox, cxpb: float, mutpb: float,
+                       height: Callable, max_height: int) -> Tuple[List, Dict[str, int]]:
+    """
+    algorithms.varAnd on selected parents without cloning them up front.
+
+    offspring starts as references to the selected parents (selection may pick the
+    same parent several times). A position is cloned (toolbox.clone) only right
+    before toolbox.mate / toolbox.mutate changes it, so unchanged offspring share
+    the parent object and its valid fitness. A child higher than max_height falls
+    back to one of its parents (the gp.staticLimit rule) without a safety copy:
+    for crossover one of the two parent references, for mutation the state before
+    the mutation. Changed offspring get their fitness invalidated.
+
+    Returns (offspring, counters): offspring size, clones made, positions still
+    shared with a parent, and children reverted at the height limit.
+    """
+    offspring = list(offspring)
+    owned = set() # Positions holding a private copy
+    counters = {"offspring": len(offspring), "cloned": 0, "shared": 0, "reverted": 0}
+
+    def own(k):
+        if k not in owned:
+            offspring[k] = toolbox.clone(offspring[k])
+            owned.add(k)
+            counters["cloned"] += 1
+        return offspring[k]
+
+    for k in range(1, len(offspring), 2):
+        if random.random() < cxpb:
+            parents = (offspring[k - 1], offspring[k])
+            toolbox.mate(own(k - 1), own(k))
+            for j in (k - 1, k):
+                if height(offspring[j]) > max_height:
+                    offspring[j] = random.choice(parents)
+                    owned.discard(j)
+                    counters["reverted"] += 1
+                else:
+                    del offspring[j].fitness.values
+
+    for k in range(len(offspring)):
+        if random.random() < mutpb:
+            before = offspring[k]
+            was_owned = k in owned
+            state = (before.codes, before.consts)
+            mutant = own(k)
+            toolbox.mutate(mutant)
+            if height(mutant) > max_height:
+                if was_owned:
+                    mutant.codes, mutant.consts = state # Crossover child, fitness already invalid
+                else:
+                    offspring[k] = before
+                    owned.discard(k)
+                counters["reverted"] += 1
+            else:
+                del mutant.fitness.values
+
+    counters["shared"] = len(offspring) - len(owned)
+    return offspring, counters